@@ -1,24 +1,101 @@
-from flask import Flask, request, jsonify, Response
+from flask import Flask, request, jsonify, Response, g
+from collections import OrderedDict
+from email.utils import format_datetime
+from datetime import datetime, timezone
 import pandas as pd
+import hashlib
+import json
+import threading
+import time
+import os
+import sqlite3
+import sys
 import io
 
+import usuarios_db
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from codigo.almacen_mmap import AlmacenSeries, clave_planta  # noqa: E402
+from codigo.decimacion import METODOS, PUNTOS_GRAFICA, decimar  # noqa: E402
+from codigo.escritores import MAX_FILAS_EXCEL, csv_en_flujo, xlsx_en_flujo  # noqa: E402
+
 app = Flask(__name__)
 
-# Base de datos temporal
-usuarios = []
+# Usuarios: SQLite persistente e indexado por cédula (ver usuarios_db.py)
+LIMITE_PAGINA = 100
+LIMITE_PAGINA_MAX = 1000
+
+# Datos unificados clima + generación por planta (generados por codigo/main.py)
+CARPETA_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "resultados")
+PLANTAS = {
+    "cabeza_y_cola": os.path.join(CARPETA_RESULTADOS, "Cabeza_y_Cola_Clima_Generacion.xlsx"),
+}
+# Si la planta está en el almacén memory-map (cache/series, lo llena el pipeline)
+# se leen solo las columnas y fechas pedidas en lugar de todo el Excel
+CARPETA_SERIES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cache", "series")
+series = AlmacenSeries(CARPETA_SERIES)
+
+# Tamaño máximo (bytes) de las respuestas guardadas en caché
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Tope de puntos por respuesta de /grafica (acota el tamaño del JSON)
+PUNTOS_GRAFICA_MAX = 10_000
+# Filas por bloque en las descargas en flujo (/descargar)
+FILAS_BLOQUE_DESCARGA = 20_000
+DESCARGAS = {
+    "csv": ("text/csv", ".csv"),
+    "csv.gz": ("application/gzip", ".csv.gz"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ".xlsx"),
+}
+
+
+def db():
+    """Conexión SQLite de la petición actual."""
+    if "db" not in g:
+        g.db = usuarios_db.conectar()
+    return g.db
+
+
+@app.teardown_appcontext
+def cerrar_db(_error):
+    con = g.pop("db", None)
+    if con is not None:
+        con.close()
 
 
 # -------------------------------
-# 1. GET: Mostrar listado de usuarios
+# 1. GET: Mostrar listado de usuarios (paginado por cursor)
+#    /usuarios?limite=100&despues=<cursor>&cedula=&correo=&telefono=&nombre=<prefijo>
 # -------------------------------
 @app.get("/usuarios")
 def listar_usuarios():
+    try:
+        limite = min(int(request.args.get("limite", LIMITE_PAGINA)), LIMITE_PAGINA_MAX)
+        despues = int(request.args.get("despues", 0))
+    except ValueError:
+        return jsonify({"error": "limite y despues deben ser enteros"}), 400
+    if limite < 1:
+        return jsonify({"error": "limite debe ser mayor que 0"}), 400
+
+    filtros = {campo: request.args.get(campo) for campo in usuarios_db.FILTROS}
+    # Página y total de la misma versión aunque otro worker escriba en medio
+    with usuarios_db.instantanea(db()) as con:
+        usuarios, siguiente = usuarios_db.listar(con, limite, despues, filtros)
+        total = usuarios_db.contar(con, filtros)
     return jsonify({
-        "total": len(usuarios),
-        "usuarios": usuarios
+        "total": total,
+        "usuarios": usuarios,
+        "siguiente": siguiente
     })
 
 
+@app.get("/usuarios/<cedula>")
+def obtener_usuario(cedula):
+    usuario = usuarios_db.buscar(db(), cedula)
+    if usuario is None:
+        return jsonify({"error": "Usuario no encontrado"}), 404
+    return jsonify(usuario)
+
+
 # -------------------------------
 # 2. GET: Mostrar formulario simple
 # -------------------------------
@@ -58,7 +135,10 @@ def registrar():
         "correo": correo
     }
 
-    usuarios.append(usuario)
+    if not cedula:
+        return "<p>La cédula es obligatoria</p><a href='/frontend'>Volver</a>"
+    if not usuarios_db.registrar(db(), usuario):
+        return "<p>Ya existe un usuario con esa cédula</p><a href='/frontend'>Volver</a>"
 
     return """
     <h2>Usuario registrado correctamente</h2>
@@ -67,39 +147,353 @@ def registrar():
 
 
 # -------------------------------
-# 4. DELETE: Eliminar usuario por posición
+# 4. DELETE: Eliminar usuario por cédula
 # -------------------------------
-@app.get("/eliminar/<int:pos>")
-def eliminar(pos):
-    if pos < 0 or pos >= len(usuarios):
-        return "<p>Posición no válida</p>"
+@app.get("/eliminar/<cedula>")
+def eliminar(cedula):
+    if not usuarios_db.eliminar(db(), cedula):
+        return "<p>Usuario no encontrado</p>"
 
-    usuarios.pop(pos)
     return "<p>Usuario eliminado</p><a href='/frontend'>Volver</a>"
 
 
 # -------------------------------
-# 5. PUT: Actualizar usuario por posición
+# 5. PUT: Actualizar usuario por cédula
 # -------------------------------
-@app.post("/actualizar/<int:pos>")
-def actualizar(pos):
-    if pos < 0 or pos >= len(usuarios):
-        return "<p>Posición no válida</p>"
-
-    nombre = request.form.get("nombre")
-    telefono = request.form.get("telefono")
-    cedula = request.form.get("cedula")
-    correo = request.form.get("correo")
-
-    usuarios[pos] = {
-        "nombre": nombre,
-        "telefono": telefono,
-        "cedula": cedula,
-        "correo": correo
+@app.post("/actualizar/<cedula>")
+def actualizar(cedula):
+    datos = {
+        "nombre": request.form.get("nombre"),
+        "telefono": request.form.get("telefono"),
+        "cedula": request.form.get("cedula"),
+        "correo": request.form.get("correo")
     }
 
+    try:
+        actualizado = usuarios_db.actualizar(db(), cedula, datos)
+    except sqlite3.IntegrityError:
+        return "<p>Ya existe un usuario con esa cédula</p>"
+    if not actualizado:
+        return "<p>Usuario no encontrado</p>"
+
     return "<p>Usuario actualizado</p><a href='/frontend'>Volver</a>"
 
 
+# -------------------------------
+# Caché de datos y de respuestas
+# -------------------------------
+class CacheLRU:
+    """LRU con límite en bytes; segura entre hilos."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.datos = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, clave):
+        with self.lock:
+            if clave not in self.datos:
+                return None
+            self.datos.move_to_end(clave)
+            return self.datos[clave]
+
+    def put(self, clave, cuerpo, mimetype):
+        if len(cuerpo) > self.max_bytes:
+            return
+        with self.lock:
+            if clave in self.datos:
+                self.bytes -= len(self.datos.pop(clave)[0])
+            self.datos[clave] = (cuerpo, mimetype)
+            self.bytes += len(cuerpo)
+            while self.bytes > self.max_bytes:
+                _, (viejo, _) = self.datos.popitem(last=False)
+                self.bytes -= len(viejo)
+
+
+cache_respuestas = CacheLRU(CACHE_MAX_BYTES)
+_datos_planta = {}  # planta -> (mtime_ns, DataFrame)
+_lock_datos = threading.Lock()
+
+
+def version_planta(planta):
+    """mtime del almacén o del archivo de la planta; sirve como versión de los datos."""
+    if series.existe(planta):
+        return series.version(planta)
+    return os.stat(PLANTAS[planta]).st_mtime_ns
+
+
+def planta_disponible(planta):
+    return series.existe(planta) or (planta in PLANTAS and os.path.exists(PLANTAS[planta]))
+
+
+def cargar_planta(planta):
+    """DataFrame de la planta; solo se vuelve a leer el Excel si cambió."""
+    version = version_planta(planta)
+    with _lock_datos:
+        guardado = _datos_planta.get(planta)
+        if guardado and guardado[0] == version:
+            return guardado[1]
+    df = pd.read_excel(PLANTAS[planta])
+    df["Fecha"] = pd.to_datetime(df["Fecha"])
+    df = df.sort_values("Fecha").set_index("Fecha", drop=False)
+    with _lock_datos:
+        _datos_planta[planta] = (version, df)
+    return df
+
+
+def serializar(df, formato):
+    if formato == "csv":
+        return df.to_csv(index=False, date_format="%Y-%m-%d").encode("utf-8"), "text/csv"
+    if formato == "arrow":
+        import pyarrow as pa
+
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, tabla.schema) as escritor:
+            escritor.write_table(tabla)
+        return sink.getvalue().to_pybytes(), "application/vnd.apache.arrow.stream"
+    cuerpo = df.to_json(orient="records", date_format="iso", force_ascii=False)
+    return cuerpo.encode("utf-8"), "application/json"
+
+
+def rango_almacen(planta, desde, hasta, pedidas):
+    """(fechas, {columna: vista}) del almacén; ValueError con el mensaje para el cliente."""
+    disponibles = series.indice(planta)["variables"]
+    faltan = [c for c in pedidas or [] if c not in disponibles]
+    if faltan:
+        raise ValueError(f"Columnas no disponibles: {faltan}")
+    try:
+        return series.rango(planta, pedidas, desde, hasta)
+    except ValueError:
+        raise ValueError("desde/hasta deben tener formato AAAA-MM-DD")
+
+
+def leer_rango(planta, desde, hasta, pedidas):
+    """Fecha + columnas pedidas en el rango; ValueError con el mensaje para el cliente."""
+    if series.existe(planta):
+        fechas, columnas = rango_almacen(planta, desde, hasta, pedidas)
+        df = pd.DataFrame({"Fecha": fechas, **columnas}, copy=False)
+        # Días sin ninguna medición (huecos del almacén) no se devuelven
+        return df.dropna(how="all", subset=df.columns[1:])
+
+    df = cargar_planta(planta)
+    try:
+        df = df.loc[desde:hasta]
+    except (TypeError, ValueError):
+        raise ValueError("desde/hasta deben tener formato AAAA-MM-DD")
+    if pedidas:
+        faltan = [c for c in pedidas if c not in df.columns]
+        if faltan:
+            raise ValueError(f"Columnas no disponibles: {faltan}")
+        df = df[["Fecha"] + pedidas]
+    return df
+
+
+def validacion_http(clave, version):
+    """(cabeceras ETag/Last-Modified, True si el cliente ya tiene esta versión).
+
+    Last-Modified tiene resolución de segundos: se trunca el mtime (ns) al
+    segundo para generarlo y para compararlo. Si los datos cambiaron en el
+    segundo en curso no se envía, porque otra escritura en ese mismo segundo
+    no lo cambiaría; el cliente revalida solo con la ETag.
+    """
+    etag = hashlib.sha1(repr(clave).encode()).hexdigest()
+    segundos = version // 1_000_000_000
+    ultima_mod = datetime.fromtimestamp(segundos, tz=timezone.utc)
+    cabeceras = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+    if segundos < int(time.time()):
+        cabeceras["Last-Modified"] = format_datetime(ultima_mod, usegmt=True)
+    vigente = request.if_none_match.contains(etag) or (
+        not request.if_none_match and "Last-Modified" in cabeceras
+        and request.if_modified_since is not None and request.if_modified_since >= ultima_mod
+    )
+    return cabeceras, vigente
+
+
+def columnas_pedidas(columnas):
+    return [c for c in columnas.split(",") if c and c != "Fecha"] if columnas else None
+
+
+# -------------------------------
+# 6. GET: Serie clima + generación por planta y rango de fechas
+#    /series/<planta>?desde=2025-05-01&hasta=2025-06-30&columnas=Generacion_kWh,Radiacion_kWhm2&formato=json|csv|arrow
+# -------------------------------
+@app.get("/series/<planta>")
+def serie_planta(planta):
+    if not planta_disponible(planta):
+        return jsonify({"error": f"Planta no encontrada: {planta}"}), 404
+
+    desde = request.args.get("desde")
+    hasta = request.args.get("hasta")
+    columnas = request.args.get("columnas")
+    formato = request.args.get("formato", "json").lower()
+    if formato not in ("json", "csv", "arrow"):
+        return jsonify({"error": "formato debe ser json, csv o arrow"}), 400
+
+    # La ETag depende solo de la consulta y de la versión de los datos:
+    # si el cliente ya la tiene se responde 304 sin calcular nada
+    clave = (planta, desde, hasta, columnas, formato, version_planta(planta))
+    cabeceras, vigente = validacion_http(clave, clave[-1])
+    if vigente:
+        return Response(status=304, headers=cabeceras)
+
+    guardado = cache_respuestas.get(clave)
+    if guardado is None:
+        try:
+            df = leer_rango(planta, desde, hasta, columnas_pedidas(columnas))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        try:
+            guardado = serializar(df, formato)
+        except ImportError:
+            return jsonify({"error": "El formato arrow requiere pyarrow"}), 406
+        cache_respuestas.put(clave, *guardado)
+
+    cuerpo, mimetype = guardado
+    return Response(cuerpo, mimetype=mimetype, headers=cabeceras)
+
+
+# -------------------------------
+# 7. GET: Datos para gráficas (serie decimada, picos conservados)
+#    /grafica/<planta>?desde=&hasta=&columnas=Generacion_kWh,Radiacion_kWhm2&puntos=2000&metodo=minmax|lttb
+#    Respuesta por columnas: {"filas_origen": n, "puntos": m, "datos": {"Fecha": [...], "<col>": [...]}}
+# -------------------------------
+@app.get("/grafica/<planta>")
+def grafica_planta(planta):
+    if not planta_disponible(planta):
+        return jsonify({"error": f"Planta no encontrada: {planta}"}), 404
+
+    desde = request.args.get("desde")
+    hasta = request.args.get("hasta")
+    columnas = request.args.get("columnas")
+    metodo = request.args.get("metodo", "minmax").lower()
+    try:
+        puntos = int(request.args.get("puntos", PUNTOS_GRAFICA))
+    except ValueError:
+        return jsonify({"error": "puntos debe ser entero"}), 400
+    if not 3 <= puntos <= PUNTOS_GRAFICA_MAX:
+        return jsonify({"error": f"puntos debe estar entre 3 y {PUNTOS_GRAFICA_MAX}"}), 400
+    if metodo not in METODOS:
+        return jsonify({"error": f"metodo debe ser {' o '.join(METODOS)}"}), 400
+
+    clave = ("grafica", planta, desde, hasta, columnas, puntos, metodo, version_planta(planta))
+    cabeceras, vigente = validacion_http(clave, clave[-1])
+    if vigente:
+        return Response(status=304, headers=cabeceras)
+
+    guardado = cache_respuestas.get(clave)
+    if guardado is None:
+        try:
+            df = leer_rango(planta, desde, hasta, columnas_pedidas(columnas))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        reducido = decimar(df, puntos, metodo)
+        datos = {"Fecha": pd.DatetimeIndex(reducido["Fecha"]).strftime("%Y-%m-%dT%H:%M:%S").tolist()}
+        for col in reducido.columns.drop("Fecha"):
+            valores = reducido[col].astype("float64")
+            datos[col] = valores.astype(object).where(valores.notna(), None).tolist()
+        cuerpo = json.dumps({
+            "planta": planta,
+            "metodo": metodo,
+            "filas_origen": len(df),
+            "puntos": len(reducido),
+            "datos": datos,
+        }, ensure_ascii=False).encode("utf-8")
+        guardado = (cuerpo, "application/json")
+        cache_respuestas.put(clave, *guardado)
+
+    cuerpo, mimetype = guardado
+    return Response(cuerpo, mimetype=mimetype, headers=cabeceras)
+
+
+def cortes(filas, filas_bloque=FILAS_BLOQUE_DESCARGA, primero=500):
+    """(inicio, fin) de bloques que empiezan pequeños y se duplican: el primer byte sale enseguida."""
+    inicio, tamano = 0, min(primero, filas_bloque)
+    while inicio < filas:
+        yield inicio, min(inicio + tamano, filas)
+        inicio += tamano
+        tamano = min(tamano * 2, filas_bloque)
+
+
+def bloques_planta(planta, desde, hasta, pedidas):
+    """(filas, columnas, generador de bloques) del rango; valida antes de empezar a entregar datos.
+
+    Del almacén se leen solo los bloques que se van enviando; si la planta
+    solo está en Excel se trocea el DataFrame ya cargado.
+    """
+    if not series.existe(planta):
+        df = leer_rango(planta, desde, hasta, pedidas)
+        return len(df), list(df.columns), (df.iloc[i0:i1] for i0, i1 in cortes(len(df)))
+
+    fechas, columnas = rango_almacen(planta, desde, hasta, pedidas)
+
+    def generar():
+        for i0, i1 in cortes(len(fechas)):
+            bloque = pd.DataFrame({"Fecha": fechas[i0:i1], **{c: v[i0:i1] for c, v in columnas.items()}})
+            yield bloque.dropna(how="all", subset=bloque.columns[1:])
+
+    return len(fechas), ["Fecha", *columnas], generar()
+
+
+# -------------------------------
+# 8. GET: Descarga del dataset unificado en flujo (chunked, sin armar el archivo en memoria)
+#    /descargar/<planta>?desde=&hasta=&columnas=&formato=csv|csv.gz|xlsx
+#    /descargar?plantas=a,b&...   flota: columna planta en CSV, una hoja por planta en xlsx
+#                                 (sin plantas: todas las del almacén y de resultados/)
+# -------------------------------
+@app.get("/descargar")
+@app.get("/descargar/<planta>")
+def descargar(planta=None):
+    formato = request.args.get("formato", "csv").lower()
+    if formato not in DESCARGAS:
+        return jsonify({"error": f"formato debe ser {', '.join(DESCARGAS)}"}), 400
+    if planta is not None:
+        plantas = [planta]
+    elif request.args.get("plantas"):
+        plantas = [p for p in request.args["plantas"].split(",") if p]
+    else:
+        disponibles = {clave_planta(p): p for p in series.plantas()}
+        disponibles.update({p: p for p in PLANTAS if clave_planta(p) not in disponibles and planta_disponible(p)})
+        plantas = sorted(disponibles.values())
+    faltan = [p for p in plantas if not planta_disponible(p)]
+    if faltan or not plantas:
+        return jsonify({"error": f"Planta no encontrada: {', '.join(faltan)}"}), 404
+
+    # Todo se valida aquí: una vez enviado el primer byte ya no se puede responder un error
+    desde, hasta = request.args.get("desde"), request.args.get("hasta")
+    pedidas = columnas_pedidas(request.args.get("columnas"))
+    fuentes = []
+    todas = {}  # unión ordenada de columnas: cada planta puede tener variables distintas
+    for p in plantas:
+        try:
+            filas, columnas, bloques = bloques_planta(p, desde, hasta, pedidas)
+        except ValueError as e:
+            return jsonify({"error": f"{p}: {e}"}), 400
+        if formato == "xlsx" and filas >= MAX_FILAS_EXCEL:
+            return jsonify({"error": f"{p}: {filas} filas superan el máximo de Excel; usa csv.gz"}), 400
+        todas.update(dict.fromkeys(columnas))
+        fuentes.append((p, bloques))
+
+    if formato == "xlsx":
+        cuerpo = xlsx_en_flujo(fuentes)
+    elif len(fuentes) == 1:
+        cuerpo = csv_en_flujo(fuentes[0][1], comprimir=formato == "csv.gz")
+    else:
+        cuerpo = csv_en_flujo(
+            (b.assign(planta=p).reindex(columns=["planta", *todas]) for p, bloques in fuentes for b in bloques),
+            comprimir=formato == "csv.gz",
+        )
+
+    mimetype, extension = DESCARGAS[formato]
+    nombre = f"{clave_planta(plantas[0]) if len(plantas) == 1 else 'flota'}_clima_generacion{extension}"
+    return Response(cuerpo, mimetype=mimetype, headers={
+        "Content-Disposition": f'attachment; filename="{nombre}"',
+        "Cache-Control": "no-store",
+        "X-Accel-Buffering": "no",  # que un proxy nginx no acumule la respuesta
+    })
+
+
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    # Servidor de desarrollo (un proceso); en producción usar wsgi.py con gunicorn
+    app.run(debug=os.environ.get("FLASK_DEBUG") == "1")
\ No newline at end of file
@@ -0,0 +1,364 @@
+# ============================================================
+#  MONITOREO EN VIVO (ASYNCIO + SERVER-SENT EVENTS)
+# ============================================================
+# Servicio HTTP mínimo sobre asyncio (solo librería estándar)
+# que corre junto a la API Flask:
+#   GET  /            tablero HTML que escucha /eventos
+#   GET  /eventos     stream SSE (?planta=... para filtrar)
+#   GET  /estado      KPIs actuales de todas las plantas (JSON)
+#   POST /lecturas    lecturas del inversor {planta, fecha, energia_kwh}
+#   POST /clima       días de NASA {planta, fecha, radiacion_kwhm2}
+#   (ambos aceptan un objeto o una lista; un lote con un ítem inválido se rechaza entero)
+#
+# Cada cliente es una corrutina con su propia cola acotada, no un
+# hilo: miles de conexiones ociosas solo cuestan memoria. Si un
+# cliente lento llena su cola se descartan sus eventos más viejos.
+#
+# Ejecutar con un inversor simulado:
+#   python API/monitor.py --simular
+# ------------------------------------------------------------
+
+import argparse
+import asyncio
+import json
+import math
+import random
+from collections import deque
+from datetime import date, datetime, timedelta
+from urllib.parse import parse_qs, urlsplit
+
+VENTANAS_PR = (7, 30)
+DIAS_EN_MEMORIA = 31
+MESES_EN_MEMORIA = 13
+MAX_COLA_CLIENTE = 100
+EVENTOS_HISTORIAL = 256
+PING_SEGUNDOS = 15
+MAX_CUERPO = 1 << 20
+
+ESTADOS_HTTP = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+                405: "Method Not Allowed", 413: "Payload Too Large"}
+
+
+# -------------------------------
+# KPIs incrementales por planta
+# -------------------------------
+class KpisPlanta:
+    """Totales diarios y mensuales que se actualizan lectura a lectura."""
+
+    def __init__(self, planta: str, pvsol: dict | None = None):
+        self.planta = planta
+        self.pvsol = pvsol or {}
+        self.dias = {}    # fecha → [generación kWh, radiación kWh/m² o None]
+        self.meses = {}   # (año, mes) → generación kWh
+        self.gen_total = 0.0
+
+    def _podar(self):
+        if len(self.dias) > DIAS_EN_MEMORIA:
+            for dia in sorted(self.dias)[:-DIAS_EN_MEMORIA]:
+                del self.dias[dia]
+        if len(self.meses) > MESES_EN_MEMORIA:
+            for mes in sorted(self.meses)[:-MESES_EN_MEMORIA]:
+                del self.meses[mes]
+
+    def lectura(self, momento: datetime, energia_kwh: float) -> dict:
+        dia = momento.date()
+        self.dias.setdefault(dia, [0.0, None])[0] += energia_kwh
+        clave = (dia.year, dia.month)
+        self.meses[clave] = self.meses.get(clave, 0.0) + energia_kwh
+        self.gen_total += energia_kwh
+        self._podar()
+        return self.resumen(dia)
+
+    def clima(self, dia: date, radiacion_kwhm2: float) -> dict:
+        self.dias.setdefault(dia, [0.0, None])[1] = radiacion_kwhm2
+        self._podar()
+        return self.resumen(dia)
+
+    def _pr_ventana(self, dia: date, dias: int):
+        gen = rad = 0.0
+        for k in range(dias):
+            valores = self.dias.get(dia - timedelta(days=k))
+            if valores and valores[1]:
+                gen += valores[0]
+                rad += valores[1]
+        return gen / rad if rad else None
+
+    def resumen(self, dia: date) -> dict:
+        gen_dia, rad_dia = self.dias.get(dia, [0.0, None])
+        gen_mes = self.meses.get((dia.year, dia.month), 0.0)
+        estimado = self.pvsol.get(dia.month)
+        datos = {
+            "planta": self.planta,
+            "fecha": dia.isoformat(),
+            "gen_dia": round(gen_dia, 3),
+            "rad_dia": rad_dia,
+            "pr_dia": round(gen_dia / rad_dia, 3) if rad_dia else None,
+            "gen_mes": round(gen_mes, 3),
+            "estimado_mes": estimado,
+            "cumplimiento_mes": round(100.0 * gen_mes / estimado, 1) if estimado else None,
+            "gen_total": round(self.gen_total, 3),
+        }
+        for v in VENTANAS_PR:
+            pr = self._pr_ventana(dia, v)
+            datos[f"pr_{v}d"] = round(pr, 3) if pr is not None else None
+        return datos
+
+
+# -------------------------------
+# Servicio
+# -------------------------------
+class Monitor:
+    def __init__(self, pvsol_por_planta: dict | None = None, max_cola: int = MAX_COLA_CLIENTE):
+        self.pvsol_por_planta = pvsol_por_planta or {}
+        self.max_cola = max_cola
+        self.plantas: dict[str, KpisPlanta] = {}
+        self.clientes: set[tuple[asyncio.Queue, str | None]] = set()
+        self.historial = deque(maxlen=EVENTOS_HISTORIAL)
+        self.ultimo_id = 0
+
+    def _planta(self, nombre: str) -> KpisPlanta:
+        if nombre not in self.plantas:
+            self.plantas[nombre] = KpisPlanta(nombre, self.pvsol_por_planta.get(nombre))
+        return self.plantas[nombre]
+
+    # ---------- ingesta ----------
+    @staticmethod
+    def _valor(dato: dict, campo: str) -> float:
+        """Número finito y no negativo: NaN o inf romperían los totales y el JSON."""
+        valor = float(dato[campo])
+        if not (math.isfinite(valor) and valor >= 0):
+            raise ValueError(f"{campo} debe ser un número finito y no negativo: {dato[campo]!r}")
+        return valor
+
+    @staticmethod
+    def _leer_lectura(lectura: dict) -> tuple[str, datetime, float]:
+        return (str(lectura["planta"]), datetime.fromisoformat(lectura["fecha"]),
+                Monitor._valor(lectura, "energia_kwh"))
+
+    @staticmethod
+    def _leer_clima(dia: dict) -> tuple[str, date, float]:
+        return str(dia["planta"]), date.fromisoformat(dia["fecha"][:10]), Monitor._valor(dia, "radiacion_kwhm2")
+
+    def _aplicar_lectura(self, planta: str, momento: datetime, energia_kwh: float):
+        self.publicar("kpi", self._planta(planta).lectura(momento, energia_kwh))
+
+    def _aplicar_clima(self, planta: str, dia: date, radiacion_kwhm2: float):
+        self.publicar("kpi", self._planta(planta).clima(dia, radiacion_kwhm2))
+
+    def ingerir_lectura(self, lectura: dict):
+        try:
+            valores = self._leer_lectura(lectura)
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"⚠️ Lectura descartada: {e}")
+            return
+        self._aplicar_lectura(*valores)
+
+    def ingerir_clima(self, dia: dict):
+        try:
+            valores = self._leer_clima(dia)
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"⚠️ Clima descartado: {e}")
+            return
+        self._aplicar_clima(*valores)
+
+    # ---------- difusión ----------
+    def publicar(self, evento: str, datos: dict):
+        self.ultimo_id += 1
+        mensaje = (self.ultimo_id, datos.get("planta"),
+                   f"id: {self.ultimo_id}\nevent: {evento}\ndata: {json.dumps(datos)}\n\n".encode())
+        self.historial.append(mensaje)
+        for cola, planta in self.clientes:
+            if planta is not None and planta != mensaje[1]:
+                continue
+            if cola.full():
+                # Cliente lento: se pierde su evento más viejo, no se bloquea a los demás
+                cola.get_nowait()
+            cola.put_nowait(mensaje[2])
+
+    async def _sse(self, writer, planta: str | None, ultimo_visto: int | None):
+        cola = asyncio.Queue(self.max_cola)
+        cliente = (cola, planta)
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+            b"Connection: keep-alive\r\nAccess-Control-Allow-Origin: *\r\n\r\nretry: 3000\n\n"
+        )
+        # Reconexión del navegador: reenviar lo que se perdió (si sigue en el historial)
+        if ultimo_visto is not None:
+            for id_, p, datos in list(self.historial)[-self.max_cola:]:
+                if id_ > ultimo_visto and (planta is None or p == planta):
+                    writer.write(datos)
+        self.clientes.add(cliente)
+        try:
+            await writer.drain()
+            while True:
+                try:
+                    datos = await asyncio.wait_for(cola.get(), PING_SEGUNDOS)
+                except asyncio.TimeoutError:
+                    datos = b": ping\n\n"
+                writer.write(datos)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.clientes.discard(cliente)
+
+    # ---------- HTTP ----------
+    async def manejar(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            linea = await reader.readline()
+            metodo, objetivo, _ = linea.decode("latin-1").split(" ", 2)
+            encabezados = {}
+            while (h := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                clave, _, valor = h.decode("latin-1").partition(":")
+                encabezados[clave.strip().lower()] = valor.strip()
+            url = urlsplit(objetivo)
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+            if url.path == "/eventos" and metodo == "GET":
+                ultimo = encabezados.get("last-event-id")
+                await self._sse(writer, params.get("planta"), int(ultimo) if ultimo and ultimo.isdigit() else None)
+                return
+
+            largo = int(encabezados.get("content-length") or 0)
+            if largo > MAX_CUERPO:
+                return await self._responder(writer, 413, {"error": "Cuerpo demasiado grande"})
+            cuerpo = await reader.readexactly(largo) if largo else b""
+            await self._rutas(writer, metodo, url.path, cuerpo)
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if not writer.is_closing():
+                writer.close()
+
+    async def _rutas(self, writer, metodo: str, ruta: str, cuerpo: bytes):
+        if ruta == "/" and metodo == "GET":
+            return await self._responder(writer, 200, TABLERO, "text/html; charset=utf-8")
+        if ruta == "/estado" and metodo == "GET":
+            return await self._responder(writer, 200, {
+                p: k.resumen(max(k.dias)) for p, k in self.plantas.items() if k.dias
+            })
+        if ruta in ("/lecturas", "/clima"):
+            if metodo != "POST":
+                return await self._responder(writer, 405, {"error": "Usa POST"})
+            if ruta == "/lecturas":
+                leer, aplicar = self._leer_lectura, self._aplicar_lectura
+            else:
+                leer, aplicar = self._leer_clima, self._aplicar_clima
+            try:
+                datos = json.loads(cuerpo or b"null")
+            except ValueError as e:
+                return await self._responder(writer, 400, {"error": f"JSON inválido: {e}"})
+            items = datos if isinstance(datos, list) else [datos]
+            # Todo el lote se valida antes de ingerir: o entra completo o no entra nada
+            validos = []
+            for i, item in enumerate(items):
+                try:
+                    validos.append(leer(item))
+                except (ValueError, KeyError, TypeError) as e:
+                    print(f"⚠️ Lote rechazado en {ruta} (ítem {i}): {e}")
+                    return await self._responder(writer, 400, {"error": f"Dato inválido: {e}", "item": i})
+            for valores in validos:
+                aplicar(*valores)
+            return await self._responder(writer, 202, {"ok": True, "ingeridos": len(validos)})
+        return await self._responder(writer, 404, {"error": "Ruta no encontrada"})
+
+    async def _responder(self, writer, estado: int, cuerpo, tipo: str = "application/json"):
+        datos = cuerpo.encode() if isinstance(cuerpo, str) else json.dumps(cuerpo).encode()
+        writer.write(
+            f"HTTP/1.1 {estado} {ESTADOS_HTTP[estado]}\r\nContent-Type: {tipo}\r\n"
+            f"Content-Length: {len(datos)}\r\nConnection: close\r\n\r\n".encode() + datos
+        )
+        await writer.drain()
+
+
+# -------------------------------
+# Inversor simulado
+# -------------------------------
+async def simular_inversor(monitor: Monitor, plantas=("Cabeza y Cola",), intervalo: float = 1.0,
+                           paso: timedelta = timedelta(minutes=15), kwp: float = 100.0,
+                           inicio: datetime | None = None, pasos: int | None = None):
+    """Publica una lectura por planta cada `intervalo` segundos; el reloj simulado avanza `paso`.
+
+    Al cambiar de día se publica el clima del día anterior, como llega de NASA.
+    """
+    momento = inicio or datetime.combine(date.today(), datetime.min.time())
+    radiacion = {p: random.uniform(3.5, 6.0) for p in plantas}
+    n = 0
+    while pasos is None or n < pasos:
+        hora = momento.hour + momento.minute / 60
+        sol = max(math.sin((hora - 6) / 12 * math.pi), 0.0)
+        for p in plantas:
+            energia = kwp * sol * radiacion[p] / 5.0 * paso.total_seconds() / 3600 * random.uniform(0.85, 1.0)
+            monitor.ingerir_lectura({"planta": p, "fecha": momento.isoformat(), "energia_kwh": energia})
+        siguiente = momento + paso
+        if siguiente.date() != momento.date():
+            for p in plantas:
+                monitor.ingerir_clima({"planta": p, "fecha": momento.date().isoformat(),
+                                       "radiacion_kwhm2": radiacion[p]})
+                radiacion[p] = random.uniform(3.5, 6.0)
+        momento = siguiente
+        n += 1
+        await asyncio.sleep(intervalo)
+
+
+TABLERO = """<!doctype html>
+<meta charset="utf-8">
+<title>Monitoreo en vivo</title>
+<h1>Monitoreo en vivo</h1>
+<table border="1" cellpadding="4">
+  <thead><tr><th>Planta</th><th>Fecha</th><th>Gen. día (kWh)</th><th>PR día</th>
+  <th>PR 7d</th><th>PR 30d</th><th>Gen. mes (kWh)</th><th>Cumplimiento mes (%)</th></tr></thead>
+  <tbody id="filas"></tbody>
+</table>
+<script>
+const campos = ["planta", "fecha", "gen_dia", "pr_dia", "pr_7d", "pr_30d", "gen_mes", "cumplimiento_mes"];
+const filas = {};
+new EventSource("/eventos").addEventListener("kpi", (e) => {
+  const k = JSON.parse(e.data);
+  if (!filas[k.planta]) {
+    filas[k.planta] = document.getElementById("filas").insertRow();
+    campos.forEach(() => filas[k.planta].insertCell());
+  }
+  campos.forEach((c, i) => filas[k.planta].cells[i].textContent = k[c] ?? "-");
+});
+</script>
+"""
+
+
+async def servir(host: str = "127.0.0.1", puerto: int = 8765, monitor: Monitor | None = None,
+                 simular: bool = False, intervalo: float = 1.0):
+    monitor = monitor or Monitor()
+    servidor = await asyncio.start_server(monitor.manejar, host, puerto, backlog=4096)
+    print(f"📡 Monitoreo en vivo en http://{host}:{puerto}/")
+    tareas = [asyncio.create_task(simular_inversor(monitor, intervalo=intervalo))] if simular else []
+    async with servidor:
+        try:
+            await servidor.serve_forever()
+        finally:
+            for t in tareas:
+                t.cancel()
+
+
+def _pvsol_desde_tabla(ruta: str) -> dict:
+    import os
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from codigo.kpis import cargar_pvsol, pvsol_por_planta
+
+    return pvsol_por_planta(cargar_pvsol(ruta))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monitoreo en vivo (SSE)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--simular", action="store_true", help="alimenta el servicio con un inversor simulado")
+    parser.add_argument("--intervalo", type=float, default=1.0, help="segundos entre lecturas simuladas")
+    parser.add_argument("--pvsol", help="tabla de estimados PV*SOL (planta, Mes, Estimado_kWh)")
+    args = parser.parse_args()
+    pvsol = _pvsol_desde_tabla(args.pvsol) if args.pvsol else None
+    try:
+        asyncio.run(servir(args.host, args.puerto, Monitor(pvsol), args.simular, args.intervalo))
+    except KeyboardInterrupt:
+        pass
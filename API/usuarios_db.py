@@ -0,0 +1,155 @@
+# -------------------------------
+# Almacenamiento persistente de usuarios (SQLite)
+# -------------------------------
+# - `cedula` es la clave (índice único): buscar, actualizar y
+#   eliminar por cédula cuesta O(log n).
+# - `correo` y `nombre` tienen índice para filtrar sin recorrer
+#   toda la tabla.
+# - El listado se pagina por cursor (id del último registro
+#   devuelto), así que no depende de OFFSET ni de la posición.
+# - Modo WAL: con varios workers (gunicorn -w N) los lectores no
+#   bloquean al escritor ni ven escrituras a medias; las escrituras
+#   se serializan en SQLite y esperan hasta `timeout` segundos.
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+RUTA_DB = os.environ.get(
+    "USUARIOS_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "usuarios.sqlite")
+)
+
+CAMPOS = ["nombre", "telefono", "cedula", "correo"]
+FILTROS = {
+    "cedula": "cedula = ?",
+    "correo": "correo = ?",
+    "telefono": "telefono = ?",
+    # prefijo sin distinguir mayúsculas, como rango para usar el índice NOCASE
+    "nombre": "nombre COLLATE NOCASE >= ? AND nombre COLLATE NOCASE < ?",
+}
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre    TEXT,
+    telefono  TEXT,
+    cedula    TEXT NOT NULL UNIQUE,
+    correo    TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_usuarios_correo ON usuarios (correo);
+CREATE INDEX IF NOT EXISTS idx_usuarios_nombre ON usuarios (nombre COLLATE NOCASE);
+"""
+
+
+_preparadas = set()
+_lock_preparar = threading.Lock()
+
+
+def preparar(ruta=None):
+    """Crea el esquema y activa WAL (queda guardado en el archivo); una vez por proceso."""
+    ruta = ruta or RUTA_DB
+    with _lock_preparar:
+        if ruta in _preparadas:
+            return
+        con = sqlite3.connect(ruta, timeout=30)
+        try:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(_ESQUEMA)
+        finally:
+            con.close()
+        _preparadas.add(ruta)
+
+
+def conectar(ruta=None):
+    preparar(ruta)
+    con = sqlite3.connect(ruta or RUTA_DB, timeout=30)
+    con.row_factory = sqlite3.Row
+    # Con WAL, NORMAL no arriesga la consistencia (solo la última transacción ante un corte de luz)
+    con.execute("PRAGMA synchronous=NORMAL")
+    return con
+
+
+@contextmanager
+def instantanea(con):
+    """Varias lecturas sobre la misma versión de la tabla (p. ej. página + total)."""
+    con.execute("BEGIN")
+    try:
+        yield con
+    finally:
+        con.rollback()
+
+
+def _a_dict(fila):
+    return {c: fila[c] for c in CAMPOS}
+
+
+def _where(filtros):
+    condiciones, valores = [], []
+    for campo, valor in filtros.items():
+        if campo in FILTROS and valor not in (None, ""):
+            condiciones.append(FILTROS[campo])
+            if campo == "nombre":
+                valores.extend([valor, valor + "\U0010ffff"])
+            else:
+                valores.append(valor)
+    return condiciones, valores
+
+
+def contar(con, filtros=None):
+    condiciones, valores = _where(filtros or {})
+    sql = "SELECT COUNT(*) FROM usuarios"
+    if condiciones:
+        sql += " WHERE " + " AND ".join(condiciones)
+    return con.execute(sql, valores).fetchone()[0]
+
+
+def listar(con, limite=100, despues=0, filtros=None):
+    """Página de usuarios con id > `despues`. Devuelve (usuarios, siguiente_cursor)."""
+    condiciones, valores = _where(filtros or {})
+    condiciones.insert(0, "id > ?")
+    valores.insert(0, despues)
+    filas = con.execute(
+        f"SELECT id, {', '.join(CAMPOS)} FROM usuarios WHERE {' AND '.join(condiciones)} "
+        f"ORDER BY id LIMIT ?",
+        (*valores, limite + 1),
+    ).fetchall()
+    siguiente = filas[limite - 1]["id"] if len(filas) > limite else None
+    return [_a_dict(f) for f in filas[:limite]], siguiente
+
+
+def buscar(con, cedula):
+    fila = con.execute(f"SELECT {', '.join(CAMPOS)} FROM usuarios WHERE cedula = ?", (cedula,)).fetchone()
+    return _a_dict(fila) if fila else None
+
+
+def registrar(con, usuario):
+    """Inserta el usuario. Devuelve False si la cédula ya existe."""
+    try:
+        with con:
+            con.execute(
+                "INSERT INTO usuarios (nombre, telefono, cedula, correo) VALUES (?, ?, ?, ?)",
+                [usuario.get(c) for c in CAMPOS],
+            )
+    except sqlite3.IntegrityError:
+        return False
+    return True
+
+
+def actualizar(con, cedula, datos):
+    """Actualiza los campos enviados (los vacíos se conservan). False si no existe."""
+    cambios = {c: v for c, v in datos.items() if c in CAMPOS and v not in (None, "")}
+    if not cambios:
+        return buscar(con, cedula) is not None
+    asignaciones = ", ".join(f"{c} = ?" for c in cambios)
+    with con:
+        cursor = con.execute(
+            f"UPDATE usuarios SET {asignaciones} WHERE cedula = ?", (*cambios.values(), cedula)
+        )
+    return cursor.rowcount > 0
+
+
+def eliminar(con, cedula):
+    with con:
+        cursor = con.execute("DELETE FROM usuarios WHERE cedula = ?", (cedula,))
+    return cursor.rowcount > 0
@@ -0,0 +1,21 @@
+# -------------------------------
+# Punto de entrada WSGI para producción (varios procesos)
+# -------------------------------
+#   gunicorn --chdir API -w 4 -b 0.0.0.0:8000 wsgi:app
+#
+# Cada worker es un proceso con su propia memoria; el estado
+# compartido vive en disco:
+# - usuarios: SQLite en modo WAL (usuarios_db.py), una conexión
+#   por petición, nunca compartida entre procesos.
+# - series: almacén memory-map de cache/series (solo lectura aquí).
+# Las cachés en memoria de api.py van por worker y su clave
+# incluye la versión (mtime) de los datos, así que un worker no
+# responde con datos que otro ya vio cambiar.
+# Compatible con --preload: al importar no queda ninguna
+# conexión abierta que se herede en el fork.
+
+import usuarios_db
+from api import app
+
+# Esquema y WAL antes de aceptar peticiones (no en la primera de cada worker)
+usuarios_db.preparar()
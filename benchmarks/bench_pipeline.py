@@ -0,0 +1,256 @@
+# ============================================================
+#  BENCHMARK POR ETAPAS DEL PIPELINE CLIMA + GENERACIÓN
+# ============================================================
+# Mide por separado cada etapa de codigo/main.py sobre datos
+# sintéticos (o respuestas NASA grabadas en benchmarks/fixtures/)
+# y guarda los tiempos en JSON para comparar entre commits.
+# Funciona sin conexión: nunca llama a la API de NASA.
+#
+# Uso:
+#   python benchmarks/bench_pipeline.py --plantas 5 --anios 2 --intervalo 60
+#   python benchmarks/bench_pipeline.py --comparar antes.json despues.json
+#   python benchmarks/bench_pipeline.py --grabar-fixture   (requiere red)
+# ------------------------------------------------------------
+
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import sintetico  # noqa: E402
+from codigo.esquema import RENOMBRE_CLIMA  # noqa: E402
+
+CARPETA_FIXTURES = os.path.join(RAIZ, "benchmarks", "fixtures")
+CARPETA_RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados")
+
+
+# ========= UTILIDADES =========
+def medir(funcion, repeticiones: int):
+    """Ejecuta `funcion` varias veces; devuelve (tiempos, último resultado)."""
+    tiempos, resultado = [], None
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - t0)
+    return tiempos, resultado
+
+
+def _resumen(tiempos, filas):
+    return {
+        "min_s": min(tiempos),
+        "mediana_s": statistics.median(tiempos),
+        "media_s": statistics.fmean(tiempos),
+        "repeticiones": len(tiempos),
+        "filas": int(filas),
+    }
+
+
+def commit_actual() -> str | None:
+    try:
+        return subprocess.check_output(["git", "-C", RAIZ, "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def cargar_fixtures() -> list[dict]:
+    """Respuestas NASA grabadas (JSON tal cual las devuelve la API)."""
+    payloads = []
+    for ruta in sorted(glob.glob(os.path.join(CARPETA_FIXTURES, "nasa_*.json"))):
+        with open(ruta, encoding="utf-8") as f:
+            payloads.append(json.load(f))
+    return payloads
+
+
+def grabar_fixture(lat=8.7563, lon=-75.8886, inicio="20230501", fin="20251021"):
+    """Descarga una respuesta real de NASA POWER y la guarda como fixture."""
+    import requests
+
+    from codigo.cache_nasa import PARAMETROS_NASA, URL_NASA_DIARIO
+
+    r = requests.get(URL_NASA_DIARIO, params={
+        "start": inicio, "end": fin, "latitude": lat, "longitude": lon,
+        "parameters": ",".join(PARAMETROS_NASA), "format": "JSON", "community": "RE",
+    }, timeout=120)
+    r.raise_for_status()
+    os.makedirs(CARPETA_FIXTURES, exist_ok=True)
+    ruta = os.path.join(CARPETA_FIXTURES, f"nasa_{lat}_{lon}_{inicio}_{fin}.json")
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(r.json(), f)
+    return ruta
+
+
+# ========= ETAPAS (misma lógica que codigo/main.py) =========
+def nasa_a_dataframe(payload: dict) -> pd.DataFrame:
+    df = pd.DataFrame(payload["properties"]["parameter"])
+    df.index = pd.to_datetime(df.index)
+    df_clima = df.rename(columns=RENOMBRE_CLIMA).rename_axis("Fecha").reset_index()
+    from codigo.esquema import aplicar_esquema
+
+    return aplicar_esquema(df_clima)
+
+
+def ejecutar(plantas: int, anios: float, intervalo: int, repeticiones: int, formato: str,
+             max_procesos: int | None) -> dict:
+    from codigo.esquema import aplicar_esquema
+    from codigo.generacion import consolidar_diario, leer_generacion
+
+    sitios = sintetico.flota(plantas)
+    fixtures = cargar_fixtures()
+    if not fixtures:
+        print(f"⚠️ Sin respuestas NASA grabadas en {CARPETA_FIXTURES}: se usan payloads sintéticos "
+              "(grábalas con --grabar-fixture)")
+    etapas = {}
+
+    with tempfile.TemporaryDirectory(prefix="bench_clima_") as tmp:
+        # Datos de entrada (no se mide)
+        rutas, payloads = {}, {}
+        for i, fila in enumerate(sitios.itertuples(index=False)):
+            export = sintetico.export_inversor(anios=anios, intervalo_min=intervalo, semilla=i)
+            rutas[fila.planta] = sintetico.escribir_export(export, os.path.join(tmp, f"{fila.planta}.{formato}"))
+            payloads[fila.planta] = (fixtures[i % len(fixtures)] if fixtures
+                                     else sintetico.payload_nasa(fila.lat, fila.lon, anios=anios, semilla=i))
+
+        # 1. NASA JSON → DataFrame
+        t, clima = medir(lambda: {p: nasa_a_dataframe(j) for p, j in payloads.items()}, repeticiones)
+        etapas["nasa_json_a_dataframe"] = _resumen(t, sum(len(d) for d in clima.values()))
+
+        # 2. Excel/CSV → DataFrame con fechas normalizadas y kWh
+        def _ingesta():
+            if formato == "csv":
+                from codigo.generacion import limpiar_generacion
+                return {p: limpiar_generacion(pd.read_csv(r, skiprows=1)) for p, r in rutas.items()}
+            return {p: leer_generacion(r) for p, r in rutas.items()}
+        t, gen = medir(_ingesta, repeticiones)
+        etapas["ingesta_generacion"] = _resumen(t, sum(len(d) for d in gen.values()))
+
+        # 3. Consolidación diaria
+        def _diario():
+            salida = {}
+            for p, d in gen.items():
+                d = d.assign(Fecha=d["Fecha"].dt.normalize())
+                salida[p] = aplicar_esquema(consolidar_diario(d))
+            return salida
+        t, diario = medir(_diario, repeticiones)
+        etapas["groupby_diario"] = _resumen(t, sum(len(d) for d in diario.values()))
+
+        # 4. Merge clima + generación
+        def _merge():
+            return {
+                p: pd.merge(diario[p], clima[p], on="Fecha", how="inner").sort_values("Fecha").reset_index(drop=True)
+                for p in diario
+            }
+        t, union = medir(_merge, repeticiones)
+        etapas["merge"] = _resumen(t, sum(len(d) for d in union.values()))
+
+        # 5. KPIs + comparación PV*SOL
+        from codigo.informe import calcular_kpis
+
+        t, _ = medir(lambda: {p: calcular_kpis(d) for p, d in union.items()}, repeticiones)
+        etapas["kpis_pvsol"] = _resumen(t, sum(len(d) for d in union.values()))
+
+        # 5b. Motor de KPIs de flota (todas las plantas en pasadas agrupadas)
+        from codigo.informe import PVSOL_CABEZA_Y_COLA
+        from codigo.kpis import indexar_flota, kpis_flota, pvsol_desde_dict
+
+        tabla_pvsol = pvsol_desde_dict({p: PVSOL_CABEZA_Y_COLA for p in union})
+        t, _ = medir(lambda: kpis_flota(indexar_flota(union), tabla_pvsol), repeticiones)
+        etapas["kpis_flota"] = _resumen(t, sum(len(d) for d in union.values()))
+
+        # 6. Gráficas (Agg, pool de procesos)
+        from codigo.graficas import renderizar_flota
+
+        carpeta_png = os.path.join(tmp, "resultados")
+        t, pngs = medir(lambda: renderizar_flota(union, carpeta_png, max_procesos), repeticiones)
+        etapas["graficas"] = _resumen(t, len(pngs))
+
+        # 7. Informes Word
+        from codigo.informe import generar_informes_flota
+
+        carpeta_docx = os.path.join(tmp, "informes")
+        t, docs = medir(
+            lambda: generar_informes_flota(union, {p: PVSOL_CABEZA_Y_COLA for p in union},
+                                           carpeta_salida=carpeta_docx, carpeta_graficas=carpeta_png,
+                                           max_procesos=max_procesos),
+            repeticiones,
+        )
+        etapas["informes_docx"] = _resumen(t, len(docs))
+
+    return {
+        "commit": commit_actual(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "maquina": platform.machine(),
+        "cpus": os.cpu_count(),
+        "parametros": {
+            "plantas": plantas, "anios": anios, "intervalo_min": intervalo,
+            "repeticiones": repeticiones, "formato": formato,
+            "nasa": "fixtures" if fixtures else "sintetico",
+        },
+        "etapas": etapas,
+    }
+
+
+def comparar(ruta_antes: str, ruta_despues: str):
+    with open(ruta_antes, encoding="utf-8") as f:
+        antes = json.load(f)
+    with open(ruta_despues, encoding="utf-8") as f:
+        despues = json.load(f)
+    print(f"{'etapa':<24}{'antes (s)':>12}{'después (s)':>14}{'razón':>9}")
+    for etapa, d in despues["etapas"].items():
+        a = antes["etapas"].get(etapa)
+        if a is None:
+            print(f"{etapa:<24}{'-':>12}{d['mediana_s']:>14.4f}{'-':>9}")
+            continue
+        razon = d["mediana_s"] / a["mediana_s"] if a["mediana_s"] else float("nan")
+        print(f"{etapa:<24}{a['mediana_s']:>12.4f}{d['mediana_s']:>14.4f}{razon:>8.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark por etapas del pipeline clima + generación")
+    parser.add_argument("--plantas", type=int, default=1)
+    parser.add_argument("--anios", type=float, default=1)
+    parser.add_argument("--intervalo", type=int, default=1440, help="minutos entre muestras del inversor")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--formato", choices=["xlsx", "csv"], default="xlsx")
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--salida", help="archivo JSON de resultados (por defecto benchmarks/resultados/<commit>.json)")
+    parser.add_argument("--comparar", nargs=2, metavar=("ANTES", "DESPUES"))
+    parser.add_argument("--grabar-fixture", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.comparar:
+        comparar(*args.comparar)
+        return
+    if args.grabar_fixture:
+        print(f"Fixture guardada: {grabar_fixture()}")
+        return
+
+    resultado = ejecutar(args.plantas, args.anios, args.intervalo, args.repeticiones, args.formato, args.procesos)
+    salida = args.salida or os.path.join(
+        CARPETA_RESULTADOS, f"{resultado['commit'] or 'sin_commit'}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(salida) or ".", exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+
+    for etapa, d in resultado["etapas"].items():
+        print(f"{etapa:<24}{d['mediana_s']:>10.4f} s  ({d['filas']} filas)")
+    print(f"\n✅ Resultados guardados en {salida}")
+
+
+if __name__ == "__main__":
+    main()
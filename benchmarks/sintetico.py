@@ -0,0 +1,108 @@
+# ============================================================
+#  GENERADOR DE DATOS SINTÉTICOS PARA BENCHMARKS
+# ============================================================
+# - Exports del inversor con el mismo formato que
+#   SUPERMERCADO_CABEZA_Y_COLA_*.xlsx (fila de título + encabezado)
+# - Respuestas JSON con la misma forma que NASA POWER daily/point
+# Parametrizable por número de plantas, años e intervalo de muestreo.
+# ------------------------------------------------------------
+
+import os
+
+import numpy as np
+import pandas as pd
+
+PARAMETROS_NASA = ["ALLSKY_SFC_SW_DWN", "T2M_MAX", "T2M_MIN", "CLOUD_AMT", "PRECTOTCORR"]
+ENCABEZADO_EXPORT = [
+    "Fecha", "Generación(Wh)", "Consumo(Wh)", "Autoconsumo(Wh)", "Inyección a red(Wh)", "Importación de red(Wh)"
+]
+
+
+def _fechas(inicio: str, anios: float, intervalo_min: int) -> pd.DatetimeIndex:
+    fin = pd.Timestamp(inicio) + pd.DateOffset(days=int(round(365 * anios)))
+    return pd.date_range(inicio, fin, freq=f"{intervalo_min}min", inclusive="left")
+
+
+def clima_diario(inicio: str = "2023-05-01", anios: float = 1, semilla: int = 0) -> pd.DataFrame:
+    """Clima diario plausible para la costa caribe colombiana (una fila por día)."""
+    rng = np.random.default_rng(semilla)
+    dias = _fechas(inicio, anios, 24 * 60)
+    estacion = np.cos(2 * np.pi * (dias.dayofyear.to_numpy() - 30) / 365.25)
+    nubes = np.clip(75 - 12 * estacion + rng.normal(0, 8, len(dias)), 20, 100)
+    return pd.DataFrame({
+        "ALLSKY_SFC_SW_DWN": np.clip(7.2 - 0.035 * nubes + rng.normal(0, 0.4, len(dias)), 1.0, 7.5),
+        "T2M_MAX": 32 + 2 * estacion + rng.normal(0, 1.0, len(dias)),
+        "T2M_MIN": 23.5 + 0.5 * estacion + rng.normal(0, 0.6, len(dias)),
+        "CLOUD_AMT": nubes,
+        "PRECTOTCORR": rng.gamma(0.6, 6.0, len(dias)) * (nubes > 70),
+    }, index=dias).round(2)
+
+
+def payload_nasa(lat: float, lon: float, inicio: str = "2023-05-01", anios: float = 1,
+                 dias_provisionales: int = 3, semilla: int = 0) -> dict:
+    """Respuesta con la forma de NASA POWER; los últimos días vienen en -999."""
+    clima = clima_diario(inicio, anios, semilla)
+    if dias_provisionales:
+        clima.iloc[-dias_provisionales:] = -999.0
+    claves = clima.index.strftime("%Y%m%d")
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [lon, lat, 20.0]},
+        "properties": {"parameter": {p: dict(zip(claves, clima[p].tolist())) for p in PARAMETROS_NASA}},
+        "header": {"title": "NASA/POWER synthetic", "start": claves[0], "end": claves[-1]},
+    }
+
+
+def export_inversor(inicio: str = "2023-05-01", anios: float = 1, intervalo_min: int = 1440,
+                    kwp: float = 100.0, semilla: int = 0) -> pd.DataFrame:
+    """Energías en Wh por intervalo, con fechas en texto día/mes/año como el export real."""
+    rng = np.random.default_rng(semilla)
+    fechas = _fechas(inicio, anios, intervalo_min)
+    clima = clima_diario(inicio, anios, semilla)
+    rad_dia = clima["ALLSKY_SFC_SW_DWN"].reindex(fechas.normalize()).to_numpy()
+
+    horas = intervalo_min / 60
+    if intervalo_min >= 1440:
+        perfil = np.ones(len(fechas))
+    else:
+        # Campana solar entre 6:00 y 18:00 normalizada para que el día sume 1
+        h = fechas.hour.to_numpy() + fechas.minute.to_numpy() / 60 + horas / 2
+        perfil = np.clip(np.sin(np.pi * (h - 6) / 12), 0, None) * np.pi / 24 * horas
+    gen = kwp * 0.8 * rad_dia * perfil * rng.uniform(0.85, 1.0, len(fechas)) * 1000
+    consumo = kwp * 3.0 * horas / 24 * rng.uniform(0.7, 1.3, len(fechas)) * 1000
+    auto = np.minimum(gen, consumo)
+
+    formato = "%d/%m/%Y" if intervalo_min >= 1440 else "%d/%m/%Y %H:%M"
+    return pd.DataFrame({
+        ENCABEZADO_EXPORT[0]: fechas.strftime(formato),
+        ENCABEZADO_EXPORT[1]: gen.round(1),
+        ENCABEZADO_EXPORT[2]: consumo.round(1),
+        ENCABEZADO_EXPORT[3]: auto.round(1),
+        ENCABEZADO_EXPORT[4]: (gen - auto).round(1),
+        ENCABEZADO_EXPORT[5]: (consumo - auto).round(1),
+    })
+
+
+def escribir_export(df: pd.DataFrame, ruta: str, titulo: str = "PLANTA SINTETICA"):
+    """Escribe el export con la fila de título que el loader salta (skiprows=1)."""
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    if ruta.endswith(".csv"):
+        with open(ruta, "w", encoding="utf-8", newline="") as f:
+            f.write(titulo + "\n")
+            df.to_csv(f, index=False)
+    else:
+        with pd.ExcelWriter(ruta) as w:
+            pd.DataFrame([[titulo]]).to_excel(w, index=False, header=False)
+            df.to_excel(w, index=False, startrow=1)
+    return ruta
+
+
+def flota(n_plantas: int, lat: float = 8.7563, lon: float = -75.8886, dispersion_grados: float = 0.3,
+          semilla: int = 0) -> pd.DataFrame:
+    """Tabla de sitios (planta, lat, lon) alrededor de un punto."""
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        "planta": [f"PLANTA_{i:04d}" for i in range(n_plantas)],
+        "lat": (lat + rng.uniform(-dispersion_grados, dispersion_grados, n_plantas)).round(4),
+        "lon": (lon + rng.uniform(-dispersion_grados, dispersion_grados, n_plantas)).round(4),
+    })
@@ -0,0 +1,7 @@
+# ============================================================
+#  ANÁLISIS CLIMA + GENERACIÓN SOLAR
+# ============================================================
+# Paquete importable; las etapas están en `codigo.pipeline` y la
+# línea de comandos en `codigo.cli` (python -m codigo --help).
+# No se importa nada aquí para que `import codigo` sea inmediato.
+# ------------------------------------------------------------
@@ -0,0 +1,209 @@
+# ============================================================
+#  ALMACÉN DE SERIES CON MEMORY-MAP (UN ARCHIVO POR VARIABLE)
+# ============================================================
+# cache/series/<clave de la planta>/
+#     indice.json              planta, inicio, frecuencia, filas, variables
+#     Generacion_kWh.f32       float32 crudo, una posición por día
+#     Radiacion_kWhm2.f32      ...
+#
+# La fecha → posición es aritmética: (fecha - inicio) / frecuencia.
+# Los días sin dato quedan como NaN para que la posición siga
+# siendo directa. Una consulta por rango abre cada archivo con
+# `np.memmap` y devuelve una vista (sin copiar) de solo esas filas.
+#
+# Concurrencia: un único escritor (bloqueo de archivo) primero
+# extiende y escribe los .f32 y al final reemplaza `indice.json`
+# de forma atómica. Los lectores solo miran hasta `filas` del
+# índice, así nunca ven una fila a medio escribir.
+# ------------------------------------------------------------
+
+import hashlib
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+DTYPE = np.float32
+VERSION_ALMACEN = 2
+
+
+def clave_planta(nombre: str) -> str:
+    """Nombre de carpeta de una planta: 'Cabeza y Cola' → 'cabeza_y_cola_<hash>'.
+
+    El hash corto del nombre original evita que dos plantas con el mismo
+    texto normalizado ('Planta A' y 'Planta_A') compartan carpeta.
+    """
+    nombre = str(nombre)
+    legible = re.sub(r"\W+", "_", nombre).strip("_").lower()
+    return f"{legible}_{hashlib.sha1(nombre.encode()).hexdigest()[:8]}"
+
+
+@contextmanager
+def _bloqueo_escritor(carpeta: str):
+    """Bloqueo exclusivo entre procesos para el único escritor de una planta."""
+    os.makedirs(carpeta, exist_ok=True)
+    with open(os.path.join(carpeta, ".escritor.lock"), "a+b") as f:
+        try:
+            import fcntl
+
+            fcntl.flock(f, fcntl.LOCK_EX)
+        except ImportError:  # Windows
+            import msvcrt
+
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        yield
+
+
+def _escribir_json(ruta: str, datos: dict):
+    tmp = ruta + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(datos, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, ruta)
+
+
+class AlmacenSeries:
+    """Series diarias (u horarias) por planta y variable en archivos float32 mapeados."""
+
+    def __init__(self, raiz: str = "cache/series", frecuencia: str = "D"):
+        self.raiz = raiz
+        self.frecuencia = frecuencia
+        self._mapas = {}  # (planta, variable) → (filas, np.memmap)
+        self._lock = threading.Lock()
+
+    # ---------- rutas e índice ----------
+    def _carpeta(self, planta: str) -> str:
+        return os.path.join(self.raiz, clave_planta(planta))
+
+    def _ruta(self, planta: str, variable: str) -> str:
+        return os.path.join(self._carpeta(planta), f"{variable}.f32")
+
+    def indice(self, planta: str) -> dict | None:
+        ruta = os.path.join(self._carpeta(planta), "indice.json")
+        try:
+            with open(ruta, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def existe(self, planta: str) -> bool:
+        return self.indice(planta) is not None
+
+    def version(self, planta: str) -> int:
+        """mtime de `indice.json`: cambia con cada escritura."""
+        return os.stat(os.path.join(self._carpeta(planta), "indice.json")).st_mtime_ns
+
+    def plantas(self) -> list[str]:
+        if not os.path.isdir(self.raiz):
+            return []
+        nombres = []
+        for carpeta in sorted(os.listdir(self.raiz)):
+            try:
+                with open(os.path.join(self.raiz, carpeta, "indice.json"), encoding="utf-8") as f:
+                    planta = json.load(f)["planta"]
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            # Carpetas con otra clave (versión anterior del almacén) no se leen por nombre
+            if clave_planta(planta) == carpeta:
+                nombres.append(planta)
+        return nombres
+
+    @staticmethod
+    def _paso(meta: dict) -> pd.Timedelta:
+        return pd.Timedelta(1, unit=meta["frecuencia"])
+
+    def _posiciones(self, meta: dict, fechas) -> np.ndarray:
+        desfase = pd.DatetimeIndex(fechas) - pd.Timestamp(meta["inicio"])
+        return (desfase // self._paso(meta)).to_numpy(dtype=np.int64)
+
+    # ---------- escritura (un solo escritor) ----------
+    def agregar(self, planta: str, df: pd.DataFrame):
+        """Escribe las filas de `df` (Fecha + columnas numéricas).
+
+        Las fechas nuevas se agregan al final; las que ya existían se
+        corrigen en su lugar. No se admiten fechas anteriores al inicio.
+        """
+        if df.empty:
+            return
+        fechas = pd.DatetimeIndex(df["Fecha"]).floor(self.frecuencia)
+        variables = [c for c in df.columns if c != "Fecha" and pd.api.types.is_numeric_dtype(df[c])]
+        carpeta = self._carpeta(planta)
+
+        with _bloqueo_escritor(carpeta):
+            meta = self.indice(planta)
+            if meta is not None and meta["planta"] != str(planta):
+                raise ValueError(f"La carpeta {carpeta} ya es de la planta {meta['planta']!r}, no de {planta!r}")
+            meta = meta or {
+                "version": VERSION_ALMACEN, "planta": str(planta), "frecuencia": self.frecuencia,
+                "inicio": fechas.min().isoformat(), "filas": 0, "variables": [],
+            }
+            posiciones = self._posiciones(meta, fechas)
+            if posiciones.min() < 0:
+                raise ValueError(f"El almacén de {planta} empieza en {meta['inicio']}; no se pueden agregar fechas anteriores")
+            filas = max(meta["filas"], int(posiciones.max()) + 1)
+            primera = int(posiciones.min())
+
+            for var in variables:
+                ruta = self._ruta(planta, var)
+                actual = os.path.getsize(ruta) // DTYPE().itemsize if os.path.exists(ruta) else 0
+                if actual < filas:
+                    # Extender con NaN (días sin dato o variable nueva)
+                    with open(ruta, "ab") as f:
+                        np.full(filas - actual, np.nan, dtype=DTYPE).tofile(f)
+                mapa = np.memmap(ruta, dtype=DTYPE, mode="r+", offset=primera * DTYPE().itemsize,
+                                 shape=(filas - primera,))
+                mapa[posiciones - primera] = df[var].to_numpy(dtype=DTYPE)
+                mapa.flush()
+                del mapa
+
+            meta["filas"] = filas
+            meta["variables"] += [v for v in variables if v not in meta["variables"]]
+            meta["fin"] = (pd.Timestamp(meta["inicio"]) + (filas - 1) * self._paso(meta)).isoformat()
+            # Último paso: a partir de aquí los lectores ven las filas nuevas
+            _escribir_json(os.path.join(carpeta, "indice.json"), meta)
+
+    # ---------- lectura ----------
+    def _mapa(self, planta: str, variable: str, filas: int) -> np.ndarray:
+        clave = (clave_planta(planta), variable)
+        with self._lock:
+            guardado = self._mapas.get(clave)
+            if guardado is None or guardado[0] != filas:
+                mapa = np.memmap(self._ruta(planta, variable), dtype=DTYPE, mode="r", shape=(filas,))
+                guardado = self._mapas[clave] = (filas, mapa)
+        return guardado[1]
+
+    def rango(self, planta: str, variables=None, desde=None, hasta=None) -> tuple[pd.DatetimeIndex, dict]:
+        """(fechas, {variable: vista float32}) del rango pedido, sin copiar datos."""
+        meta = self.indice(planta)
+        if meta is None:
+            raise KeyError(f"Planta no encontrada en el almacén: {planta}")
+        variables = list(variables) if variables else meta["variables"]
+        faltan = [v for v in variables if v not in meta["variables"]]
+        if faltan:
+            raise KeyError(f"Variables no disponibles para {planta}: {faltan}")
+
+        filas = meta["filas"]
+        i0 = 0 if desde is None else int(np.clip(self._posiciones(meta, [pd.Timestamp(desde)])[0], 0, filas))
+        i1 = filas if hasta is None else int(np.clip(self._posiciones(meta, [pd.Timestamp(hasta)])[0] + 1, i0, filas))
+        inicio = pd.Timestamp(meta["inicio"]) + i0 * self._paso(meta)
+        fechas = pd.date_range(inicio, periods=i1 - i0, freq=meta["frecuencia"], name="Fecha")
+        if filas == 0:
+            return fechas, {v: np.empty(0, dtype=DTYPE) for v in variables}
+        return fechas, {v: self._mapa(planta, v, filas)[i0:i1] for v in variables}
+
+    def leer(self, planta: str, variables=None, desde=None, hasta=None) -> pd.DataFrame:
+        """Rango como DataFrame (Fecha + variables) construido sobre las vistas."""
+        fechas, columnas = self.rango(planta, variables, desde, hasta)
+        return pd.DataFrame({"Fecha": fechas, **columnas}, copy=False)
+
+    def flota(self, plantas=None, variables=None, desde=None, hasta=None) -> pd.DataFrame:
+        """Varias plantas con MultiIndex (planta, Fecha), listo para `codigo.kpis`."""
+        partes = {p: self.leer(p, variables, desde, hasta) for p in (plantas or self.plantas())}
+        df = pd.concat(partes, names=["planta", None]).reset_index(level=0)
+        return df.set_index(["planta", "Fecha"]).sort_index()
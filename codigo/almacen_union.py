@@ -0,0 +1,148 @@
+# ============================================================
+#  ALMACÉN INCREMENTAL DEL DATAFRAME UNIFICADO (POR PLANTA)
+# ============================================================
+# Guarda en SQLite las filas diarias ya unidas (clima + generación)
+# de cada planta y la última fecha procesada. Cada ejecución solo
+# une y agrega los días nuevos, y recalcula la generación mensual
+# (`real_mensual`) únicamente de los meses afectados.
+#
+# El último día guardado se vuelve a procesar en la siguiente
+# ejecución: el export del inversor pudo cortarse a mitad de día.
+# También los días recientes guardados sin clima (NASA publicó
+# -999 mientras no tenía el dato), ver `primera_sin_clima`.
+# ------------------------------------------------------------
+
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+from .esquema import COLUMNAS_UNION, RENOMBRE_CLIMA, aplicar_esquema
+
+_VALORES = COLUMNAS_UNION[1:]
+_CLIMA = list(RENOMBRE_CLIMA.values())
+
+_ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS union_diaria (
+    planta  TEXT NOT NULL,
+    fecha   TEXT NOT NULL,
+    {", ".join(f'"{c}" REAL' for c in _VALORES)},
+    PRIMARY KEY (planta, fecha)
+);
+CREATE TABLE IF NOT EXISTS union_mensual (
+    planta    TEXT NOT NULL,
+    anio      INTEGER NOT NULL,
+    mes       INTEGER NOT NULL,
+    real_kwh  REAL,
+    PRIMARY KEY (planta, anio, mes)
+);
+CREATE TABLE IF NOT EXISTS union_estado (
+    planta        TEXT PRIMARY KEY,
+    ultima_fecha  TEXT NOT NULL,
+    actualizado   REAL NOT NULL
+);
+"""
+
+
+class AlmacenUnion:
+    """Almacén persistente de `df_union` con agregado mensual incremental."""
+
+    def __init__(self, ruta: str = "cache/union.sqlite"):
+        self.ruta = ruta
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        with self._conectar() as con:
+            con.executescript(_ESQUEMA)
+
+    def _conectar(self):
+        return sqlite3.connect(self.ruta, timeout=30)
+
+    def ultima_fecha(self, planta: str) -> pd.Timestamp | None:
+        """Última fecha unida y guardada de la planta (None si no hay datos)."""
+        with self._conectar() as con:
+            fila = con.execute("SELECT ultima_fecha FROM union_estado WHERE planta = ?", (planta,)).fetchone()
+        return pd.Timestamp(fila[0]) if fila else None
+
+    def primera_sin_clima(self, planta: str, desde=None) -> pd.Timestamp | None:
+        """Primer día guardado (desde `desde`) con alguna variable de clima vacía."""
+        condicion, params = "planta = ?", [planta]
+        if desde is not None:
+            condicion += " AND fecha >= ?"
+            params.append(pd.Timestamp(desde).strftime("%Y-%m-%d"))
+        vacio = " OR ".join(f'"{c}" IS NULL' for c in _CLIMA)
+        with self._conectar() as con:
+            (fila,) = con.execute(f"SELECT MIN(fecha) FROM union_diaria WHERE {condicion} AND ({vacio})",
+                                  params).fetchone()
+        return pd.Timestamp(fila) if fila else None
+
+    def agregar(self, planta: str, df_nuevo: pd.DataFrame) -> list[tuple[int, int]]:
+        """Inserta (o reemplaza) los días de `df_nuevo` y actualiza sus meses.
+
+        Devuelve la lista de (año, mes) recalculados.
+        """
+        if df_nuevo.empty:
+            return []
+        fechas = df_nuevo["Fecha"].dt.strftime("%Y-%m-%d")
+        valores = df_nuevo.reindex(columns=_VALORES).astype("float64")
+        filas = [
+            (planta, f, *(None if pd.isna(v) else v for v in vals))
+            for f, vals in zip(fechas, valores.itertuples(index=False, name=None))
+        ]
+        meses = sorted({(f.year, f.month) for f in df_nuevo["Fecha"].dt.to_period("M").unique()})
+
+        columnas = ", ".join(f'"{c}"' for c in _VALORES)
+        marcas = ", ".join("?" * (len(_VALORES) + 2))
+        with self._conectar() as con:
+            con.executemany(
+                f"INSERT OR REPLACE INTO union_diaria (planta, fecha, {columnas}) VALUES ({marcas})", filas
+            )
+            # Solo se vuelven a sumar los meses tocados (rango sobre la clave primaria)
+            for anio, mes in meses:
+                desde = f"{anio:04d}-{mes:02d}-01"
+                hasta = f"{anio + mes // 12:04d}-{mes % 12 + 1:02d}-01"
+                con.execute(
+                    """
+                    INSERT OR REPLACE INTO union_mensual (planta, anio, mes, real_kwh)
+                    SELECT ?, ?, ?, SUM("Generacion_kWh") FROM union_diaria
+                    WHERE planta = ? AND fecha >= ? AND fecha < ?
+                    """,
+                    (planta, anio, mes, planta, desde, hasta),
+                )
+            con.execute(
+                """
+                INSERT INTO union_estado (planta, ultima_fecha, actualizado) VALUES (?, ?, ?)
+                ON CONFLICT (planta) DO UPDATE SET
+                    ultima_fecha = MAX(ultima_fecha, excluded.ultima_fecha),
+                    actualizado = excluded.actualizado
+                """,
+                (planta, fechas.max(), time.time()),
+            )
+        return meses
+
+    def leer(self, planta: str, desde=None, hasta=None) -> pd.DataFrame:
+        """Filas diarias guardadas de la planta, con el esquema aplicado."""
+        condicion, params = "planta = ?", [planta]
+        if desde is not None:
+            condicion += " AND fecha >= ?"
+            params.append(pd.Timestamp(desde).strftime("%Y-%m-%d"))
+        if hasta is not None:
+            condicion += " AND fecha <= ?"
+            params.append(pd.Timestamp(hasta).strftime("%Y-%m-%d"))
+        columnas = ", ".join(f'"{c}"' for c in _VALORES)
+        with self._conectar() as con:
+            df = pd.read_sql_query(
+                f"SELECT fecha AS Fecha, {columnas} FROM union_diaria WHERE {condicion} ORDER BY fecha",
+                con, params=params,
+            )
+        return aplicar_esquema(df)
+
+    def real_mensual(self, planta: str) -> pd.DataFrame:
+        """Generación real por mes (Año, Mes, Real_kWh), como en `calcular_kpis`."""
+        with self._conectar() as con:
+            return pd.read_sql_query(
+                'SELECT anio AS "Año", mes AS "Mes", real_kwh AS "Real_kWh" FROM union_mensual '
+                "WHERE planta = ? ORDER BY anio, mes",
+                con, params=(planta,),
+            )
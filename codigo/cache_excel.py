@@ -0,0 +1,115 @@
+# ============================================================
+#  CACHÉ COLUMNAR (ARROW IPC) DE LOS EXCEL DEL INVERSOR
+# ============================================================
+# Parsear el .xlsx con openpyxl es el paso local más lento. El
+# resultado ya limpio se guarda una vez en Arrow IPC y, mientras
+# el archivo fuente no cambie, las siguientes ejecuciones lo leen
+# con memory-map en lugar de volver a parsear el Excel.
+#
+# La validez se decide con el tamaño, el mtime y el SHA-256 del
+# archivo fuente: si tamaño y mtime coinciden no se recalcula el
+# hash; si solo cambió el mtime se compara el hash.
+# ------------------------------------------------------------
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from .generacion import leer_generacion
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:  # sin pyarrow se lee el Excel directamente
+    pa = None
+
+VERSION_CACHE = 2
+
+
+def hash_archivo(ruta: str, bloque: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        while datos := f.read(bloque):
+            h.update(datos)
+    return h.hexdigest()
+
+
+def _rutas_cache(ruta_fuente: str, carpeta_cache: str) -> tuple[str, str]:
+    # Un par de archivos por fuente, identificados por su ruta absoluta
+    clave = hashlib.sha1(os.path.abspath(ruta_fuente).encode()).hexdigest()[:16]
+    base = os.path.join(carpeta_cache, f"{os.path.splitext(os.path.basename(ruta_fuente))[0]}_{clave}")
+    return base + ".arrow", base + ".json"
+
+
+def _meta_vigente(ruta_fuente: str, ruta_meta: str, ruta_arrow: str) -> bool:
+    if not (os.path.exists(ruta_meta) and os.path.exists(ruta_arrow)):
+        return False
+    with open(ruta_meta, encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != VERSION_CACHE:
+        return False
+
+    st = os.stat(ruta_fuente)
+    if st.st_size != meta["tamano"]:
+        return False
+    if st.st_mtime_ns == meta["mtime_ns"]:
+        return True
+    # Mismo tamaño pero otro mtime (copiado, `touch`...): decide el contenido
+    if hash_archivo(ruta_fuente) != meta["sha256"]:
+        return False
+    meta["mtime_ns"] = st.st_mtime_ns
+    _escribir_json(ruta_meta, meta)
+    return True
+
+
+def _escribir_json(ruta: str, datos: dict):
+    tmp = ruta + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(datos, f)
+    os.replace(tmp, ruta)
+
+
+def leer_arrow(ruta_arrow: str) -> pd.DataFrame:
+    """Lee un archivo Arrow IPC con memory-map."""
+    with pa.memory_map(ruta_arrow, "r") as fuente:
+        tabla = ipc.open_file(fuente).read_all()
+    return tabla.to_pandas(split_blocks=True)
+
+
+def guardar_arrow(df: pd.DataFrame, ruta_arrow: str):
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    tmp = ruta_arrow + ".tmp"
+    with pa.OSFile(tmp, "wb") as destino, ipc.new_file(destino, tabla.schema) as escritor:
+        escritor.write_table(tabla)
+    os.replace(tmp, ruta_arrow)
+
+
+def leer_generacion_cacheada(ruta_gen: str, carpeta_cache: str = "cache/generacion") -> pd.DataFrame:
+    """Igual que `leer_generacion`, pero reutilizando la caché Arrow si sigue vigente."""
+    if pa is None:
+        return leer_generacion(ruta_gen)
+    if not os.path.exists(ruta_gen):
+        raise FileNotFoundError(f"❌ No se encontró el archivo: {ruta_gen}")
+
+    ruta_arrow, ruta_meta = _rutas_cache(ruta_gen, carpeta_cache)
+    if _meta_vigente(ruta_gen, ruta_meta, ruta_arrow):
+        df_gen = leer_arrow(ruta_arrow)
+        with open(ruta_meta, encoding="utf-8") as f:
+            df_gen.attrs["descartes"] = json.load(f).get("descartes", {})
+        return df_gen
+
+    st = os.stat(ruta_gen)
+    df_gen = leer_generacion(ruta_gen)
+    os.makedirs(carpeta_cache, exist_ok=True)
+    guardar_arrow(df_gen, ruta_arrow)
+    _escribir_json(ruta_meta, {
+        "version": VERSION_CACHE,
+        "fuente": os.path.abspath(ruta_gen),
+        "tamano": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha256": hash_archivo(ruta_gen),
+        "descartes": df_gen.attrs.get("descartes", {}),
+    })
+    return df_gen
@@ -0,0 +1,268 @@
+# ============================================================
+#  CACHÉ LOCAL E INCREMENTAL DE NASA POWER (DATOS DIARIOS)
+# ============================================================
+# Guarda cada valor diario descargado en SQLite con clave
+# (latitud, longitud, parámetro, fecha). En cada ejecución solo
+# se piden a la API las fechas que faltan o que expiraron.
+#
+# Los días recientes son "provisionales": NASA los revisa y a
+# veces publica -999 mientras no tiene el dato. Esos días se
+# vuelven a descargar cuando su TTL vence, y su número total
+# está acotado por `max_filas_provisionales`. Un -999 descargado
+# cuando el día ya había salido de la ventana provisional es
+# definitivo (NASA no va a publicarlo) y no se vuelve a pedir.
+#
+# NASA POWER entrega una serie por celda de su malla: `celda_nasa`
+# da la clave con la que las flotas agrupan plantas vecinas para
+# descargar una sola vez (consultando las coordenadas de una de
+# ellas). La caché guarda siempre las coordenadas consultadas.
+# ------------------------------------------------------------
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+URL_NASA_DIARIO = "https://power.larc.nasa.gov/api/temporal/daily/point"
+PARAMETROS_NASA = ["ALLSKY_SFC_SW_DWN", "T2M_MAX", "T2M_MIN", "CLOUD_AMT", "PRECTOTCORR"]
+VALORES_INVALIDOS = (-999.0, -9999.0)
+# Mallas de NASA POWER: meteorología MERRA-2 (0.5° × 0.625°, centros en
+# múltiplos del paso) y radiación CERES (1° × 1°, bordes en grados enteros)
+RESOLUCION_METEOROLOGIA = (0.5, 0.625)
+RESOLUCION_SOLAR = (1.0, 1.0)
+# Días recientes que NASA todavía puede revisar (o publicar si vinieron en -999)
+DIAS_PROVISIONALES = 30
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS nasa_diario (
+    lat         REAL NOT NULL,
+    lon         REAL NOT NULL,
+    parametro   TEXT NOT NULL,
+    fecha       TEXT NOT NULL,
+    valor       REAL,
+    descargado  REAL NOT NULL,
+    PRIMARY KEY (lat, lon, parametro, fecha)
+);
+CREATE INDEX IF NOT EXISTS idx_nasa_descargado ON nasa_diario (descargado);
+"""
+
+
+def _a_fecha(valor) -> date:
+    """Acepta 'YYYYMMDD', 'YYYY-MM-DD', date o datetime."""
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return pd.to_datetime(str(valor)).date()
+
+
+def celdas_nasa(lat, lon) -> np.ndarray:
+    """Clave de celda de cada (lat, lon), vectorizado.
+
+    Combina la celda MERRA-2 (meteorología) y la CERES de 1° (radiación):
+    dos puntos con la misma clave reciben la misma serie en todos los
+    parámetros de PARAMETROS_NASA, así una sola consulta sirve a ambos.
+    """
+    lat, lon = np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+    paso_lat, paso_lon = RESOLUCION_METEOROLOGIA
+    lat_m = np.clip(np.round(lat / paso_lat) * paso_lat, -90, 90)
+    lon_m = np.round(lon / paso_lon) * paso_lon
+    lon_m = np.where(lon_m >= 180, lon_m - 360, lon_m)
+    lat_s = np.floor(lat / RESOLUCION_SOLAR[0]) * RESOLUCION_SOLAR[0]
+    lon_s = np.floor(lon / RESOLUCION_SOLAR[1]) * RESOLUCION_SOLAR[1]
+    return np.array([f"{a:.4f},{b:.4f}|{c:g},{d:g}" for a, b, c, d in zip(lat_m, lon_m, lat_s, lon_s)],
+                    dtype=object)
+
+
+def celda_nasa(lat, lon) -> str:
+    """Clave de la celda de NASA POWER que contiene el punto (ver `celdas_nasa`)."""
+    return celdas_nasa([lat], [lon])[0]
+
+
+# Bloqueos por franjas: hilos que piden el mismo (caché, punto) descargan una
+# sola vez; puntos distintos pueden compartir franja (solo se serializan)
+_BLOQUEOS = tuple(threading.Lock() for _ in range(64))
+
+
+def _bloqueo_punto(ruta: str, lat: float, lon: float) -> threading.Lock:
+    return _BLOQUEOS[hash((os.path.abspath(ruta), lat, lon)) % len(_BLOQUEOS)]
+
+
+def _tramos_continuos(fechas: list[date]) -> list[tuple[date, date]]:
+    """Agrupa fechas ordenadas en rangos consecutivos (inicio, fin)."""
+    tramos = []
+    for f in sorted(fechas):
+        if tramos and f - tramos[-1][1] == timedelta(days=1):
+            tramos[-1] = (tramos[-1][0], f)
+        else:
+            tramos.append((f, f))
+    return tramos
+
+
+def descargar_nasa(lat, lon, parametros, inicio: date, fin: date, timeout=60) -> dict:
+    """Descarga un rango de NASA POWER y devuelve {parametro: {YYYYMMDD: valor}}."""
+    import requests
+
+    params = {
+        "start": inicio.strftime("%Y%m%d"),
+        "end": fin.strftime("%Y%m%d"),
+        "latitude": lat,
+        "longitude": lon,
+        "parameters": ",".join(parametros),
+        "format": "JSON",
+        "community": "RE",
+    }
+    r = requests.get(URL_NASA_DIARIO, params=params, timeout=timeout)
+    r.raise_for_status()
+    return r.json()["properties"]["parameter"]
+
+
+class CacheNasa:
+    """Caché persistente de series diarias de NASA POWER.
+
+    - `ttl_provisional`: tiempo de vida de los días provisionales.
+    - `dias_provisionales`: antigüedad (en días desde hoy) por debajo de la
+      cual un dato se considera provisional. Los valores -999/-9999 también,
+      salvo que se hayan descargado cuando el día ya era más antiguo que eso:
+      entonces son definitivos.
+    - `max_filas_provisionales`: tope de filas provisionales guardadas; al
+      superarlo se descartan las descargadas hace más tiempo.
+    """
+
+    def __init__(
+        self,
+        ruta: str = "cache/nasa_power.sqlite",
+        ttl_provisional: timedelta = timedelta(hours=20),
+        dias_provisionales: int = DIAS_PROVISIONALES,
+        max_filas_provisionales: int = 200_000,
+        descargar=descargar_nasa,
+    ):
+        self.ruta = ruta
+        self.ttl_provisional = ttl_provisional
+        self.dias_provisionales = dias_provisionales
+        self.max_filas_provisionales = max_filas_provisionales
+        self.descargar = descargar
+
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        with self._conectar() as con:
+            con.executescript(_ESQUEMA)
+
+    # ---------- utilidades internas ----------
+    def _conectar(self):
+        return sqlite3.connect(self.ruta, timeout=30)
+
+    def _limite_provisional(self, hoy: date | None = None) -> str:
+        hoy = hoy or date.today()
+        return (hoy - timedelta(days=self.dias_provisionales)).isoformat()
+
+    def _condicion_provisional(self) -> tuple[str, tuple]:
+        """Filas provisionales: día reciente, o sin dato descargado dentro de la ventana."""
+        condicion = """(
+            fecha >= ?
+            OR ((valor IS NULL OR valor IN (?, ?))
+                AND descargado < CAST(strftime('%s', fecha) AS REAL) + ?)
+        )"""
+        return condicion, (self._limite_provisional(), *VALORES_INVALIDOS, self.dias_provisionales * 86400.0)
+
+    def _fechas_vigentes(self, con, lat, lon, parametro, inicio: date, fin: date) -> set[str]:
+        """Fechas guardadas que no necesitan volver a descargarse."""
+        vencido = time.time() - self.ttl_provisional.total_seconds()
+        provisional, args = self._condicion_provisional()
+        filas = con.execute(
+            f"""
+            SELECT fecha FROM nasa_diario
+            WHERE lat = ? AND lon = ? AND parametro = ? AND fecha BETWEEN ? AND ?
+              AND (NOT {provisional} OR descargado >= ?)
+            """,
+            (lat, lon, parametro, inicio.isoformat(), fin.isoformat(), *args, vencido),
+        )
+        return {f for (f,) in filas}
+
+    def _guardar(self, con, lat, lon, datos: dict):
+        ahora = time.time()
+        filas = []
+        for parametro, serie in datos.items():
+            for clave, valor in serie.items():
+                fecha = _a_fecha(clave).isoformat()
+                filas.append((lat, lon, parametro, fecha, None if valor is None else float(valor), ahora))
+        con.executemany(
+            "INSERT OR REPLACE INTO nasa_diario (lat, lon, parametro, fecha, valor, descargado) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            filas,
+        )
+
+    def _podar_provisionales(self, con):
+        """Aplica el tope de filas provisionales descartando las más antiguas."""
+        condicion, args = self._condicion_provisional()
+        (total,) = con.execute(f"SELECT COUNT(*) FROM nasa_diario WHERE {condicion}", args).fetchone()
+        sobrantes = total - self.max_filas_provisionales
+        if sobrantes > 0:
+            con.execute(
+                f"""
+                DELETE FROM nasa_diario WHERE rowid IN (
+                    SELECT rowid FROM nasa_diario WHERE {condicion}
+                    ORDER BY descargado LIMIT ?
+                )
+                """,
+                (*args, sobrantes),
+            )
+
+    # ---------- API pública ----------
+    def fechas_faltantes(self, lat, lon, parametros, inicio, fin) -> list[date]:
+        """Fechas del rango que faltan (o expiraron) para al menos un parámetro."""
+        inicio, fin = _a_fecha(inicio), _a_fecha(fin)
+        lat, lon = round(float(lat), 4), round(float(lon), 4)
+        todas = {inicio + timedelta(days=i) for i in range((fin - inicio).days + 1)}
+        faltantes = set()
+        with self._conectar() as con:
+            for p in parametros:
+                vigentes = self._fechas_vigentes(con, lat, lon, p, inicio, fin)
+                faltantes |= {f for f in todas if f.isoformat() not in vigentes}
+        return sorted(faltantes)
+
+    def obtener(self, lat, lon, parametros=PARAMETROS_NASA, inicio="20230501", fin=None, descargar=None) -> pd.DataFrame:
+        """Devuelve el rango pedido, descargando solo lo que falta.
+
+        El resultado tiene el mismo formato que `pd.DataFrame(data)` sobre la
+        respuesta JSON de NASA: índice de fechas y una columna por parámetro.
+        `descargar` permite usar otra función de descarga solo en esta llamada.
+        """
+        descargar = descargar or self.descargar
+        inicio = _a_fecha(inicio)
+        fin = _a_fecha(fin) if fin is not None else date.today()
+        lat, lon = round(float(lat), 4), round(float(lon), 4)
+        parametros = list(parametros)
+
+        with _bloqueo_punto(self.ruta, lat, lon):
+            faltantes = self.fechas_faltantes(lat, lon, parametros, inicio, fin)
+            for t_ini, t_fin in _tramos_continuos(faltantes):
+                datos = descargar(lat, lon, parametros, t_ini, t_fin)
+                with self._conectar() as con:
+                    self._guardar(con, lat, lon, datos)
+
+        with self._conectar() as con:
+            if faltantes:
+                self._podar_provisionales(con)
+            marcas = ",".join("?" * len(parametros))
+            largo = pd.read_sql_query(
+                f"""
+                SELECT fecha, parametro, valor FROM nasa_diario
+                WHERE lat = ? AND lon = ? AND fecha BETWEEN ? AND ?
+                  AND parametro IN ({marcas})
+                """,
+                con,
+                params=(lat, lon, inicio.isoformat(), fin.isoformat(), *parametros),
+            )
+
+        df = largo.pivot(index="fecha", columns="parametro", values="valor")
+        df = df.reindex(columns=parametros).sort_index()
+        df.index = pd.to_datetime(df.index)
+        df.index.name = None
+        df.columns.name = None
+        return df
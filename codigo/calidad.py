@@ -0,0 +1,208 @@
+# ============================================================
+#  CALIDAD DE DATOS Y RELLENO DE HUECOS CORTOS (VECTORIZADO)
+# ============================================================
+# Trabaja sobre el frame de flota (MultiIndex planta, Fecha) con
+# pasadas de NumPy sobre todas las plantas a la vez:
+#   - reglas de rango y consistencia por fila (generación con
+#     radiación cero, Autoconsumo + Inyección ≠ Generación,
+#     Temp_Min > Temp_Max, valores fuera de rango físico)
+#   - calendario completo por planta: los días que faltan vuelven
+#     como filas NaN en lugar de desaparecer
+#   - relleno opcional de huecos de hasta `max_hueco` pasos seguidos
+#     dentro de la misma planta (lineal, valor anterior o cero); la
+#     columna `Rellenado` dice qué celdas de cada fila son estimadas
+#   - reporte compacto por planta con todos los conteos, más los
+#     descartes de la ingesta (fechas inválidas, no numéricos,
+#     días que el merge dejó fuera)
+# ------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+from .kpis import indexar_flota
+
+# Sin relleno por defecto: un valor interpolado no debe pasar por medido sin pedirlo
+MAX_HUECO = 0
+COLUMNA_RELLENO = "Rellenado"
+METODOS_RELLENO = ("lineal", "anterior", "cero")
+# Autoconsumo + Inyección puede diferir de la generación por redondeo del inversor
+TOLERANCIA_BALANCE = 0.02
+TOLERANCIA_BALANCE_KWH = 0.1
+# Rango físico aceptado por columna (None: sin límite)
+RANGOS = {
+    "Generacion_kWh": (0, None),
+    "Consumo_kWh": (0, None),
+    "Autoconsumo_kWh": (0, None),
+    "Inyeccion_kWh": (0, None),
+    "Importacion_kWh": (0, None),
+    "Radiacion_kWhm2": (0, 12),
+    "Radiacion_Whm2": (0, 1400),
+    "Temp_Max": (-40, 60),
+    "Temp_Min": (-50, 50),
+    "Temp": (-50, 60),
+    "Nubosidad_%": (0, 100),
+    "Precipitacion_mm": (0, 500),
+}
+
+
+# ========= REGLAS =========
+def _valores(df: pd.DataFrame, col: str) -> np.ndarray | None:
+    return df[col].to_numpy(dtype=np.float64) if col in df.columns else None
+
+
+def fuera_de_rango(df: pd.DataFrame) -> pd.DataFrame:
+    """Una columna booleana por variable con rango definido."""
+    salida = {}
+    for col, (minimo, maximo) in RANGOS.items():
+        v = _valores(df, col)
+        if v is not None:
+            malo = v < minimo
+            if maximo is not None:
+                malo |= v > maximo
+            salida[col] = malo
+    return pd.DataFrame(salida, index=df.index)
+
+
+def chequeos(df: pd.DataFrame) -> pd.DataFrame:
+    """Reglas por fila (True = falla); solo las que aplican a las columnas presentes."""
+    gen = _valores(df, "Generacion_kWh")
+    rad = _valores(df, "Radiacion_kWhm2")
+    rad = rad if rad is not None else _valores(df, "Radiacion_Whm2")
+    auto, iny = _valores(df, "Autoconsumo_kWh"), _valores(df, "Inyeccion_kWh")
+    tmin, tmax = _valores(df, "Temp_Min"), _valores(df, "Temp_Max")
+
+    reglas = {"fuera_de_rango": fuera_de_rango(df).to_numpy().any(axis=1)}
+    if gen is not None and rad is not None:
+        reglas["gen_sin_radiacion"] = (gen > 0) & (rad <= 0)
+    if gen is not None and auto is not None and iny is not None:
+        tolerancia = np.maximum(TOLERANCIA_BALANCE * np.abs(gen), TOLERANCIA_BALANCE_KWH)
+        reglas["balance_energia"] = np.abs(auto + iny - gen) > tolerancia
+    if tmin is not None and tmax is not None:
+        reglas["temp_invertida"] = tmin > tmax
+    return pd.DataFrame(reglas, index=df.index)
+
+
+# ========= CALENDARIO Y HUECOS =========
+def _ns(fechas) -> np.ndarray:
+    return np.asarray(fechas, dtype="datetime64[ns]").astype(np.int64)
+
+
+def completar_calendario(df: pd.DataFrame, frecuencia: str = "D") -> pd.DataFrame:
+    """Cada planta con todas las fechas entre su primera y su última (las nuevas en NaN)."""
+    codigos, nombres = pd.factorize(df.index.get_level_values("planta"), sort=False)
+    if not len(df):
+        return df
+    t = _ns(df.index.get_level_values("Fecha"))
+    paso = pd.Timedelta(1, unit=frecuencia).value
+    inicios = np.flatnonzero(np.r_[True, codigos[1:] != codigos[:-1]])
+    primera, ultima = np.minimum.reduceat(t, inicios), np.maximum.reduceat(t, inicios)
+    largos = (ultima - primera) // paso + 1
+
+    desplazamiento = np.arange(largos.sum()) - np.repeat(np.cumsum(largos) - largos, largos)
+    fechas = pd.to_datetime(np.repeat(primera, largos) + desplazamiento * paso)
+    indice = pd.MultiIndex.from_arrays([nombres.take(np.repeat(codigos[inicios], largos)), fechas],
+                                       names=["planta", "Fecha"])
+    return df.reindex(indice)
+
+
+def rellenar_huecos(df: pd.DataFrame, max_hueco: int = MAX_HUECO, metodo="lineal",
+                    columnas=None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Rellena huecos de hasta `max_hueco` filas seguidas, sin cruzar de una planta a otra.
+
+    `df` debe tener el calendario completo (ver `completar_calendario`).
+    `metodo` es uno de METODOS_RELLENO o un {columna: metodo}. Devuelve el
+    frame rellenado y una máscara de las celdas rellenadas.
+    """
+    columnas = list(columnas) if columnas is not None else [
+        c for c in df.columns if pd.api.types.is_float_dtype(df[c])
+    ]
+    metodos = metodo if isinstance(metodo, dict) else dict.fromkeys(columnas, metodo)
+    for m in set(metodos.values()):
+        if m not in METODOS_RELLENO:
+            raise ValueError(f"Método de relleno no soportado: {m} (usar {', '.join(METODOS_RELLENO)})")
+
+    codigos = pd.factorize(df.index.get_level_values("planta"), sort=False)[0]
+    t = _ns(df.index.get_level_values("Fecha")).astype(np.float64)
+    n = len(df)
+    pos = np.arange(n)
+    df = df.copy()
+    rellenos = {}
+    for col in columnas:
+        v = df[col].to_numpy(dtype=np.float64)
+        nulo = np.isnan(v)
+        if max_hueco < 1 or col not in metodos or not nulo.any():
+            rellenos[col] = np.zeros(n, dtype=bool)
+            continue
+        # Último dato válido antes y primero después de cada posición
+        antes = np.maximum.accumulate(np.where(nulo, -1, pos))
+        despues = np.minimum.accumulate(np.where(nulo, n, pos)[::-1])[::-1]
+        a, d = np.clip(antes, 0, n - 1), np.clip(despues, 0, n - 1)
+        ok = (nulo & (antes >= 0) & (despues < n) & (despues - antes - 1 <= max_hueco)
+              & (codigos[a] == codigos) & (codigos[d] == codigos))
+
+        if metodos[col] == "lineal":
+            fraccion = (t - t[a]) / np.where(d > a, t[d] - t[a], 1.0)
+            v[ok] = (v[a] + (v[d] - v[a]) * fraccion)[ok]
+        elif metodos[col] == "anterior":
+            v[ok] = v[a][ok]
+        else:
+            v[ok] = 0.0
+        df[col] = v.astype(df[col].dtype)
+        rellenos[col] = ok
+    return df, pd.DataFrame(rellenos, index=df.index)
+
+
+# ========= ETAPA COMPLETA =========
+def _por_planta(datos):
+    return datos.groupby(level="planta", observed=True, sort=False).sum()
+
+
+def marcar_rellenos(rellenos: pd.DataFrame) -> pd.Series:
+    """Por fila, las columnas rellenadas separadas por coma ("" si ninguna)."""
+    marcas = np.full(len(rellenos), "", dtype=object)
+    for col in rellenos.columns:
+        mascara = rellenos[col].to_numpy()
+        marcas[mascara] = marcas[mascara] + np.where(marcas[mascara] == "", "", ",") + col
+    return pd.Series(marcas, index=rellenos.index, name=COLUMNA_RELLENO)
+
+
+def revisar_flota(df, max_hueco: int = MAX_HUECO, metodo="lineal", columnas=None, frecuencia: str = "D",
+                  enmascarar: bool = True, descartes: dict | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Reglas, calendario completo y relleno de huecos cortos de toda la flota.
+
+    Con `enmascarar` los valores fuera de rango físico pasan a NaN (y pueden
+    rellenarse). Con `max_hueco > 0` se agrega la columna `Rellenado` (ver
+    `marcar_rellenos`). `descartes` es {planta: {motivo: filas}} de la
+    ingesta y se agrega al reporte. Devuelve (frame revisado, reporte por planta).
+    """
+    df = indexar_flota(df)
+
+    duplicado = df.index.duplicated(keep="last")
+    reporte = pd.DataFrame({"filas": _por_planta(pd.Series(1, index=df.index))})
+    reporte["duplicados"] = _por_planta(pd.Series(duplicado, index=df.index))
+    df = df[~duplicado]
+
+    reglas = chequeos(df)
+    reporte = reporte.join(_por_planta(reglas))
+    if enmascarar:
+        fuera = fuera_de_rango(df)
+        df = df.mask(fuera.reindex(columns=df.columns, fill_value=False))
+
+    completo = completar_calendario(df, frecuencia)
+    dias = _por_planta(pd.Series(1, index=completo.index))
+    reporte["dias_faltantes"] = dias - (reporte["filas"] - reporte["duplicados"])
+
+    columnas = list(columnas) if columnas is not None else [
+        c for c in completo.columns if pd.api.types.is_float_dtype(completo[c])
+    ]
+    reporte["celdas_nulas"] = _por_planta(completo[columnas].isna()).sum(axis=1)
+    completo, rellenos = rellenar_huecos(completo, max_hueco, metodo, columnas)
+    reporte["celdas_rellenadas"] = _por_planta(rellenos).sum(axis=1)
+    reporte["celdas_sin_dato"] = reporte["celdas_nulas"] - reporte["celdas_rellenadas"]
+    if max_hueco > 0:
+        completo[COLUMNA_RELLENO] = marcar_rellenos(rellenos)
+
+    if descartes:
+        extra = pd.DataFrame.from_dict(descartes, orient="index").rename_axis("planta")
+        reporte = reporte.join(extra).fillna({c: 0 for c in extra.columns})
+    return completo, reporte.astype("int64")
@@ -0,0 +1,344 @@
+# ============================================================
+#  LÍNEA DE COMANDOS:  python -m codigo <subcomando> [opciones]
+# ============================================================
+#   fetch   descarga el clima de NASA POWER
+#   ingest  carga y consolida el Excel del inversor
+#   merge   une clima + generación y guarda el Excel unificado
+#   plot    genera las gráficas PNG
+#   report  genera el informe Word
+#   run     todo lo anterior en memoria
+#   hourly  clima y generación por hora (mes a mes)
+#   fleet   todas las etapas para una tabla de plantas, con puntos
+#           de control (solo reejecuta lo fallido o desactualizado)
+#   desempeno  días y rachas de bajo desempeño de las plantas del
+#           almacén cache/series (modelo de generación esperada)
+#
+# Con --incremental, merge/run solo procesan los días posteriores a
+# la última fecha guardada en cache/union.sqlite y lo agregan; la
+# calidad y la salida (un archivo por mes) se rehacen solo para los
+# meses tocados.
+# Cada subcomando importa solo lo que necesita: `fetch` y `merge`
+# no cargan matplotlib ni python-docx. Los resultados de fetch,
+# ingest y merge se guardan en cache/etapas/ para los siguientes.
+# ------------------------------------------------------------
+
+import argparse
+import os
+import sys
+from datetime import date
+
+
+def _opciones_planta(parser):
+    from .pipeline import PLANTA_POR_DEFECTO as p
+
+    parser.add_argument("--nombre", default=p["nombre"], help="nombre corto de la planta (archivos de salida)")
+    parser.add_argument("--titulo", default=p["titulo"], help="nombre en la portada del informe")
+    parser.add_argument("--lat", type=float, default=p["lat"])
+    parser.add_argument("--lon", type=float, default=p["lon"])
+    parser.add_argument("--inicio", default=p["inicio"], help="AAAAMMDD")
+    parser.add_argument("--fin", default=p["fin"] or date.today().strftime("%Y%m%d"), help="AAAAMMDD (por defecto, hoy)")
+    parser.add_argument("--generacion", default=p["generacion"], help="export del inversor (.xlsx o .csv)")
+    parser.add_argument("--utc-offset", type=int, default=p["utc_offset"], help="huso horario del sitio (modo horario)")
+    parser.add_argument("--pvsol", help="tabla de estimados PV*SOL (planta, Mes, Estimado_kWh) en CSV o Excel")
+    parser.add_argument("--streaming", action="store_true", help="lectura por bloques con memoria acotada")
+    parser.add_argument("--incremental", action="store_true",
+                        help="procesa solo los días nuevos y los agrega al almacén de la planta")
+    _opciones_calidad(parser)
+    parser.add_argument("--resultados", default="resultados", help="carpeta de Excel y gráficas")
+    parser.add_argument("--formato", default="xlsx", choices=["xlsx", "parquet", "csv.gz"],
+                        help="formato del archivo unificado")
+    parser.add_argument("--informes", default="informes", help="carpeta de informes Word")
+    parser.add_argument("--profile", action="store_true", default=argparse.SUPPRESS,
+                        help="registra tiempos y memoria por etapa (JSON lines)")
+
+
+def _opciones_calidad(parser):
+    parser.add_argument("--max-hueco", type=int, default=0,
+                        help="días seguidos sin dato que se rellenan (0 = no rellenar; columna Rellenado)")
+    parser.add_argument("--relleno", default="lineal", choices=["lineal", "anterior", "cero"],
+                        help="método de relleno de huecos cortos")
+    parser.add_argument("--corregir", action="store_true",
+                        help="en las salidas, valores fuera de rango → vacío y calendario completo "
+                             "(sin esto solo se reportan)")
+
+
+def _opciones_flota(parser):
+    parser.add_argument("--plantas", required=True,
+                        help="tabla CSV o Excel con planta, lat, lon, generacion (y opcional titulo, inicio, fin)")
+    parser.add_argument("--procesos", type=int, help="procesos para las etapas de CPU (por defecto, todos los núcleos)")
+    parser.add_argument("--hilos", type=int, default=8, help="descargas simultáneas de NASA POWER")
+    parser.add_argument("--forzar", action="store_true", help="ignora los puntos de control y ejecuta todo")
+    parser.add_argument("--puntos-control", default="cache/orquestador.sqlite", help="SQLite de puntos de control")
+    parser.add_argument("--pvsol", help="tabla de estimados PV*SOL (planta, Mes, Estimado_kWh) en CSV o Excel")
+    parser.add_argument("--streaming", action="store_true", help="lectura por bloques con memoria acotada")
+    _opciones_calidad(parser)
+    parser.add_argument("--resultados", default="resultados", help="carpeta de Excel y gráficas")
+    parser.add_argument("--formato", default="xlsx", choices=["xlsx", "parquet", "csv.gz"],
+                        help="formato del archivo unificado")
+    parser.add_argument("--informes", default="informes", help="carpeta de informes Word")
+    parser.add_argument("--profile", action="store_true", default=argparse.SUPPRESS,
+                        help="registra tiempos y memoria por etapa (JSON lines)")
+
+
+def _opciones_desempeno(parser):
+    from .desempeno import MIN_RACHA, UMBRAL_Z
+    from .pipeline import CARPETA_SERIES
+
+    parser.add_argument("--plantas", help="plantas separadas por coma (por defecto, todas las del almacén)")
+    parser.add_argument("--series", default=CARPETA_SERIES, help="almacén memory-map con las series unidas")
+    parser.add_argument("--modelo", default="cache/modelo_desempeno.sqlite", help="SQLite de coeficientes por planta")
+    parser.add_argument("--desde", help="AAAA-MM-DD: primer día a puntuar")
+    parser.add_argument("--hasta", help="AAAA-MM-DD: último día a puntuar")
+    parser.add_argument("--incremental", action="store_true",
+                        help="puntúa con los coeficientes guardados, sin reajustar (usar con --desde)")
+    parser.add_argument("--umbral-z", type=float, default=UMBRAL_Z, help="residuo estandarizado que marca un día")
+    parser.add_argument("--min-racha", type=int, default=MIN_RACHA, help="días seguidos marcados para una alerta")
+    parser.add_argument("--procesos", type=int, help="procesos para el ajuste (por defecto, todos los núcleos)")
+    parser.add_argument("--resultados", default="resultados", help="carpeta de los CSV de salida")
+    parser.add_argument("--profile", action="store_true", default=argparse.SUPPRESS,
+                        help="registra tiempos y memoria por etapa (JSON lines)")
+
+
+def _calidad(args, df_union):
+    from .pipeline import revisar_calidad, ruta_calidad
+
+    df_union, reporte = revisar_calidad(df_union, args.nombre, args.resultados, args.max_hueco, args.relleno,
+                                        args.corregir)
+    if reporte.empty:
+        print("🧪 Calidad: no hay filas que revisar")
+        return df_union
+    fila = reporte.iloc[0]
+    reglas = ", ".join(f"{c} {fila[c]}" for c in ("gen_sin_radiacion", "balance_energia", "temp_invertida",
+                                                  "fuera_de_rango") if fila.get(c, 0))
+    print(f"🧪 Calidad: {fila['dias_faltantes']} días faltantes, {fila['celdas_rellenadas']} celdas rellenadas, "
+          f"{fila['celdas_sin_dato']} sin dato{f' · reglas: {reglas}' if reglas else ''} "
+          f"→ {ruta_calidad(args.nombre, args.resultados)}")
+    return df_union
+
+
+def _fetch(args):
+    from .pipeline import descargar_clima, guardar_intermedio
+
+    try:
+        df_clima = descargar_clima(args.lat, args.lon, args.inicio, args.fin, nombre=args.nombre)
+    except Exception as e:
+        raise SystemExit(f"❌ Error al descargar datos de NASA POWER: {e}")
+    print(f"📅 Fecha inicial: {df_clima['Fecha'].min():%Y-%m-%d}")
+    print(f"📅 Fecha final:   {df_clima['Fecha'].max():%Y-%m-%d}")
+    print(f"🌦️ Clima guardado en {guardar_intermedio(df_clima, args.nombre, 'clima')}")
+    return df_clima
+
+
+def _ingest(args):
+    from .pipeline import cargar_generacion, guardar_intermedio
+
+    df_gen = cargar_generacion(args.generacion, nombre=args.nombre, streaming=args.streaming)
+    print(f"⚡ Generación diaria guardada en {guardar_intermedio(df_gen, args.nombre, 'generacion')}")
+    return df_gen
+
+
+def _merge_incremental(args):
+    """Une los días nuevos y rehace calidad y salida solo de los meses tocados (devuelve esos meses)."""
+    import pandas as pd
+
+    from .almacen_mmap import AlmacenSeries
+    from .almacen_union import AlmacenUnion
+    from .pipeline import (CARPETA_SERIES, RUTA_ALMACEN, carpeta_meses_intermedio, guardar_meses, guardar_series,
+                           ruta_meses, unir_incremental)
+
+    try:
+        df_nuevo, meses = unir_incremental(args.nombre, args.lat, args.lon, args.inicio, args.fin,
+                                           args.generacion, streaming=args.streaming)
+    except Exception as e:
+        raise SystemExit(f"❌ Error en la actualización incremental: {e}")
+    print(f"➕ Días nuevos agregados: {len(df_nuevo)} (meses recalculados: {len(meses)})")
+
+    # Los almacenes guardan lo medido (como el merge completo); la calidad solo va a las salidas.
+    # Memory-map y salida por mes se llenan completos la primera vez y luego solo con lo nuevo
+    almacen = AlmacenUnion(RUTA_ALMACEN)
+    if not AlmacenSeries(CARPETA_SERIES).existe(args.nombre):
+        guardar_series(almacen.leer(args.nombre), args.nombre)
+    elif len(df_nuevo):
+        guardar_series(df_nuevo, args.nombre)
+
+    if not os.path.isdir(carpeta_meses_intermedio(args.nombre)):
+        df_union = almacen.leer(args.nombre)
+        meses = sorted(set(zip(df_union["Fecha"].dt.year, df_union["Fecha"].dt.month)))
+    elif meses:
+        df_union = almacen.leer(args.nombre, desde=pd.Timestamp(*meses[0], 1),
+                                hasta=pd.Timestamp(*meses[-1], 1) + pd.offsets.MonthEnd(0))
+    else:
+        return df_nuevo
+    df_union.attrs["descartes"] = df_nuevo.attrs.get("descartes", {})
+    df_union = _calidad(args, df_union)
+    rutas = guardar_meses(df_union, args.nombre, meses, args.resultados, args.formato)
+    print(f"✅ {len(rutas)} meses guardados en {ruta_meses(args.nombre, args.resultados)}")
+    return df_union
+
+
+def _merge(args, df_gen=None, df_clima=None):
+    from .pipeline import (guardar_intermedio, guardar_resultado, guardar_series, leer_intermedio, ruta_salida,
+                           unir)
+
+    if args.incremental:
+        return _merge_incremental(args)
+    df_gen = df_gen if df_gen is not None else leer_intermedio(args.nombre, "generacion")
+    df_clima = df_clima if df_clima is not None else leer_intermedio(args.nombre, "clima")
+    df_union = unir(df_gen, df_clima, nombre=args.nombre)
+    # El almacén memory-map guarda lo medido; la calidad (calendario, relleno) solo va a las salidas
+    guardar_series(df_union, args.nombre)
+    df_union = _calidad(args, df_union)
+    guardar_intermedio(df_union, args.nombre, "union")
+    print(f"🔗 Total de registros combinados: {len(df_union)}")
+    ruta_union = ruta_salida(args.nombre, args.resultados, args.formato)
+    print(f"✅ Archivo guardado correctamente: {guardar_resultado(df_union, ruta_union, args.formato)}")
+    return df_union
+
+
+def _leer_union(args):
+    """`df_union` completo guardado por el último merge (por meses si fue incremental)."""
+    from .pipeline import leer_intermedio, leer_meses
+
+    return leer_meses(args.nombre) if args.incremental else leer_intermedio(args.nombre, "union")
+
+
+def _plot(args, df_union=None):
+    from .pipeline import graficar
+
+    df_union = df_union if df_union is not None else _leer_union(args)
+    for ruta_png in graficar(df_union, args.nombre, args.resultados):
+        print(f"🖼️ Gráfica guardada: {ruta_png}")
+
+
+def _report(args, df_union=None):
+    from .pipeline import informar
+
+    df_union = df_union if df_union is not None else _leer_union(args)
+    real_mensual = None
+    if args.incremental:
+        from .almacen_union import AlmacenUnion
+        from .pipeline import RUTA_ALMACEN
+
+        real_mensual = AlmacenUnion(RUTA_ALMACEN).real_mensual(args.nombre)
+    ruta_docx = informar(df_union, args.nombre, args.titulo, args.informes, args.resultados, real_mensual,
+                         ruta_pvsol=args.pvsol)
+    print(f"✅ Informe generado: {ruta_docx}")
+
+
+def _hourly(args):
+    from .horario import analizar_horario
+    from .pipeline import ruta_salida
+
+    ruta = ruta_salida(f"{args.nombre} Horario", args.resultados, args.formato)
+    try:
+        analizar_horario(args.lat, args.lon, args.inicio, args.fin, args.generacion, ruta,
+                         nombre=args.nombre, formato=args.formato, utc_offset=args.utc_offset)
+    except Exception as e:
+        raise SystemExit(f"❌ Error en el análisis horario: {e}")
+    print(f"✅ Archivo horario guardado correctamente: {ruta}")
+
+
+def _fleet(args):
+    from .orquestador import PuntosControl, cargar_plantas, ejecutar_flota
+
+    try:
+        plantas = cargar_plantas(args.plantas)
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"❌ Error al leer la tabla de plantas: {e}")
+
+    def progreso(planta, etapa, estado, duracion, error):
+        print(f"{'✅' if estado == 'ok' else '❌'} {planta} · {etapa} ({duracion:.1f} s){f': {error}' if error else ''}")
+
+    opciones = {"resultados": args.resultados, "informes": args.informes, "formato": args.formato,
+                "streaming": args.streaming, "pvsol": args.pvsol, "max_hueco": args.max_hueco,
+                "relleno": args.relleno, "corregir": args.corregir}
+    resumen = ejecutar_flota(plantas, opciones, procesos=args.procesos, hilos=args.hilos, forzar=args.forzar,
+                             puntos=PuntosControl(args.puntos_control), progreso=progreso)
+    conteo = resumen["estado"].value_counts()
+    print("📋 Etapas: " + ", ".join(f"{estado} {n}" for estado, n in conteo.items()))
+    if conteo.get("error", 0) or conteo.get("bloqueado", 0):
+        print("🔁 Vuelve a ejecutar el mismo comando para reintentar solo las etapas fallidas o bloqueadas.")
+        raise SystemExit(1)
+
+
+def _desempeno(args):
+    from .almacen_mmap import AlmacenSeries
+    from .desempeno import VARIABLES_MODELO, ModeloDesempeno, detectar_flota, rachas
+    from .perfilado import etapa
+
+    almacen = AlmacenSeries(args.series)
+    plantas = [p for p in args.plantas.split(",") if p] if args.plantas else almacen.plantas()
+    if not plantas:
+        raise SystemExit(f"❌ No hay plantas en {args.series}. Ejecuta antes 'merge' o 'fleet'.")
+    try:
+        df = almacen.flota(plantas, ["Generacion_kWh", *VARIABLES_MODELO], args.desde, args.hasta)
+    except (KeyError, ValueError) as e:
+        raise SystemExit(f"❌ Error al leer el almacén: {e}")
+
+    modelos = ModeloDesempeno(args.modelo)
+    with etapa("desempeno", filas=len(df), plantas=len(plantas)):
+        if args.incremental:
+            puntuacion = modelos.puntuar_nuevos(df, args.umbral_z, args.min_racha, args.procesos)
+        else:
+            modelo, puntuacion = detectar_flota(df, args.umbral_z, args.min_racha, args.procesos)
+            modelos.guardar(modelo[modelo.notna().all(axis=1)])
+    alertas = rachas(puntuacion)
+
+    os.makedirs(args.resultados, exist_ok=True)
+    ruta_diario = os.path.join(args.resultados, "Desempeno_Diario.csv.gz")
+    ruta_rachas = os.path.join(args.resultados, "Desempeno_Rachas.csv")
+    puntuacion.reset_index().to_csv(ruta_diario, index=False)
+    alertas.to_csv(ruta_rachas, index=False)
+    print(f"📉 {int(puntuacion['bajo'].sum())} días bajo el umbral, {len(alertas)} rachas con alerta "
+          f"en {len(plantas)} plantas → {ruta_rachas}")
+    return alertas
+
+
+def _run(args):
+    if args.incremental:
+        # Gráficas e informe cubren toda la historia: se arma con los meses ya revisados
+        _merge_incremental(args)
+        df_union = _leer_union(args)
+    else:
+        df_clima = _fetch(args)
+        df_gen = _ingest(args)
+        df_union = _merge(args, df_gen, df_clima)
+    _plot(args, df_union)
+    _report(args, df_union)
+
+
+SUBCOMANDOS = {
+    "fetch": (_fetch, "descarga el clima diario de NASA POWER"),
+    "ingest": (_ingest, "carga y consolida por día el Excel del inversor"),
+    "merge": (_merge, "une clima + generación y guarda el Excel unificado"),
+    "plot": (_plot, "genera las gráficas PNG (sin pantalla)"),
+    "report": (_report, "genera el informe Word"),
+    "run": (_run, "ejecuta todas las etapas"),
+    "hourly": (_hourly, "clima NASA horario + generación por hora, mes a mes"),
+    "fleet": (_fleet, "todas las etapas para una tabla de plantas, reanudable"),
+    "desempeno": (_desempeno, "días y rachas de bajo desempeño (modelo de generación esperada)"),
+}
+OPCIONES = {"fleet": _opciones_flota, "desempeno": _opciones_desempeno}
+
+
+def crear_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m codigo", description="Análisis clima + generación solar")
+    parser.add_argument("--profile", action="store_true", help="registra tiempos y memoria por etapa (JSON lines)")
+    sub = parser.add_subparsers(dest="subcomando", required=True)
+    for nombre, (_, ayuda) in SUBCOMANDOS.items():
+        OPCIONES.get(nombre, _opciones_planta)(sub.add_parser(nombre, help=ayuda))
+    return parser
+
+
+def main(argv=None) -> int:
+    args = crear_parser().parse_args(argv)
+    from .perfilado import activar_si_se_pide
+
+    # --profile o CLIMA_GEN_PROFILE=1
+    activar_si_se_pide(["--profile"] if args.profile else [])
+    SUBCOMANDOS[args.subcomando][0](args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+# ============================================================
+#  DECIMACIÓN DE SERIES PARA GRÁFICAS
+# ============================================================
+# Una serie de varios años a 5 minutos tiene cientos de miles de
+# puntos: dibujarlos todos es lento y no se distinguen en pantalla.
+# Antes de graficar (PNG o JSON) cada serie se reduce a un número
+# fijo de puntos conservando los picos:
+#   - "minmax": por cada cubeta se guardan el mínimo y el máximo
+#     (vectorizado; ningún pico ni valle se pierde)
+#   - "lttb":   Largest-Triangle-Three-Buckets, un punto por cubeta
+#     elegido por área visual (trazo más parecido al original)
+# Con varias columnas el presupuesto de puntos se reparte entre
+# ellas y se devuelve la unión de las filas elegidas, así el
+# tamaño final no depende de la resolución de origen.
+# ------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+PUNTOS_GRAFICA = 2000
+METODOS = ("minmax", "lttb")
+
+
+def indices_minmax(y: np.ndarray, n_puntos: int) -> np.ndarray:
+    """Posiciones del mínimo y máximo de cada una de `n_puntos // 2` cubetas (más los extremos)."""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= n_puntos:
+        return np.arange(n)
+    cubetas = max(n_puntos // 2, 1)
+    validos = np.flatnonzero(np.isfinite(y))
+    if not len(validos):
+        return np.array([0, n - 1])
+
+    # Ordenar por (cubeta, valor): la primera fila de cada cubeta es su mínimo y la última su máximo
+    ids = validos * cubetas // n
+    orden = np.lexsort((y[validos], ids))
+    ids = ids[orden]
+    cambio = ids[1:] != ids[:-1]
+    primeros = orden[np.r_[True, cambio]]
+    ultimos = orden[np.r_[cambio, True]]
+    return np.unique(np.r_[0, validos[primeros], validos[ultimos], n - 1])
+
+
+def indices_lttb(x: np.ndarray, y: np.ndarray, n_puntos: int) -> np.ndarray:
+    """Posiciones elegidas por Largest-Triangle-Three-Buckets (ignora los NaN)."""
+    y = np.asarray(y, dtype=np.float64)
+    if len(y) <= n_puntos:
+        return np.arange(len(y))
+    validos = np.flatnonzero(np.isfinite(y))
+    n = len(validos)
+    if n <= max(n_puntos, 2):
+        return validos
+    x = np.asarray(x, dtype=np.float64)[validos]
+    y = y[validos]
+
+    # Primer y último punto fijos; el resto en n_puntos - 2 cubetas iguales
+    bordes = np.linspace(1, n - 1, n_puntos - 1).astype(np.int64)
+    elegidos = np.empty(n_puntos, dtype=np.int64)
+    elegidos[0], elegidos[-1] = 0, n - 1
+    a = 0
+    for i in range(n_puntos - 2):
+        i0, i1 = bordes[i], bordes[i + 1]
+        j0, j1 = (bordes[i + 1], bordes[i + 2]) if i + 2 < len(bordes) else (n - 1, n)
+        x_sig, y_sig = x[j0:j1].mean(), y[j0:j1].mean()
+        area = np.abs((x[a] - x_sig) * (y[i0:i1] - y[a]) - (x[a] - x[i0:i1]) * (y_sig - y[a]))
+        a = i0 + int(np.argmax(area))
+        elegidos[i + 1] = a
+    return validos[np.unique(elegidos)]
+
+
+def _eje(df: pd.DataFrame, x: str) -> np.ndarray:
+    """Eje x numérico para LTTB: fechas en nanosegundos o la posición si no hay columna."""
+    if x not in df.columns:
+        return np.arange(len(df), dtype=np.float64)
+    if pd.api.types.is_datetime64_any_dtype(df[x]):
+        return pd.DatetimeIndex(df[x]).asi8.astype(np.float64)
+    return df[x].to_numpy(dtype=np.float64)
+
+
+def decimar(df: pd.DataFrame, n_puntos: int = PUNTOS_GRAFICA, metodo: str = "minmax",
+            x: str = "Fecha") -> pd.DataFrame:
+    """Filas de `df` suficientes para dibujar sus columnas numéricas con ~`n_puntos` puntos en total."""
+    if metodo not in METODOS:
+        raise ValueError(f"Método de decimación no soportado: {metodo} (usar {', '.join(METODOS)})")
+    columnas = [c for c in df.columns if c != x and pd.api.types.is_numeric_dtype(df[c])]
+    if len(df) <= n_puntos or not columnas:
+        return df
+
+    por_columna = max(n_puntos // len(columnas), 4)
+    if metodo == "lttb":
+        eje = _eje(df, x)
+        partes = [indices_lttb(eje, df[c].to_numpy(), por_columna) for c in columnas]
+    else:
+        partes = [indices_minmax(df[c].to_numpy(), por_columna) for c in columnas]
+    return df.iloc[np.unique(np.concatenate(partes))]
@@ -0,0 +1,224 @@
+# ============================================================
+#  DETECTOR DE BAJO DESEMPEÑO POR PLANTA
+# ============================================================
+# Para cada planta se ajusta un modelo lineal de generación
+# esperada a partir del clima:
+#   Generacion_kWh ≈ b0 + b1·Radiación + b2·Tmax + b3·Nubosidad + b4·Lluvia
+# Todas las plantas de un lote se ajustan a la vez (ecuaciones
+# normales acumuladas por planta con `np.add.reduceat` y resueltas
+# con `np.linalg.pinv` en lote). Cada día recibe su residuo
+# estandarizado; los días por debajo del umbral se marcan y las
+# rachas de varios días seguidos generan una alerta.
+#
+# Los lotes de plantas se reparten entre procesos. En modo
+# incremental los días nuevos se puntúan con los coeficientes
+# guardados en SQLite, sin volver a ajustar.
+# ------------------------------------------------------------
+
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .kpis import indexar_flota
+
+VARIABLES_MODELO = ["Radiacion_kWhm2", "Temp_Max", "Nubosidad_%", "Precipitacion_mm"]
+COEFICIENTES = ["b0"] + [f"b_{v}" for v in VARIABLES_MODELO]
+UMBRAL_Z = -2.0
+MIN_RACHA = 3
+MIN_DIAS_AJUSTE = 30
+# Por debajo de estas filas el arranque de procesos cuesta más que el ajuste
+FILAS_MIN_PARALELO = 250_000
+
+_ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS modelo_desempeno (
+    planta   TEXT PRIMARY KEY,
+    {", ".join(f'"{c}" REAL' for c in COEFICIENTES)},
+    sigma    REAL,
+    n        INTEGER NOT NULL,
+    ajustado REAL NOT NULL
+);
+"""
+
+
+# ========= ÁLGEBRA EN LOTE =========
+def _matrices(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """X (con intercepto), y y máscara de filas completas, en float64.
+
+    `y` es siempre una copia: si la columna ya es float64, `to_numpy` daría
+    una vista (de solo lectura con copy-on-write) de los datos del llamador.
+    """
+    X = np.ones((len(df), len(COEFICIENTES)))
+    X[:, 1:] = df[VARIABLES_MODELO].to_numpy(dtype=np.float64)
+    y = np.array(df["Generacion_kWh"], dtype=np.float64, copy=True)
+    validos = np.isfinite(X).all(axis=1) & np.isfinite(y)
+    return X, y, validos
+
+
+def _inicios(codigos: np.ndarray) -> np.ndarray:
+    """Posición de la primera fila de cada planta (filas ordenadas por planta)."""
+    return np.flatnonzero(np.r_[True, codigos[1:] != codigos[:-1]])
+
+
+def ajustar_lote(df: pd.DataFrame, min_dias: int = MIN_DIAS_AJUSTE) -> pd.DataFrame:
+    """Coeficientes, sigma y n de cada planta de `df` (MultiIndex planta, Fecha)."""
+    plantas = df.index.get_level_values("planta")
+    codigos, nombres = pd.factorize(plantas, sort=False)
+    X, y, validos = _matrices(df)
+    X[~validos] = 0.0
+    y[~validos] = 0.0
+
+    inicios = _inicios(codigos)
+    XtX = np.add.reduceat(X[:, :, None] * X[:, None, :], inicios, axis=0)
+    Xty = np.add.reduceat(X * y[:, None], inicios, axis=0)
+    n = np.add.reduceat(validos.astype(np.int64), inicios)
+    coef = (np.linalg.pinv(XtX) @ Xty[:, :, None])[:, :, 0]
+
+    residuo = np.where(validos, y - np.einsum("ij,ij->i", X, coef[codigos]), 0.0)
+    gl = np.maximum(n - len(COEFICIENTES), 1)
+    sigma = np.sqrt(np.add.reduceat(residuo ** 2, inicios) / gl)
+
+    modelo = pd.DataFrame(coef, columns=COEFICIENTES, index=pd.Index(nombres, name="planta"))
+    modelo["sigma"] = sigma
+    modelo["n"] = n
+    # Sin suficientes días el modelo no es confiable: no se puntúa
+    modelo.loc[modelo["n"] < min_dias, COEFICIENTES + ["sigma"]] = np.nan
+    return modelo
+
+
+def puntuar(df: pd.DataFrame, modelo: pd.DataFrame, umbral_z: float = UMBRAL_Z,
+            min_racha: int = MIN_RACHA) -> pd.DataFrame:
+    """Generación esperada, residuo, z y alertas por día (índice planta, Fecha)."""
+    plantas = df.index.get_level_values("planta")
+    coef = modelo.reindex(plantas)
+    X, y, validos = _matrices(df)
+
+    esperado = np.einsum("ij,ij->i", X, coef[COEFICIENTES].to_numpy(dtype=np.float64))
+    residuo = y - esperado
+    z = residuo / coef["sigma"].to_numpy(dtype=np.float64)
+    bajo = validos & (z < umbral_z)
+
+    # Rachas: días marcados consecutivos (en calendario) de la misma planta
+    fechas = df.index.get_level_values("Fecha")
+    codigos = pd.factorize(plantas, sort=False)[0]
+    corte = np.r_[True, (codigos[1:] != codigos[:-1]) | (np.diff(fechas.values) != np.timedelta64(1, "D"))]
+    nueva = bajo & (corte | ~np.r_[False, bajo[:-1]])
+    grupo = np.cumsum(nueva)
+    largo = np.bincount(grupo, weights=bajo)[grupo].astype(np.int32)
+    racha = np.where(bajo, largo, 0)
+
+    return pd.DataFrame({
+        "Esperado_kWh": esperado.astype(np.float32),
+        "Residuo_kWh": residuo.astype(np.float32),
+        "z": z.astype(np.float32),
+        "bajo": bajo,
+        "racha": racha,
+        "alerta": racha >= min_racha,
+    }, index=df.index)
+
+
+def _ajustar_y_puntuar(args) -> tuple[pd.DataFrame, pd.DataFrame]:
+    df, umbral_z, min_racha = args
+    modelo = ajustar_lote(df)
+    return modelo, puntuar(df, modelo, umbral_z, min_racha)
+
+
+def _lotes(df: pd.DataFrame, n_lotes: int):
+    """Parte el frame en lotes de plantas completas."""
+    plantas = df.index.get_level_values("planta").unique()
+    for grupo in np.array_split(np.arange(len(plantas)), n_lotes):
+        if len(grupo):
+            yield df.loc[plantas[grupo[0]]:plantas[grupo[-1]]]
+
+
+# ========= API =========
+def detectar_flota(df, umbral_z: float = UMBRAL_Z, min_racha: int = MIN_RACHA,
+                   max_procesos: int | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Ajusta y puntúa toda la flota. Devuelve (modelo por planta, puntuación diaria).
+
+    `df` es un frame largo con columna planta, un {planta: df} o un MultiIndex
+    (planta, Fecha). Con `max_procesos=1` (o flotas pequeñas) todo corre en el
+    proceso actual.
+    """
+    df = indexar_flota(df)
+    procesos = max_procesos or os.cpu_count() or 1
+    n_plantas = df.index.get_level_values("planta").nunique()
+    if procesos == 1 or n_plantas < 2 or len(df) < FILAS_MIN_PARALELO:
+        return _ajustar_y_puntuar((df, umbral_z, min_racha))
+
+    tareas = [(lote, umbral_z, min_racha) for lote in _lotes(df, min(procesos * 4, n_plantas))]
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        partes = list(pool.map(_ajustar_y_puntuar, tareas))
+    return pd.concat([m for m, _ in partes]), pd.concat([p for _, p in partes])
+
+
+def rachas(puntuacion: pd.DataFrame) -> pd.DataFrame:
+    """Una fila por racha con alerta: planta, inicio, fin, dias, deficit_kWh."""
+    alertas = puntuacion[puntuacion["alerta"]].reset_index()
+    if alertas.empty:
+        return pd.DataFrame(columns=["planta", "inicio", "fin", "dias", "deficit_kWh"])
+    corte = (alertas["planta"] != alertas["planta"].shift()) | (alertas["Fecha"].diff() != pd.Timedelta(days=1))
+    return (
+        alertas.groupby(corte.cumsum().rename("racha_id"))
+        .agg(planta=("planta", "first"), inicio=("Fecha", "min"), fin=("Fecha", "max"),
+             dias=("Fecha", "size"), deficit_kWh=("Residuo_kWh", "sum"))
+        .reset_index(drop=True)
+    )
+
+
+class ModeloDesempeno:
+    """Coeficientes por planta guardados en SQLite para puntuar días nuevos sin reajustar."""
+
+    def __init__(self, ruta: str = "cache/modelo_desempeno.sqlite"):
+        self.ruta = ruta
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        with self._conectar() as con:
+            con.executescript(_ESQUEMA)
+
+    def _conectar(self):
+        return sqlite3.connect(self.ruta, timeout=30)
+
+    def guardar(self, modelo: pd.DataFrame):
+        columnas = ["planta", *COEFICIENTES, "sigma", "n", "ajustado"]
+        filas = modelo.reset_index().assign(planta=lambda d: d["planta"].astype(str), ajustado=time.time())
+        filas = filas[columnas].astype(object).where(filas[columnas].notna(), None)
+        nombres = ", ".join(f'"{c}"' for c in columnas)
+        marcas = ", ".join("?" * len(columnas))
+        with self._conectar() as con:
+            con.executemany(
+                f"INSERT OR REPLACE INTO modelo_desempeno ({nombres}) VALUES ({marcas})",
+                filas.itertuples(index=False, name=None),
+            )
+
+    def cargar(self) -> pd.DataFrame:
+        with self._conectar() as con:
+            modelo = pd.read_sql_query("SELECT * FROM modelo_desempeno", con, index_col="planta")
+        return modelo.drop(columns="ajustado")
+
+    def puntuar_nuevos(self, df_nuevo, umbral_z: float = UMBRAL_Z, min_racha: int = MIN_RACHA,
+                       max_procesos: int | None = None) -> pd.DataFrame:
+        """Puntúa días nuevos con los coeficientes guardados.
+
+        Las plantas sin modelo utilizable (sin guardar, con menos de
+        MIN_DIAS_AJUSTE días o coeficientes NaN) se ajustan con esos días; el
+        modelo solo se guarda si es utilizable, así un lote corto no deja a
+        la planta sin puntuar para siempre. Las rachas solo consideran los
+        días recibidos.
+        """
+        df_nuevo = indexar_flota(df_nuevo)
+        modelo = self.cargar()
+        utilizable = (modelo["n"] >= MIN_DIAS_AJUSTE) & modelo[COEFICIENTES + ["sigma"]].notna().all(axis=1)
+        plantas = df_nuevo.index.get_level_values("planta").astype(str)
+        sin_modelo = ~plantas.isin(modelo.index[utilizable])
+        if sin_modelo.any():
+            nuevo, _ = detectar_flota(df_nuevo[sin_modelo], umbral_z, min_racha, max_procesos)
+            nuevo = nuevo.set_axis(nuevo.index.astype(str))
+            self.guardar(nuevo[nuevo[COEFICIENTES + ["sigma"]].notna().all(axis=1)])
+            modelo = pd.concat([modelo[~modelo.index.isin(nuevo.index)], nuevo])
+        df_nuevo.index = df_nuevo.index.set_levels(df_nuevo.index.levels[0].astype(str), level="planta")
+        return puntuar(df_nuevo, modelo, umbral_z, min_racha)
@@ -0,0 +1,371 @@
+# ============================================================
+#  ESCRITORES DE RESULTADOS (XLSX, PARQUET, CSV.GZ)
+# ============================================================
+# `df.to_excel` pasa por openpyxl y arma el libro completo en
+# memoria. Estos escritores reciben el DataFrame por bloques y
+# lo vuelcan a disco a medida que llega:
+#   - xlsx    → xlsxwriter en modo constant_memory, una hoja por planta
+#   - parquet → pyarrow.parquet.ParquetWriter, un row group por bloque
+#   - csv.gz  → CSV comprimido con gzip
+# El Excel conserva el formato de `to_excel(index=False)`: hoja
+# "Sheet1", encabezado en la fila 1 y fechas "YYYY-MM-DD HH:MM:SS".
+#
+# Para descargas HTTP, `csv_en_flujo` y `xlsx_en_flujo` son
+# generadores de bytes: cada bloque se convierte y se entrega en
+# cuanto se lee (el xlsx se arma como un zip en flujo, hoja por
+# hoja), sin juntar el archivo completo en memoria.
+# ------------------------------------------------------------
+
+import gzip
+import io
+import os
+import re
+import zipfile
+import zlib
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+HOJA_POR_DEFECTO = "Sheet1"
+FORMATO_FECHA_EXCEL = "YYYY-MM-DD HH:MM:SS"
+MAX_FILAS_EXCEL = 1_048_576
+
+
+def _bloques(df: pd.DataFrame, tamano_bloque: int):
+    for inicio in range(0, len(df), tamano_bloque):
+        yield df.iloc[inicio:inicio + tamano_bloque]
+
+
+class Escritor:
+    """Base común: se usa como context manager y acepta varios `escribir`."""
+
+    extension = ""
+
+    def __init__(self, ruta: str, tamano_bloque: int = 50_000):
+        self.ruta = ruta
+        self.tamano_bloque = tamano_bloque
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+
+    def escribir(self, df: pd.DataFrame, hoja: str = HOJA_POR_DEFECTO):
+        for bloque in _bloques(df, self.tamano_bloque):
+            self._escribir_bloque(bloque, hoja)
+
+    def _escribir_bloque(self, bloque: pd.DataFrame, hoja: str):
+        raise NotImplementedError
+
+    def cerrar(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+class EscritorExcel(Escritor):
+    """xlsxwriter con `constant_memory`: cada fila se escribe y se libera.
+
+    Las filas de cada hoja deben llegar en orden (se puede alternar entre hojas).
+    """
+
+    extension = ".xlsx"
+
+    def __init__(self, ruta: str, tamano_bloque: int = 50_000):
+        import xlsxwriter
+
+        super().__init__(ruta, tamano_bloque)
+        self._libro = xlsxwriter.Workbook(ruta, {"constant_memory": True})
+        self._formato_fecha = self._libro.add_format({"num_format": FORMATO_FECHA_EXCEL})
+        self._hojas = {}  # nombre → [hoja, columnas, siguiente fila]
+
+    def _hoja(self, nombre: str, columnas: list[str]):
+        if nombre not in self._hojas:
+            hoja = self._libro.add_worksheet(nombre)
+            hoja.write_row(0, 0, columnas)
+            self._hojas[nombre] = [hoja, columnas, 1]
+        return self._hojas[nombre]
+
+    def _escribir_bloque(self, bloque: pd.DataFrame, hoja: str):
+        estado = self._hoja(hoja, list(bloque.columns))
+        ws, columnas, fila = estado
+        if list(bloque.columns) != columnas:
+            raise ValueError(f"Las columnas del bloque no coinciden con la hoja '{hoja}'")
+        if fila + len(bloque) > MAX_FILAS_EXCEL:
+            raise ValueError(f"La hoja '{hoja}' supera el máximo de filas de Excel; usa parquet o csv.gz")
+
+        # Por columna: fechas como datetime de Python, NaN/NaT como celda vacía
+        valores, escribir = [], []
+        for c in columnas:
+            serie = bloque[c]
+            if pd.api.types.is_datetime64_any_dtype(serie):
+                col = np.array(serie.dt.to_pydatetime(), dtype=object)
+                escribir.append(lambda f, j, v: ws.write_datetime(f, j, v, self._formato_fecha))
+            elif pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+                col = serie.astype("float64").to_numpy(dtype=object)
+                escribir.append(ws.write_number)
+            else:
+                # Copia: con copy-on-write una columna ya object daría una vista de solo lectura
+                col = np.array(serie, dtype=object, copy=True)
+                escribir.append(ws.write)
+            col[pd.isna(serie).to_numpy()] = None
+            valores.append(col)
+
+        for tupla in zip(*valores):
+            for j, v in enumerate(tupla):
+                if v is not None:
+                    escribir[j](fila, j, v)
+            fila += 1
+        estado[2] = fila
+
+    def cerrar(self):
+        if not self._hojas:
+            self._libro.add_worksheet(HOJA_POR_DEFECTO)
+        self._libro.close()
+
+
+class EscritorParquet(Escritor):
+    """Un row group por bloque; el esquema lo fija el primer bloque."""
+
+    extension = ".parquet"
+
+    def __init__(self, ruta: str, tamano_bloque: int = 50_000):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        super().__init__(ruta, tamano_bloque)
+        self._pa, self._pq = pa, pq
+        self._escritor = None
+
+    def _escribir_bloque(self, bloque: pd.DataFrame, hoja: str):
+        if self._escritor is None:
+            tabla = self._pa.Table.from_pandas(bloque, preserve_index=False)
+            self._escritor = self._pq.ParquetWriter(self.ruta, tabla.schema, compression="snappy")
+        else:
+            tabla = self._pa.Table.from_pandas(bloque, schema=self._escritor.schema, preserve_index=False)
+        self._escritor.write_table(tabla)
+
+    def cerrar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+
+
+class EscritorCsvGz(Escritor):
+    """CSV con gzip; el encabezado se escribe solo con el primer bloque."""
+
+    extension = ".csv.gz"
+
+    def __init__(self, ruta: str, tamano_bloque: int = 50_000):
+        super().__init__(ruta, tamano_bloque)
+        self._archivo = gzip.open(ruta, "wt", encoding="utf-8", newline="", compresslevel=6)
+        self._columnas = None
+
+    def _escribir_bloque(self, bloque: pd.DataFrame, hoja: str):
+        encabezado = self._columnas is None
+        if encabezado:
+            self._columnas = list(bloque.columns)
+        bloque.to_csv(self._archivo, index=False, header=encabezado, columns=self._columnas)
+
+    def cerrar(self):
+        self._archivo.close()
+
+
+ESCRITORES = {
+    "xlsx": EscritorExcel,
+    "parquet": EscritorParquet,
+    "csv.gz": EscritorCsvGz,
+}
+
+
+def nombre_hoja(nombre: str) -> str:
+    """Nombre válido de hoja de Excel (máx. 31 caracteres, sin []:*?/\\)."""
+    return re.sub(r"[\[\]:*?/\\]", "_", nombre)[:31] or HOJA_POR_DEFECTO
+
+
+def abrir_escritor(ruta: str, formato: str | None = None, tamano_bloque: int = 50_000) -> Escritor:
+    """Escritor según `formato` o, si no se indica, según la extensión de `ruta`."""
+    if formato is None:
+        formato = next((f for f, cls in ESCRITORES.items() if ruta.lower().endswith(cls.extension)), None)
+    if formato not in ESCRITORES:
+        raise ValueError(f"Formato de salida no soportado: {formato or ruta} (usa {', '.join(ESCRITORES)})")
+    return ESCRITORES[formato](ruta, tamano_bloque)
+
+
+def exportar(df: pd.DataFrame, ruta: str, formato: str | None = None, tamano_bloque: int = 50_000) -> str:
+    """Escribe una planta con el mismo diseño que `df.to_excel(ruta, index=False)`."""
+    with abrir_escritor(ruta, formato, tamano_bloque) as escritor:
+        escritor.escribir(df)
+    return ruta
+
+
+def exportar_flota(datos: dict[str, pd.DataFrame], ruta: str, formato: str | None = None,
+                   tamano_bloque: int = 50_000) -> str:
+    """Varias plantas en un archivo: una hoja por planta en xlsx, columna `planta` en el resto."""
+    with abrir_escritor(ruta, formato, tamano_bloque) as escritor:
+        por_hojas = isinstance(escritor, EscritorExcel)
+        for planta, df in datos.items():
+            if por_hojas:
+                escritor.escribir(df, hoja=nombre_hoja(planta))
+            else:
+                escritor.escribir(df.assign(planta=planta)[["planta", *df.columns]])
+    return ruta
+
+
+# ========= DESCARGA EN FLUJO =========
+def csv_en_flujo(bloques, comprimir: bool = False):
+    """Bytes de un CSV (o CSV.gz) a partir de bloques DataFrame con las mismas columnas."""
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 31) if comprimir else None  # 31 → cabecera gzip
+    columnas = None
+    for bloque in bloques:
+        encabezado = columnas is None
+        if encabezado:
+            columnas = list(bloque.columns)
+        datos = bloque.to_csv(index=False, header=encabezado, columns=columnas).encode("utf-8")
+        datos = compresor.compress(datos) if compresor else datos
+        if datos:
+            yield datos
+    if compresor:
+        yield compresor.flush()
+
+
+class _Tuberia(io.RawIOBase):
+    """Archivo de solo escritura (no seekable) que se va vaciando desde el generador."""
+
+    def __init__(self):
+        self._partes = []
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def vaciar(self) -> bytes:
+        datos = b"".join(self._partes)
+        self._partes.clear()
+        return datos
+
+
+_NS_HOJA = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_NS_PKG = "http://schemas.openxmlformats.org/package/2006/relationships"
+_EPOCA_EXCEL = pd.Timestamp("1899-12-30")
+
+
+def _xml_hoja_inicio() -> bytes:
+    return f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<worksheet xmlns="{_NS_HOJA}"><sheetData>'.encode()
+
+
+def _celdas_texto(valores) -> list[str]:
+    return [f'<c t="inlineStr"><is><t xml:space="preserve">{escape(str(v))}</t></is></c>' for v in valores]
+
+
+def _filas_xml(bloque: pd.DataFrame, primera_fila: int) -> str:
+    """Filas <row> de un bloque; NaN/NaT quedan como celda vacía y las fechas con formato."""
+    celdas = []
+    for c in bloque.columns:
+        serie = bloque[c]
+        vacio = pd.isna(serie).to_numpy()
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            serial = (serie - _EPOCA_EXCEL) / pd.Timedelta(days=1)
+            col = ('<c s="1"><v>' + serial.astype(str) + "</v></c>").to_numpy(dtype=object)
+        elif pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+            col = ("<c><v>" + serie.astype(str) + "</v></c>").to_numpy(dtype=object)
+        else:
+            col = np.array(_celdas_texto(serie.to_numpy()), dtype=object)
+        col[vacio] = "<c/>"
+        celdas.append(col)
+
+    numeros = np.arange(primera_fila, primera_fila + len(bloque)).astype(str).astype(object)
+    filas = '<row r="' + numeros + '">'
+    for col in celdas:
+        filas = filas + col
+    return "".join(filas + "</row>")
+
+
+def _partes_libro(hojas: list[str]) -> dict[str, str]:
+    """Archivos fijos del paquete xlsx (libro, estilos, relaciones) para las hojas dadas."""
+    cabecera = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    tipos = "".join(
+        f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for i in range(1, len(hojas) + 1)
+    )
+    libro = "".join(f'<sheet name="{escape(h, {chr(34): "&quot;"})}" sheetId="{i}" r:id="rId{i}"/>'
+                    for i, h in enumerate(hojas, 1))
+    relaciones = "".join(
+        f'<Relationship Id="rId{i}" Type="{_NS_REL}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+        for i in range(1, len(hojas) + 1)
+    )
+    return {
+        "[Content_Types].xml": cabecera + (
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            f"{tipos}</Types>"
+        ),
+        "_rels/.rels": cabecera + (
+            f'<Relationships xmlns="{_NS_PKG}">'
+            f'<Relationship Id="rId1" Type="{_NS_REL}/officeDocument" Target="xl/workbook.xml"/>'
+            "</Relationships>"
+        ),
+        "xl/workbook.xml": cabecera + (
+            f'<workbook xmlns="{_NS_HOJA}" xmlns:r="{_NS_REL}"><sheets>{libro}</sheets></workbook>'
+        ),
+        "xl/_rels/workbook.xml.rels": cabecera + (
+            f'<Relationships xmlns="{_NS_PKG}">{relaciones}'
+            f'<Relationship Id="rId{len(hojas) + 1}" Type="{_NS_REL}/styles" Target="styles.xml"/>'
+            "</Relationships>"
+        ),
+        "xl/styles.xml": cabecera + (
+            f'<styleSheet xmlns="{_NS_HOJA}">'
+            f'<numFmts count="1"><numFmt numFmtId="164" formatCode="{FORMATO_FECHA_EXCEL}"/></numFmts>'
+            '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+            '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+            '<fill><patternFill patternType="gray125"/></fill></fills>'
+            '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+            '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+            '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+            '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+            '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+            "</styleSheet>"
+        ),
+    }
+
+
+def xlsx_en_flujo(hojas):
+    """Bytes de un .xlsx a partir de (nombre de hoja, bloques DataFrame) por hoja.
+
+    El libro se escribe como un zip en flujo: cada bloque se comprime y se
+    entrega enseguida, y las partes fijas (libro, estilos) van al final.
+    """
+    tuberia = _Tuberia()
+    nombres = []
+    with zipfile.ZipFile(tuberia, "w", zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+        for nombre, bloques in hojas:
+            nombres.append(nombre_hoja(nombre))
+            with zf.open(f"xl/worksheets/sheet{len(nombres)}.xml", "w", force_zip64=True) as f:
+                f.write(_xml_hoja_inicio())
+                fila = 1
+                for bloque in bloques:
+                    if fila == 1:
+                        f.write(f'<row r="1">{"".join(_celdas_texto(bloque.columns))}</row>'.encode("utf-8"))
+                        fila = 2
+                    if fila + len(bloque) - 1 > MAX_FILAS_EXCEL:
+                        raise ValueError(f"La hoja '{nombre}' supera el máximo de filas de Excel; usa csv.gz")
+                    f.write(_filas_xml(bloque, fila).encode("utf-8"))
+                    fila += len(bloque)
+                    yield tuberia.vaciar()
+                f.write(b"</sheetData></worksheet>")
+        if not nombres:
+            nombres.append(HOJA_POR_DEFECTO)
+            zf.writestr("xl/worksheets/sheet1.xml", _xml_hoja_inicio() + b"</sheetData></worksheet>")
+        for ruta, contenido in _partes_libro(nombres).items():
+            zf.writestr(ruta, contenido)
+    yield tuberia.vaciar()
@@ -0,0 +1,81 @@
+# ============================================================
+#  ESQUEMA DEL DATAFRAME UNIFICADO CLIMA + GENERACIÓN
+# ============================================================
+# Se aplica una sola vez al ingresar los datos:
+#   - float32 para variables climáticas y energías
+#   - categóricas para identificadores (planta, celda, parámetro)
+#   - valores -999/-9999 de NASA → NaN
+# De esta forma ni las gráficas ni el informe necesitan copiar
+# el DataFrame completo con `replace`.
+# ------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+from .cache_nasa import VALORES_INVALIDOS
+from .generacion import COLUMNAS_KWH
+
+COLUMNAS_FLOAT32 = [
+    "Generacion_kWh", "Consumo_kWh", "Autoconsumo_kWh", "Inyeccion_kWh", "Importacion_kWh",
+    "Radiacion_kWhm2", "Temp_Max", "Temp_Min", "Nubosidad_%", "Precipitacion_mm",
+    "Radiacion_Whm2", "Temp",
+    "valor",
+]
+COLUMNAS_CATEGORICAS = ["planta", "celda", "parametro"]
+
+# Parámetros de NASA POWER → columnas del DataFrame unificado
+RENOMBRE_CLIMA = {
+    "ALLSKY_SFC_SW_DWN": "Radiacion_kWhm2",
+    "T2M_MAX": "Temp_Max",
+    "T2M_MIN": "Temp_Min",
+    "CLOUD_AMT": "Nubosidad_%",
+    "PRECTOTCORR": "Precipitacion_mm"
+}
+# Igual para el endpoint horario (radiación en Wh/m² por hora)
+RENOMBRE_CLIMA_HORARIO = {
+    "ALLSKY_SFC_SW_DWN": "Radiacion_Whm2",
+    "T2M": "Temp",
+    "CLOUD_AMT": "Nubosidad_%",
+    "PRECTOTCORR": "Precipitacion_mm"
+}
+# Columnas del DataFrame unificado, en orden
+COLUMNAS_UNION = ["Fecha"] + COLUMNAS_KWH + list(RENOMBRE_CLIMA.values())
+
+# Columnas que el informe necesita sí o sí
+COLS_NECESARIAS = [
+    "Fecha",
+    "Generacion_kWh",
+    "Radiacion_kWhm2",
+    "Nubosidad_%",
+    "Temp_Max",
+    "Temp_Min",
+]
+
+
+def validar_columnas(df: pd.DataFrame, requeridas=COLS_NECESARIAS, origen: str = "el DataFrame"):
+    for c in requeridas:
+        if c not in df.columns:
+            raise ValueError(f"Falta la columna requerida '{c}' en {origen}")
+
+
+def aplicar_esquema(df: pd.DataFrame, requeridas=None, origen: str = "el DataFrame") -> pd.DataFrame:
+    """Convierte tipos y enmascara los valores inválidos columna a columna.
+
+    Modifica `df` (sin copiar el DataFrame completo) y lo devuelve.
+    Si se pasa `requeridas`, valida antes que esas columnas existan.
+    """
+    if requeridas is not None:
+        validar_columnas(df, requeridas, origen)
+
+    for col in df.columns.intersection(COLUMNAS_FLOAT32):
+        valores = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float32, copy=True)
+        valores[np.isin(valores, VALORES_INVALIDOS)] = np.nan
+        df[col] = valores
+
+    for col in df.columns.intersection(COLUMNAS_CATEGORICAS):
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+
+    if "Fecha" in df.columns:
+        df["Fecha"] = pd.to_datetime(df["Fecha"])
+    return df
@@ -0,0 +1,225 @@
+# ============================================================
+#  DESCARGA CONCURRENTE DE NASA POWER PARA VARIAS PLANTAS
+# ============================================================
+# Descarga en paralelo (hilos) usando una sola `requests.Session`
+# con pool de conexiones, timeout y reintentos con espera
+# exponencial ante 429/5xx. Un error en una planta no detiene al
+# resto: se registra en `df.attrs["errores"]`.
+# Las plantas se agrupan por celda de la malla de NASA POWER: cada
+# celda se descarga una vez (en las coordenadas de una de sus
+# plantas) y su serie se comparte entre plantas: el resultado va
+# por celda y una tabla planta → celda hace el cruce solo cuando
+# se pide la vista por planta.
+# ------------------------------------------------------------
+
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from .cache_nasa import PARAMETROS_NASA, URL_NASA_DIARIO, CacheNasa, _a_fecha, celdas_nasa
+from .esquema import aplicar_esquema
+from .perfilado import etapa
+
+CODIGOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+
+class ClienteNasa:
+    """Cliente HTTP de NASA POWER con pool de conexiones y reintentos.
+
+    `params_extra` se agrega a cada petición (p. ej. {"time-standard": "UTC"}).
+    `descargar` tiene la misma firma que `cache_nasa.descargar_nasa`, así que
+    puede usarse directamente como `CacheNasa(descargar=cliente.descargar)`.
+    """
+
+    def __init__(
+        self,
+        url: str = URL_NASA_DIARIO,
+        max_conexiones: int = 16,
+        timeout: float = 60,
+        reintentos: int = 5,
+        espera_base: float = 1.0,
+        espera_max: float = 60.0,
+        params_extra: dict | None = None,
+    ):
+        self.url = url
+        self.params_extra = params_extra or {}
+        self.timeout = timeout
+        self.reintentos = reintentos
+        self.espera_base = espera_base
+        self.espera_max = espera_max
+
+        self.session = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=max_conexiones, pool_maxsize=max_conexiones)
+        self.session.mount("http://", adaptador)
+        self.session.mount("https://", adaptador)
+
+    def _espera(self, intento: int, respuesta=None) -> float:
+        """Backoff exponencial con jitter; respeta `Retry-After` si viene."""
+        if respuesta is not None and respuesta.headers.get("Retry-After", "").isdigit():
+            return min(float(respuesta.headers["Retry-After"]), self.espera_max)
+        return min(self.espera_base * 2 ** intento, self.espera_max) * random.uniform(0.5, 1.0)
+
+    def descargar(self, lat, lon, parametros, inicio: date, fin: date) -> dict:
+        params = {
+            "start": _a_fecha(inicio).strftime("%Y%m%d"),
+            "end": _a_fecha(fin).strftime("%Y%m%d"),
+            "latitude": lat,
+            "longitude": lon,
+            "parameters": ",".join(parametros),
+            "format": "JSON",
+            "community": "RE",
+            **self.params_extra,
+        }
+        for intento in range(self.reintentos + 1):
+            try:
+                r = self.session.get(self.url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if intento == self.reintentos:
+                    raise
+                time.sleep(self._espera(intento))
+                continue
+            if r.status_code in CODIGOS_REINTENTABLES and intento < self.reintentos:
+                time.sleep(self._espera(intento, r))
+                continue
+            r.raise_for_status()
+            return r.json()["properties"]["parameter"]
+
+    def cerrar(self):
+        self.session.close()
+
+
+def asignar_celdas(sitios: pd.DataFrame) -> pd.Series:
+    """planta → clave de celda de NASA POWER (categórico, ver `cache_nasa.celdas_nasa`)."""
+    return pd.Series(pd.Categorical(celdas_nasa(sitios["lat"], sitios["lon"])),
+                     index=pd.Index(sitios["planta"], name="planta"), name="celda")
+
+
+def representantes(sitios: pd.DataFrame, asignacion: pd.Series) -> dict[str, tuple[float, float]]:
+    """celda → (lat, lon) de su primera planta en la tabla: el punto que se consulta."""
+    primeras = sitios.assign(celda=asignacion.to_numpy()).drop_duplicates("celda")
+    return {c: (float(la), float(lo)) for c, la, lo in zip(primeras["celda"], primeras["lat"], primeras["lon"])}
+
+
+def descargar_celdas(
+    sitios: pd.DataFrame,
+    inicio="20230501",
+    fin=None,
+    parametros=PARAMETROS_NASA,
+    max_hilos: int = 8,
+    cliente: ClienteNasa | None = None,
+    cache: CacheNasa | None = None,
+) -> tuple[dict[str, pd.DataFrame], pd.Series]:
+    """Una descarga por celda de la malla para todas las plantas de `sitios`.
+
+    Cada celda se consulta con las coordenadas de una de sus plantas (ver
+    `representantes`), nunca con el centro de la celda. Devuelve
+    ({celda: DataFrame fecha × parámetro}, planta → celda); las plantas de
+    una misma celda apuntan al mismo DataFrame (sin copias). Las celdas que
+    fallaron quedan en `asignacion.attrs["errores"]` ({celda: mensaje}).
+    """
+    propio = cliente is None
+    cliente = cliente or ClienteNasa(max_conexiones=max_hilos)
+    fin = fin if fin is not None else date.today()
+    asignacion = asignar_celdas(sitios)
+    puntos = representantes(sitios, asignacion)
+
+    def _una_celda(celda: str):
+        lat, lon = puntos[celda]
+        with etapa("nasa", planta=celda) as e:
+            if cache is not None:
+                # La caché descarga con el cliente compartido solo lo que falta
+                df = cache.obtener(lat, lon, parametros, inicio, fin, descargar=cliente.descargar)
+            else:
+                df = pd.DataFrame(cliente.descargar(lat, lon, parametros, _a_fecha(inicio), _a_fecha(fin)))
+                df.index = pd.to_datetime(df.index)
+            e.filas = len(df)
+            return df
+
+    series, errores = {}, {}
+    try:
+        with ThreadPoolExecutor(max_workers=max_hilos) as pool:
+            futuros = {pool.submit(_una_celda, c): c for c in asignacion.cat.categories}
+            for futuro in as_completed(futuros):
+                celda = futuros[futuro]
+                try:
+                    series[celda] = futuro.result()
+                except Exception as e:
+                    errores[celda] = f"{type(e).__name__}: {e}"
+    finally:
+        if propio:
+            cliente.cerrar()
+    asignacion.attrs["errores"] = errores
+    return series, asignacion
+
+
+def a_formato_largo(df: pd.DataFrame, celda) -> pd.DataFrame:
+    """Convierte el DataFrame ancho (fecha × parámetro) de una celda a formato largo."""
+    largo = df.rename_axis("Fecha").reset_index().melt(
+        id_vars="Fecha", var_name="parametro", value_name="valor"
+    )
+    largo.insert(0, "celda", celda)
+    return largo
+
+
+def descargar_flota(
+    sitios: pd.DataFrame,
+    inicio="20230501",
+    fin=None,
+    parametros=PARAMETROS_NASA,
+    max_hilos: int = 8,
+    cliente: ClienteNasa | None = None,
+    cache: CacheNasa | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Descarga NASA POWER para todas las plantas de `sitios`.
+
+    `sitios` debe tener columnas `planta`, `lat` y `lon`. Devuelve (clima,
+    plantas): `clima` es un único DataFrame largo por celda (celda, Fecha,
+    parametro, valor) donde cada celda aparece una sola vez aunque la
+    compartan varias plantas, y `plantas` la tabla planta → celda (planta,
+    lat, lon, celda categórica). `clima_planta` y `expandir_plantas` dan la
+    vista por planta cuando se necesita. Las plantas que fallaron quedan en
+    `clima.attrs["errores"]` ({planta: mensaje}).
+    """
+    series, asignacion = descargar_celdas(sitios, inicio, fin, parametros, max_hilos, cliente, cache)
+    errores_celda = asignacion.attrs["errores"]
+    celdas = asignacion.cat.categories
+
+    columnas = ["celda", "Fecha", "parametro", "valor"]
+    partes = [a_formato_largo(series[c], c) for c in celdas if c in series]
+    resultado = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=columnas)
+    resultado["celda"] = pd.Categorical(resultado["celda"], categories=celdas)
+    resultado = aplicar_esquema(resultado.sort_values(["celda", "Fecha", "parametro"], ignore_index=True))
+
+    plantas = pd.DataFrame({
+        "planta": sitios["planta"].to_numpy(),
+        "lat": sitios["lat"].to_numpy(),
+        "lon": sitios["lon"].to_numpy(),
+        "celda": asignacion.array,
+    })
+    resultado.attrs["errores"] = {p: errores_celda[c] for p, c in asignacion.items() if c in errores_celda}
+    return resultado, plantas
+
+
+def clima_planta(clima: pd.DataFrame, plantas: pd.DataFrame, planta) -> pd.DataFrame:
+    """Filas (Fecha, parametro, valor) de la celda de `planta` (ver `descargar_flota`)."""
+    celda = plantas.loc[plantas["planta"] == planta, "celda"]
+    if celda.empty:
+        raise KeyError(f"Planta no encontrada: {planta}")
+    return clima.loc[clima["celda"] == celda.iloc[0], ["Fecha", "parametro", "valor"]].reset_index(drop=True)
+
+
+def expandir_plantas(clima: pd.DataFrame, plantas: pd.DataFrame) -> pd.DataFrame:
+    """Formato largo por planta (planta, lat, lon, Fecha, parametro, valor).
+
+    Copia la serie de cada celda una vez por planta: solo para exportar o
+    para consumidores que necesitan la tabla completa.
+    """
+    largo = plantas.merge(clima, on="celda", how="inner").drop(columns="celda")
+    largo = aplicar_esquema(largo.sort_values(["planta", "Fecha", "parametro"], ignore_index=True))
+    largo.attrs = {"errores": dict(clima.attrs.get("errores", {}))}
+    return largo
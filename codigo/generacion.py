@@ -0,0 +1,153 @@
+# ============================================================
+#  CARGA Y LIMPIEZA DE DATOS DE GENERACIÓN (EXPORT DEL INVERSOR)
+# ============================================================
+
+import os
+
+import pandas as pd
+
+COLUMNAS_WH = ["Generacion_Wh", "Consumo_Wh", "Autoconsumo_Wh", "Inyeccion_Wh", "Importacion_Wh"]
+COLUMNAS_KWH = [c.replace("_Wh", "_kWh") for c in COLUMNAS_WH]
+
+
+def normalizar_fechas(fechas: pd.Series) -> pd.Series:
+    """Fechas seriales de Excel o texto día/mes/año → datetime (NaT si no se puede)."""
+    if pd.api.types.is_numeric_dtype(fechas):
+        return pd.to_datetime(fechas, unit="D", origin="1899-12-30")
+    return pd.to_datetime(fechas, dayfirst=True, errors="coerce")
+
+
+def sumar_descartes(a: dict | None, b: dict | None) -> dict:
+    """Suma dos conteos de descartes ({motivo: filas})."""
+    total = dict(a or {})
+    for clave, n in (b or {}).items():
+        total[clave] = total.get(clave, 0) + n
+    return total
+
+
+def limpiar_generacion(df_gen: pd.DataFrame) -> pd.DataFrame:
+    """Renombra columnas, normaliza fechas y convierte Wh → kWh.
+
+    Lo que se pierde queda contado en `attrs["descartes"]`: filas sin fecha
+    válida y, por columna, valores que no eran números (pasan a NaN).
+    """
+    df_gen = df_gen.copy()
+    df_gen.columns = ["Fecha"] + COLUMNAS_WH
+
+    # Normalización robusta de fechas
+    df_gen["Fecha"] = normalizar_fechas(df_gen["Fecha"])
+
+    # Eliminar filas sin fecha válida
+    sin_fecha = df_gen["Fecha"].isna()
+    descartes = {"fecha_invalida": int(sin_fecha.sum())}
+    df_gen = df_gen[~sin_fecha]
+
+    # Convertir Wh → kWh
+    for col, col_kwh in zip(COLUMNAS_WH, COLUMNAS_KWH):
+        valores = pd.to_numeric(df_gen[col], errors="coerce")
+        descartes[f"no_numerico_{col_kwh}"] = int((valores.isna() & df_gen[col].notna()).sum())
+        df_gen[col] = valores / 1000.0
+
+    df_gen = df_gen.rename(columns=dict(zip(COLUMNAS_WH, COLUMNAS_KWH))).reset_index(drop=True)
+    df_gen.attrs["descartes"] = descartes
+    return df_gen
+
+
+def leer_generacion(ruta_gen: str) -> pd.DataFrame:
+    """Lee el Excel exportado por el inversor y lo devuelve limpio (sin agrupar)."""
+    if not os.path.exists(ruta_gen):
+        raise FileNotFoundError(f"❌ No se encontró el archivo: {ruta_gen}")
+    return limpiar_generacion(pd.read_excel(ruta_gen, skiprows=1))
+
+
+def consolidar_diario(df_gen: pd.DataFrame, frecuencia: str = "D") -> pd.DataFrame:
+    """Suma las energías por día calendario (o por hora con `frecuencia="h"`)."""
+    df_gen = df_gen.assign(Fecha=df_gen["Fecha"].dt.floor(frecuencia))
+    return df_gen.groupby("Fecha", as_index=False).agg({c: "sum" for c in COLUMNAS_KWH})
+
+
+# ============================================================
+#  LECTURA POR BLOQUES (MEMORIA ACOTADA)
+# ============================================================
+
+def _bloques_excel(ruta: str, tamano_bloque: int):
+    """Filas crudas del Excel en bloques, con openpyxl en modo read-only."""
+    from openpyxl import load_workbook
+
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        # Igual que read_excel(skiprows=1): fila 1 descartada, fila 2 encabezado
+        filas = libro.worksheets[0].iter_rows(min_row=2, values_only=True)
+        encabezado = next(filas, None)
+        if encabezado is None:
+            return
+        columnas = list(range(len(COLUMNAS_WH) + 1))
+        bloque = []
+        for fila in filas:
+            bloque.append(fila[:len(columnas)])
+            if len(bloque) == tamano_bloque:
+                yield pd.DataFrame(bloque, columns=columnas)
+                bloque = []
+        if bloque:
+            yield pd.DataFrame(bloque, columns=columnas)
+    finally:
+        libro.close()
+
+
+def _bloques_csv(ruta: str, tamano_bloque: int):
+    # Igual que el Excel: solo Fecha + las columnas de energía, aunque el export traiga más
+    yield from pd.read_csv(ruta, skiprows=1, chunksize=tamano_bloque, usecols=range(len(COLUMNAS_WH) + 1))
+
+
+def leer_generacion_por_bloques(ruta_gen: str, tamano_bloque: int = 50_000):
+    """Genera bloques ya limpios (fechas y kWh) del export, .xlsx o .csv."""
+    if not os.path.exists(ruta_gen):
+        raise FileNotFoundError(f"❌ No se encontró el archivo: {ruta_gen}")
+    if ruta_gen.lower().endswith((".csv", ".csv.gz")):
+        bloques = _bloques_csv(ruta_gen, tamano_bloque)
+    else:
+        bloques = _bloques_excel(ruta_gen, tamano_bloque)
+    for crudo in bloques:
+        yield limpiar_generacion(crudo)
+
+
+def consolidar_diario_por_bloques(ruta_gen: str, tamano_bloque: int = 50_000, desde=None,
+                                  frecuencia: str = "D") -> pd.DataFrame:
+    """Totales diarios (u horarios con `frecuencia="h"`) del export leyendo por bloques.
+
+    Los días se cierran a medida que aparecen fechas posteriores; solo el
+    último día (posiblemente incompleto) se arrastra al bloque siguiente.
+    Así cada día se suma sobre las mismas filas y en el mismo orden que en
+    `consolidar_diario`, y el resultado es idéntico para exports diarios.
+    Las fechas con hora se agrupan por día calendario (o por hora, con la
+    marca al inicio del intervalo). Con `desde` se descartan en cada bloque
+    las filas anteriores a esa fecha.
+    """
+    desde = pd.Timestamp(desde) if desde is not None else None
+    partes = []
+    pendiente = None
+    descartes = {}
+    for bloque in leer_generacion_por_bloques(ruta_gen, tamano_bloque):
+        descartes = sumar_descartes(descartes, bloque.attrs.get("descartes"))
+        bloque["Fecha"] = bloque["Fecha"].dt.floor(frecuencia)
+        if desde is not None:
+            bloque = bloque[bloque["Fecha"] >= desde]
+        if pendiente is not None:
+            bloque = pd.concat([pendiente, bloque], ignore_index=True)
+        if bloque.empty:
+            continue
+        abierto = bloque["Fecha"] == bloque["Fecha"].iloc[-1]
+        pendiente = bloque[abierto]
+        partes.append(consolidar_diario(bloque[~abierto], frecuencia))
+    if pendiente is not None:
+        partes.append(consolidar_diario(pendiente, frecuencia))
+    if not partes:
+        diario = pd.DataFrame(columns=["Fecha"] + COLUMNAS_KWH)
+    else:
+        diario = pd.concat(partes, ignore_index=True)
+        # Export desordenado: un mismo día puede haberse cerrado más de una vez
+        if diario["Fecha"].duplicated().any():
+            diario = consolidar_diario(diario, frecuencia)
+        diario = diario.sort_values("Fecha").reset_index(drop=True)
+    diario.attrs["descartes"] = descartes
+    return diario
@@ -0,0 +1,143 @@
+# ============================================================
+#  GRÁFICAS SIN PANTALLA (BACKEND AGG) EN PARALELO
+# ============================================================
+# Cada gráfica se dibuja en un proceso aparte con el backend Agg
+# y se guarda como PNG con el nombre que espera el informe:
+#   "Radiación diaria - <planta>.png", "Nubosidad diaria - ...",
+#   "Temperaturas diarias - ...", "Precipitación diaria - ..."
+# No se necesita pantalla, así que sirve para tareas programadas.
+# Antes de enviarlas al proceso, las columnas de cada gráfica se
+# reducen a `PUNTOS_GRAFICA` puntos (min/max por cubeta, ver
+# decimacion.py): el tiempo de dibujo no depende de la resolución.
+# ------------------------------------------------------------
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .decimacion import PUNTOS_GRAFICA, decimar
+from .perfilado import etapa
+
+
+def _pyplot():
+    """Importa pyplot forzando el backend sin pantalla."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+def _terminar(fig, ax, ruta: str, dpi: int):
+    ax.grid(True, linestyle="--", alpha=0.6)
+    fig.tight_layout()
+    fig.autofmt_xdate()
+    fig.savefig(ruta, dpi=dpi)
+
+
+# --- Radiación vs Generación ---
+def grafica_radiacion(df: pd.DataFrame, ruta: str, nombre: str, dpi: int = 120):
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.plot(df["Fecha"], df["Generacion_kWh"], label="Generación (kWh)", color="tab:blue")
+    ax.plot(df["Fecha"], df["Radiacion_kWhm2"] * 50, "--", label="Radiación (kWh/m²) x50", color="tab:orange")
+    ax.set_title(f"☀️ Radiación solar vs Generación eléctrica - {nombre}")
+    ax.set_xlabel("Fecha")
+    ax.set_ylabel("Energía")
+    ax.legend()
+    _terminar(fig, ax, ruta, dpi)
+    plt.close(fig)
+
+
+# --- Nubosidad ---
+def grafica_nubosidad(df: pd.DataFrame, ruta: str, nombre: str, dpi: int = 120):
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.plot(df["Fecha"], df["Nubosidad_%"], color="gray")
+    ax.set_title(f"☁️ Nubosidad diaria - {nombre}")
+    ax.set_xlabel("Fecha")
+    ax.set_ylabel("Porcentaje de nubosidad (%)")
+    _terminar(fig, ax, ruta, dpi)
+    plt.close(fig)
+
+
+# --- Temperaturas ---
+def grafica_temperaturas(df: pd.DataFrame, ruta: str, nombre: str, dpi: int = 120):
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.plot(df["Fecha"], df["Temp_Max"], "r-", label="Temp. Máx (°C)")
+    ax.plot(df["Fecha"], df["Temp_Min"], "b-", label="Temp. Mín (°C)")
+    ax.set_title(f"🌡️ Temperaturas diarias - {nombre}")
+    ax.set_xlabel("Fecha")
+    ax.set_ylabel("Temperatura (°C)")
+    ax.legend()
+    _terminar(fig, ax, ruta, dpi)
+    plt.close(fig)
+
+
+# --- Precipitación ---
+def grafica_precipitacion(df: pd.DataFrame, ruta: str, nombre: str, dpi: int = 120):
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.bar(df["Fecha"], df["Precipitacion_mm"], color="tab:blue", alpha=0.6)
+    ax.set_title(f"🌧 Precipitación diaria - {nombre}")
+    ax.set_xlabel("Fecha")
+    ax.set_ylabel("Precipitación (mm/día)")
+    _terminar(fig, ax, ruta, dpi)
+    plt.close(fig)
+
+
+# clave → (función, columnas que usa, plantilla del nombre de archivo)
+GRAFICAS = {
+    "radiacion": (grafica_radiacion, ["Fecha", "Generacion_kWh", "Radiacion_kWhm2"], "Radiación diaria - {nombre}.png"),
+    "nubosidad": (grafica_nubosidad, ["Fecha", "Nubosidad_%"], "Nubosidad diaria - {nombre}.png"),
+    "temperaturas": (grafica_temperaturas, ["Fecha", "Temp_Max", "Temp_Min"], "Temperaturas diarias - {nombre}.png"),
+    "precipitacion": (grafica_precipitacion, ["Fecha", "Precipitacion_mm"], "Precipitación diaria - {nombre}.png"),
+}
+
+
+def ruta_grafica(clave: str, nombre: str, carpeta: str = "resultados") -> str:
+    return os.path.join(carpeta, GRAFICAS[clave][2].format(nombre=nombre))
+
+
+def _tareas(df: pd.DataFrame, nombre: str, carpeta: str, puntos: int | None = PUNTOS_GRAFICA):
+    """Una tarea por gráfica, enviando al proceso solo las columnas (y puntos) necesarios."""
+    for clave, (_, columnas, _) in GRAFICAS.items():
+        if all(c in df.columns for c in columnas):
+            datos = df[columnas] if puntos is None else decimar(df[columnas], puntos)
+            yield clave, datos, ruta_grafica(clave, nombre, carpeta), nombre
+
+
+def _dibujar(clave: str, df: pd.DataFrame, ruta: str, nombre: str):
+    with etapa("grafica", planta=nombre, filas=len(df), grafica=clave):
+        GRAFICAS[clave][0](df, ruta, nombre)
+
+
+def renderizar_flota(datos: dict, carpeta: str = "resultados", max_procesos: int | None = None,
+                     puntos: int | None = PUNTOS_GRAFICA) -> list[str]:
+    """Dibuja las gráficas de varias plantas en un pool de procesos.
+
+    `datos` es {nombre_planta: DataFrame}. Devuelve las rutas de los PNG.
+    Con `puntos=None` se dibujan todas las filas sin decimar; con
+    `max_procesos=1` se dibuja en el proceso actual.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    tareas = [t for nombre, df in datos.items() for t in _tareas(df, nombre, carpeta, puntos)]
+    if max_procesos == 1:
+        # Sin pool: p. ej. cuando quien llama ya es un proceso de un pool
+        for tarea in tareas:
+            _dibujar(*tarea)
+        return [ruta for _, _, ruta, _ in tareas]
+    with ProcessPoolExecutor(max_workers=max_procesos) as pool:
+        futuros = [pool.submit(_dibujar, clave, df, ruta, nombre) for clave, df, ruta, nombre in tareas]
+        for futuro in futuros:
+            futuro.result()
+    return [ruta for _, _, ruta, _ in tareas]
+
+
+def renderizar_graficas(df: pd.DataFrame, nombre: str = "Cabeza y Cola", carpeta: str = "resultados",
+                        max_procesos: int | None = None, puntos: int | None = PUNTOS_GRAFICA) -> list[str]:
+    """Dibuja en paralelo las cuatro gráficas de una planta."""
+    return renderizar_flota({nombre: df}, carpeta, max_procesos, puntos)
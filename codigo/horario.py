@@ -0,0 +1,188 @@
+# ============================================================
+#  MODO HORARIO: CLIMA NASA POWER + GENERACIÓN POR HORA
+# ============================================================
+# Con datos diarios se pierden los recortes (clipping), sombras y
+# limitaciones de inyección que ocurren dentro del día. Este modo:
+#   - usa el endpoint `temporal/hourly` de NASA POWER (en UTC)
+#   - agrupa el export del inversor por hora de forma vectorizada
+#   - pasa el clima a la hora local del sitio (UTC-5 por defecto)
+#   - une ambos sobre un único índice horario y guarda en float32
+# Todo se procesa mes a mes: el export se lee por bloques y cada
+# mes de generación se entrega apenas se cierra (llega una fecha
+# posterior), se une con su clima y se escribe (un row group por
+# mes en Parquet) antes de seguir leyendo. La lectura se detiene
+# al pasar `fin`.
+# ------------------------------------------------------------
+
+import json
+import os
+from datetime import date, timedelta
+
+import pandas as pd
+
+from .esquema import RENOMBRE_CLIMA_HORARIO, aplicar_esquema
+from .generacion import COLUMNAS_KWH, consolidar_diario, leer_generacion_por_bloques
+from .perfilado import etapa
+
+URL_NASA_HORARIO = "https://power.larc.nasa.gov/api/temporal/hourly/point"
+PARAMETROS_NASA_HORARIO = list(RENOMBRE_CLIMA_HORARIO)
+UTC_OFFSET_SITIO = -5
+# Meses con menos antigüedad que esto se vuelven a descargar (NASA los revisa)
+DIAS_PROVISIONALES = 30
+
+
+def meses(inicio, fin) -> list[pd.Timestamp]:
+    """Primer día de cada mes entre `inicio` y `fin` (inclusive)."""
+    return list(pd.date_range(pd.Timestamp(inicio).to_period("M").to_timestamp(), pd.Timestamp(fin), freq="MS"))
+
+
+def clima_horario(datos: dict, utc_offset: int = UTC_OFFSET_SITIO) -> pd.DataFrame:
+    """{parametro: {YYYYMMDDHH (UTC): valor}} → DataFrame en hora local con el esquema aplicado."""
+    df = pd.DataFrame(datos)
+    if df.empty:
+        return pd.DataFrame(columns=["Fecha", *RENOMBRE_CLIMA_HORARIO.values()])
+    fechas = pd.to_datetime(df.index, format="%Y%m%d%H") + pd.Timedelta(hours=utc_offset)
+    df = df.rename(columns=RENOMBRE_CLIMA_HORARIO).reindex(columns=list(RENOMBRE_CLIMA_HORARIO.values()))
+    df.insert(0, "Fecha", fechas)
+    return aplicar_esquema(df.reset_index(drop=True))
+
+
+class ClimaHorarioMensual:
+    """Descarga del clima horario por mes, con caché JSON de los meses ya cerrados."""
+
+    def __init__(self, carpeta: str = "cache/nasa_horario", utc_offset: int = UTC_OFFSET_SITIO, cliente=None):
+        self.carpeta = carpeta
+        self.utc_offset = utc_offset
+        self._cliente = cliente
+
+    @property
+    def cliente(self):
+        if self._cliente is None:
+            from .flota_nasa import ClienteNasa
+
+            self._cliente = ClienteNasa(URL_NASA_HORARIO, params_extra={"time-standard": "UTC"})
+        return self._cliente
+
+    def _ruta(self, lat, lon, mes: pd.Timestamp) -> str:
+        return os.path.join(self.carpeta, f"{lat:.4f}_{lon:.4f}_{mes:%Y%m}.json")
+
+    def obtener(self, lat, lon, mes: pd.Timestamp, parametros=PARAMETROS_NASA_HORARIO) -> pd.DataFrame:
+        """Clima de un mes en hora local (de 00:00 del día 1 a 23:00 del último día)."""
+        lat, lon = round(float(lat), 4), round(float(lon), 4)
+        ini_local = mes
+        fin_local = mes + pd.offsets.MonthBegin(1) - pd.Timedelta(hours=1)
+        ruta = self._ruta(lat, lon, mes)
+
+        cerrado = fin_local.date() < date.today() - timedelta(days=DIAS_PROVISIONALES)
+        if cerrado and os.path.exists(ruta):
+            with open(ruta, encoding="utf-8") as f:
+                datos = json.load(f)
+        else:
+            # Rango local → UTC: con UTC-5 el mes local termina a las 04:00 UTC del día siguiente
+            ini_utc = ini_local - pd.Timedelta(hours=self.utc_offset)
+            fin_utc = fin_local - pd.Timedelta(hours=self.utc_offset)
+            datos = self.cliente.descargar(lat, lon, parametros, ini_utc.date(), fin_utc.date())
+            if cerrado:
+                os.makedirs(self.carpeta, exist_ok=True)
+                tmp = ruta + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(datos, f)
+                os.replace(tmp, ruta)
+
+        df = clima_horario(datos, self.utc_offset)
+        return df[(df["Fecha"] >= ini_local) & (df["Fecha"] <= fin_local)]
+
+    def cerrar(self):
+        if self._cliente is not None:
+            self._cliente.cerrar()
+
+
+def generacion_horaria_por_meses(ruta_gen: str, desde=None, hasta=None, tamano_bloque: int = 50_000):
+    """Genera (mes, energías por hora del mes) leyendo el export por bloques.
+
+    En memoria solo está el mes abierto: se entrega cuando aparece una fecha
+    de un mes posterior (el export viene en orden cronológico; filas de un
+    mes ya entregado se descartan con aviso). No se lee más allá del bloque
+    que pasa `hasta` (inclusive, día completo).
+    """
+    desde = pd.Timestamp(desde) if desde is not None else None
+    limite = pd.Timestamp(hasta) + pd.Timedelta(days=1) if hasta is not None else None
+    abierto, partes, tardias = None, [], 0
+
+    def cerrar():
+        return abierto.to_timestamp(), aplicar_esquema(consolidar_diario(pd.concat(partes, ignore_index=True), "h"))
+
+    bloques = leer_generacion_por_bloques(ruta_gen, tamano_bloque)
+    try:
+        for bloque in bloques:
+            fechas = bloque["Fecha"]
+            ultimo = fechas.max()
+            dentro = pd.Series(True, index=bloque.index)
+            if desde is not None:
+                dentro &= fechas >= desde
+            if limite is not None:
+                dentro &= fechas < limite
+            bloque = bloque[dentro]
+            periodos = bloque["Fecha"].dt.to_period("M")
+            for mes in sorted(periodos.unique()):
+                parte = bloque[periodos == mes]
+                if abierto is not None and mes < abierto:
+                    tardias += len(parte)
+                    continue
+                if abierto is not None and mes > abierto:
+                    yield cerrar()
+                    partes = []
+                abierto = mes
+                partes.append(parte)
+            if limite is not None and ultimo >= limite:
+                break
+    finally:
+        bloques.close()
+    if tardias:
+        print(f"⚠️ {tardias} filas fuera de orden en {ruta_gen} (mes ya procesado) no se incluyen")
+    if partes:
+        yield cerrar()
+
+
+def unir_mes(df_gen: pd.DataFrame, df_clima: pd.DataFrame, mes: pd.Timestamp) -> pd.DataFrame:
+    """Generación y clima sobre el índice horario completo del mes.
+
+    Las horas sin dato quedan como NaN en lugar de desaparecer, así los
+    cortes del inversor o de NASA se ven en el análisis.
+    """
+    indice = pd.date_range(mes, mes + pd.offsets.MonthBegin(1), freq="h", inclusive="left", name="Fecha")
+    gen = df_gen.set_index("Fecha").reindex(indice, columns=COLUMNAS_KWH)
+    clima = df_clima.set_index("Fecha").reindex(indice, columns=list(RENOMBRE_CLIMA_HORARIO.values()))
+    return aplicar_esquema(pd.concat([gen, clima], axis=1).reset_index())
+
+
+def analizar_horario(lat, lon, inicio, fin, ruta_gen: str, ruta_salida: str, nombre=None,
+                     formato: str | None = None, utc_offset: int = UTC_OFFSET_SITIO,
+                     clima: ClimaHorarioMensual | None = None, tamano_bloque: int = 50_000) -> str:
+    """Escribe el dataset horario unificado mes a mes en `ruta_salida`."""
+    from .escritores import abrir_escritor
+
+    inicio, fin = pd.Timestamp(str(inicio)), pd.Timestamp(str(fin))
+    propio = clima is None
+    clima = clima or ClimaHorarioMensual(utc_offset=utc_offset)
+
+    generacion = generacion_horaria_por_meses(ruta_gen, desde=inicio, hasta=fin, tamano_bloque=tamano_bloque)
+    vacio = pd.DataFrame({"Fecha": pd.DatetimeIndex([]), **{c: [] for c in COLUMNAS_KWH}})
+    try:
+        with abrir_escritor(ruta_salida, formato) as escritor:
+            mes_gen, df_gen = next(generacion, (None, None))
+            for mes in meses(inicio, fin):
+                with etapa("mes_horario", planta=nombre, mes=f"{mes:%Y-%m}") as e:
+                    gen_mes = vacio
+                    if mes_gen == mes:
+                        gen_mes = df_gen
+                        mes_gen, df_gen = next(generacion, (None, None))
+                    df_mes = unir_mes(gen_mes, clima.obtener(lat, lon, mes), mes)
+                    df_mes = df_mes[(df_mes["Fecha"] >= inicio) & (df_mes["Fecha"] < fin + pd.Timedelta(days=1))]
+                    escritor.escribir(df_mes)
+                    e.filas = len(df_mes)
+    finally:
+        generacion.close()
+        if propio:
+            clima.cerrar()
+    return ruta_salida
@@ -0,0 +1,298 @@
+# ============================================================
+#  INFORME TÉCNICO EN WORD (UNA O VARIAS PLANTAS)
+# ============================================================
+# Crea el informe Word con el análisis técnico de cada planta a
+# partir del DataFrame unificado (clima + generación) en memoria
+# y de las gráficas guardadas en resultados/.
+#
+# Para la flota, los informes se generan en un pool de procesos.
+# Cada proceso recibe una sola vez el documento base (plantilla ya
+# serializada) y lo reutiliza para todos sus informes.
+# ------------------------------------------------------------
+
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.shared import Inches
+
+from .esquema import COLS_NECESARIAS, aplicar_esquema
+from .graficas import ruta_grafica
+from .perfilado import etapa
+
+# Estimados mensuales (kWh/mes) tomados de la tabla PV*SOL de Cabeza y Cola
+PVSOL_CABEZA_Y_COLA = {
+    1: 18414, 2: 16898, 3: 18250, 4: 17883, 5: 19231, 6: 18993,
+    7: 19530, 8: 19060, 9: 16886, 10: 16884, 11: 16753, 12: 17217
+}
+
+ESTILO_TABLA = "Light Grid Accent 1"
+ENCABEZADO_TABLA = ["Año", "Mes", "Real (kWh)", "Estimado PV*SOL (kWh)", "Cumplimiento (%)"]
+
+# Documento base serializado; cada proceso del pool lo recibe una vez
+_BASE: bytes | None = None
+
+
+# ========= UTILIDADES =========
+def safe_add_picture(doc: Document, path: str, width_in=6.0, caption: str | None = None):
+    """Inserta imagen si existe; si no, agrega una nota."""
+    if os.path.exists(path):
+        doc.add_picture(path, width=Inches(width_in))
+        if caption:
+            p = doc.add_paragraph(caption)
+            p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    else:
+        doc.add_paragraph(f"[Nota] No se encontró la imagen: {path}")
+
+
+def add_kpi_paragraph(doc: Document, k: str, v: str):
+    p = doc.add_paragraph()
+    run_b = p.add_run(f"{k}: ")
+    run_b.bold = True
+    p.add_run(v)
+
+
+def plantilla_base(ruta_plantilla: str | None = None) -> bytes:
+    """Carga la plantilla (o la de python-docx) una vez y la devuelve serializada."""
+    doc = Document(ruta_plantilla)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def _iniciar_proceso(base: bytes):
+    global _BASE
+    _BASE = base
+
+
+def _documento_nuevo() -> Document:
+    return Document(io.BytesIO(_BASE)) if _BASE is not None else Document()
+
+
+def leer_unificado(ruta_excel: str) -> pd.DataFrame:
+    """Lee el Excel unificado guardado por el pipeline y le aplica el esquema."""
+    if not os.path.exists(ruta_excel):
+        raise FileNotFoundError(
+            f"No encuentro {ruta_excel}. Asegúrate de haber ejecutado el script "
+            f"que genera el merge y guarda el Excel en 'resultados/'."
+        )
+    df = aplicar_esquema(pd.read_excel(ruta_excel), requeridas=COLS_NECESARIAS, origen=ruta_excel)
+    return df.sort_values("Fecha").reset_index(drop=True)
+
+
+# ========= KPIs =========
+def calcular_kpis(df: pd.DataFrame, pvsol: dict = PVSOL_CABEZA_Y_COLA,
+                  real_mensual: pd.DataFrame | None = None) -> tuple[dict, pd.DataFrame]:
+    """KPIs rápidos del periodo y tabla mensual real vs estimado PV*SOL.
+
+    `df` debe venir con el esquema aplicado (inválidos de NASA como NaN).
+    `real_mensual` (Año, Mes, Real_kWh) evita reagrupar todo el histórico
+    cuando ya viene del almacén incremental.
+    """
+    kpis = {
+        "periodo_ini": df["Fecha"].min().date(),
+        "periodo_fin": df["Fecha"].max().date(),
+        "gen_total": df["Generacion_kWh"].sum(),
+        "gen_media": df["Generacion_kWh"].mean(),
+        "rad_media": df["Radiacion_kWhm2"].mean(),
+        "nube_media": df["Nubosidad_%"].mean(),
+        "tmax_media": df["Temp_Max"].mean(),
+        "tmin_media": df["Temp_Min"].mean(),
+        "tiene_lluvia": "Precipitacion_mm" in df.columns,
+    }
+
+    # Indicador de rendimiento simple (kWh/kWh/m2) — ojo: sin DC nominal
+    # útil como proxy de eficiencia relativa día a día
+    pr = df["Generacion_kWh"] / df["Radiacion_kWhm2"]
+    kpis["pr_medio"] = pr.replace([np.inf, -np.inf], np.nan).mean()
+
+    # Sumar real por mes del rango disponible
+    if real_mensual is None:
+        real_mensual = (
+            df.groupby([df["Fecha"].dt.year.rename("Año"), df["Fecha"].dt.month.rename("Mes")])["Generacion_kWh"]
+            .sum().rename("Real_kWh").reset_index()
+        )
+    else:
+        real_mensual = real_mensual[["Año", "Mes", "Real_kWh"]].copy()
+    real_mensual["Estimado_kWh"] = real_mensual["Mes"].map(pvsol)
+    real_mensual["Cumplimiento_%"] = 100.0 * real_mensual["Real_kWh"] / real_mensual["Estimado_kWh"]
+    return kpis, real_mensual
+
+
+def _textos_tabla(real_mensual: pd.DataFrame) -> list[list[str]]:
+    """Formatea la tabla mensual completa de una vez (sin iterrows)."""
+    def _fmt(serie, patron):
+        return [patron.format(v) if not pd.isna(v) else "-" for v in serie]
+
+    columnas = [
+        real_mensual["Año"].astype(int).astype(str).tolist(),
+        real_mensual["Mes"].astype(int).astype(str).str.zfill(2).tolist(),
+        _fmt(real_mensual["Real_kWh"], "{:,.0f}"),
+        _fmt(real_mensual["Estimado_kWh"], "{:,.0f}"),
+        _fmt(real_mensual["Cumplimiento_%"], "{:,.1f}"),
+    ]
+    return [ENCABEZADO_TABLA] + [list(fila) for fila in zip(*columnas)]
+
+
+def _agregar_tabla(doc: Document, filas: list[list[str]]):
+    """Crea la tabla con todas sus filas de una vez y luego rellena las celdas."""
+    tabla = doc.add_table(rows=len(filas), cols=len(ENCABEZADO_TABLA))
+    tabla.style = ESTILO_TABLA
+    for fila_docx, textos in zip(tabla.rows, filas):
+        for celda, texto in zip(fila_docx.cells, textos):
+            celda.text = texto
+    return tabla
+
+
+# ========= DOCUMENTO WORD =========
+def generar_informe(
+    df: pd.DataFrame,
+    nombre: str = "Cabeza y Cola",
+    titulo: str | None = None,
+    carpeta_salida: str = "informes",
+    carpeta_graficas: str = "resultados",
+    pvsol: dict = PVSOL_CABEZA_Y_COLA,
+    real_mensual: pd.DataFrame | None = None,
+) -> str:
+    """Genera el informe Word de una planta y devuelve la ruta del .docx."""
+    titulo = titulo or nombre.upper()
+    k, real_mensual = calcular_kpis(df, pvsol, real_mensual)
+    doc = _documento_nuevo()
+
+    # Portada
+    encabezado = doc.add_heading("INFORME TÉCNICO DE ANÁLISIS", level=0)
+    encabezado.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    doc.add_paragraph(f"Planta Solar {titulo}").alignment = WD_ALIGN_PARAGRAPH.CENTER
+    doc.add_paragraph(f"Periodo de análisis: {k['periodo_ini']} – {k['periodo_fin']}").alignment = WD_ALIGN_PARAGRAPH.CENTER
+    doc.add_paragraph("Autor: Cristian Camilo Vélez | Área de Operación y Mantenimiento – Terrall Solnet").alignment = WD_ALIGN_PARAGRAPH.CENTER
+    doc.add_page_break()
+
+    # 1. Resumen ejecutivo
+    doc.add_heading("1. Resumen ejecutivo", level=1)
+    add_kpi_paragraph(doc, "Generación total (kWh)", f"{k['gen_total']:,.0f}")
+    add_kpi_paragraph(doc, "Generación promedio diaria (kWh/día)", f"{k['gen_media']:,.1f}")
+    add_kpi_paragraph(doc, "Radiación media (kWh/m²/día)", f"{k['rad_media']:,.2f}")
+    add_kpi_paragraph(doc, "Nubosidad media (%)", f"{k['nube_media']:,.1f}")
+    add_kpi_paragraph(doc, "Temperatura media (°C) [máx / mín]", f"{k['tmax_media']:,.1f} / {k['tmin_media']:,.1f}")
+    add_kpi_paragraph(doc, "PR simplificado medio (kWh/kWh·m²)", f"{k['pr_medio']:,.2f}")
+    doc.add_paragraph(
+        "Durante el periodo evaluado, la planta mostró una correlación positiva entre radiación y generación, "
+        "pero con un desempeño inferior al esperado por el estimado PV*SOL. Las causas técnicas más probables "
+        "incluyen alta nubosidad estacional, pérdidas térmicas por temperatura de operación y pérdidas por ensuciamiento. "
+        "Se recomienda reforzar el mantenimiento preventivo y la revisión de strings e inversores."
+    )
+
+    # 2. Radiación vs Generación
+    doc.add_heading("2. Radiación solar vs generación eléctrica", level=1)
+    doc.add_paragraph(
+        "La curva de generación sigue la tendencia de la radiación disponible. No obstante, la magnitud es menor que la "
+        "esperada por el modelo, lo que sugiere pérdidas adicionales (temperatura, suciedad, limitaciones de inversor o "
+        "sombreamientos parciales)."
+    )
+    safe_add_picture(doc, ruta_grafica("radiacion", nombre, carpeta_graficas), caption="Figura 1. Radiación vs Generación")
+
+    # 3. Nubosidad
+    doc.add_heading("3. Nubosidad diaria", level=1)
+    doc.add_paragraph(
+        "La nubosidad se mantuvo elevada (≈80–90% en promedio), con días cercanos al 100%. "
+        "Esto explica una parte importante de la caída en irradiancia y, por ende, en generación."
+    )
+    safe_add_picture(doc, ruta_grafica("nubosidad", nombre, carpeta_graficas), caption="Figura 2. Nubosidad diaria")
+
+    # 4. Precipitación
+    doc.add_heading("4. Precipitación diaria", level=1)
+    if k["tiene_lluvia"]:
+        doc.add_paragraph(
+            "Se observaron múltiples eventos de lluvia (≥10 mm/día) en junio–septiembre. "
+            "La precipitación reduce la irradiancia efectiva pero puede favorecer la limpieza de los módulos; "
+            "normalmente se observa una leve recuperación de eficiencia 1–2 días después de lluvias intensas."
+        )
+    else:
+        doc.add_paragraph(
+            "Para este informe no se encontró la columna de precipitación en el Excel unificado. "
+            "Si deseas incluirla, asegúrate de solicitar PRECTOTCORR en la API y volver a guardar el merge."
+        )
+    safe_add_picture(doc, ruta_grafica("precipitacion", nombre, carpeta_graficas), caption="Figura 3. Precipitación diaria")
+
+    # 5. Temperaturas
+    doc.add_heading("5. Temperaturas diarias", level=1)
+    doc.add_paragraph(
+        "Las temperaturas máximas se ubicaron entre 30–38 °C. Asumiendo coeficiente de temperatura del módulo "
+        "≈ -0.4 %/°C, se estiman pérdidas térmicas del 4–6 % respecto a STC. La gestión térmica y el flujo de aire en "
+        "estructura influyen en el rendimiento estacional."
+    )
+    safe_add_picture(doc, ruta_grafica("temperaturas", nombre, carpeta_graficas), caption="Figura 4. Temperaturas diarias")
+
+    # 6. Real vs Estimado (tabla)
+    doc.add_heading("6. Comparación real vs. estimado (PV*SOL)", level=1)
+    doc.add_paragraph(
+        "Se comparó la energía mensual real con el estimado PV*SOL. Los meses analizados muestran un cumplimiento "
+        "promedio entre 80–90 %, afectado por nubosidad alta y temperatura. La tabla resume el desempeño:"
+    )
+    _agregar_tabla(doc, _textos_tabla(real_mensual))
+
+    # 7. Conclusiones y recomendaciones
+    doc.add_heading("7. Conclusiones y recomendaciones", level=1)
+    doc.add_paragraph(
+        "• La planta presenta un comportamiento coherente con la radiación incidente, pero con déficit respecto a PV*SOL.\n"
+        "• Las causas principales del gap: nubosidad elevada, pérdidas térmicas y potencial ensuciamiento.\n"
+        "• Recomendaciones:\n"
+        "  1) Programa de lavado post-lluvia y previo a temporada seca.\n"
+        "  2) Revisión de strings e inspección IV Curve para descartar desbalances o hotspots.\n"
+        "  3) Verificar límites/curtailment del inversor y calidad de conexión a red.\n"
+        "  4) Implementar tablero de monitoreo (NASA + Growatt) para alertas de rendimiento."
+    )
+
+    # Guardar
+    os.makedirs(carpeta_salida, exist_ok=True)
+    nombre_docx = f"Informe_Tecnico_{nombre.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}.docx"
+    ruta_docx = os.path.join(carpeta_salida, nombre_docx)
+    doc.save(ruta_docx)
+    return ruta_docx
+
+
+def _generar_en_proceso(args: tuple) -> str:
+    df, nombre, kwargs = args
+    with etapa("informe", planta=nombre, filas=len(df)):
+        return generar_informe(df, nombre, **kwargs)
+
+
+def generar_informes_flota(
+    datos: dict,
+    pvsol_por_planta: dict | None = None,
+    carpeta_salida: str = "informes",
+    carpeta_graficas: str = "resultados",
+    ruta_plantilla: str | None = None,
+    max_procesos: int | None = None,
+) -> dict:
+    """Genera los informes de varias plantas en un pool de procesos.
+
+    `datos` es {nombre_planta: DataFrame unificado}; `pvsol_por_planta` es
+    {nombre_planta: {mes: kWh}}, p. ej.
+    `kpis.pvsol_por_planta(kpis.cargar_pvsol("pvsol.csv"))`. Una planta que no
+    está ahí queda sin estimado (cumplimiento "-"), nunca con el de otra planta.
+    Devuelve {nombre_planta: ruta_docx}.
+    """
+    pvsol_por_planta = pvsol_por_planta or {}
+    sin_pvsol = [nombre for nombre in datos if nombre not in pvsol_por_planta]
+    if sin_pvsol:
+        print(f"⚠️ Sin estimado PV*SOL (cumplimiento '-'): {', '.join(map(str, sin_pvsol))}")
+    tareas = [
+        (df, nombre, {
+            "carpeta_salida": carpeta_salida,
+            "carpeta_graficas": carpeta_graficas,
+            "pvsol": pvsol_por_planta.get(nombre, {}),
+        })
+        for nombre, df in datos.items()
+    ]
+    with ProcessPoolExecutor(
+        max_workers=max_procesos, initializer=_iniciar_proceso, initargs=(plantilla_base(ruta_plantilla),)
+    ) as pool:
+        rutas = pool.map(_generar_en_proceso, tareas)
+        return dict(zip(datos.keys(), rutas))
+
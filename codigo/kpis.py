@@ -0,0 +1,142 @@
+# ============================================================
+#  MOTOR DE KPIs PARA VARIAS PLANTAS (VECTORIZADO)
+# ============================================================
+# Trabaja sobre un DataFrame con MultiIndex (planta, Fecha) y
+# calcula todas las plantas en pasadas agrupadas, sin un ciclo
+# por planta:
+#   - PR diario simplificado (kWh / kWh·m²)
+#   - PR móvil de 7 y 30 días (suma de generación / suma de radiación)
+#   - cumplimiento mensual frente al estimado PV*SOL de cada planta
+#   - resumen del periodo por planta (equivalente a `calcular_kpis`)
+# Los estimados PV*SOL se leen de una tabla (CSV o Excel) con
+# columnas planta, Mes, Estimado_kWh.
+# ------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+VENTANAS_PR = (7, 30)
+COLUMNAS_PVSOL = ["planta", "Mes", "Estimado_kWh"]
+
+
+# ========= ESTIMADOS PV*SOL =========
+def cargar_pvsol(ruta: str) -> pd.DataFrame:
+    """Tabla de estimados PV*SOL por planta y mes (CSV o Excel).
+
+    Acepta formato largo (planta, Mes, Estimado_kWh) o ancho (planta y
+    una columna por mes 1..12).
+    """
+    tabla = pd.read_csv(ruta) if ruta.lower().endswith((".csv", ".csv.gz")) else pd.read_excel(ruta)
+    if "Estimado_kWh" not in tabla.columns:
+        tabla = tabla.melt(id_vars="planta", var_name="Mes", value_name="Estimado_kWh")
+    tabla["Mes"] = tabla["Mes"].astype(int)
+    tabla["Estimado_kWh"] = pd.to_numeric(tabla["Estimado_kWh"], errors="coerce")
+    return tabla[COLUMNAS_PVSOL]
+
+
+def pvsol_desde_dict(pvsol_por_planta: dict[str, dict]) -> pd.DataFrame:
+    """{planta: {mes: kWh}} → tabla larga de estimados."""
+    return pd.DataFrame(
+        [(planta, int(mes), kwh) for planta, meses in pvsol_por_planta.items() for mes, kwh in meses.items()],
+        columns=COLUMNAS_PVSOL,
+    )
+
+
+def pvsol_por_planta(tabla: pd.DataFrame) -> dict[str, dict]:
+    """Tabla larga → {planta: {mes: kWh}} (formato de `generar_informes_flota`)."""
+    return {
+        planta: dict(zip(grupo["Mes"], grupo["Estimado_kWh"]))
+        for planta, grupo in tabla.groupby("planta", sort=False)
+    }
+
+
+# ========= FRAME DE FLOTA =========
+def indexar_flota(df: pd.DataFrame) -> pd.DataFrame:
+    """Frame largo (columna planta + Fecha) o {planta: df} → MultiIndex (planta, Fecha) ordenado."""
+    if isinstance(df, dict):
+        df = pd.concat(df, names=["planta", None]).reset_index(level=0)
+    if not isinstance(df.index, pd.MultiIndex):
+        df = df.set_index(["planta", "Fecha"])
+    return df.sort_index()
+
+
+def _validos(df: pd.DataFrame) -> pd.DataFrame:
+    """Generación y radiación en float64, solo donde ambas sirven para un PR."""
+    gen = df["Generacion_kWh"].astype("float64")
+    rad = df["Radiacion_kWhm2"].astype("float64")
+    ok = gen.notna() & (rad > 0)
+    return pd.DataFrame({"gen": gen.where(ok), "rad": rad.where(ok)})
+
+
+# ========= KPIs =========
+def kpis_diarios(df: pd.DataFrame, ventanas=VENTANAS_PR) -> pd.DataFrame:
+    """PR diario y PR móvil por planta, con el mismo índice (planta, Fecha)."""
+    df = indexar_flota(df)
+    base = _validos(df)
+    salida = pd.DataFrame(index=df.index)
+    salida["PR"] = (base["gen"] / base["rad"]).astype(np.float32)
+
+    # Ventanas por calendario (no por filas): un hueco de días no estira la ventana
+    por_fecha = base.reset_index(level="planta")
+    for dias in ventanas:
+        sumas = por_fecha.groupby("planta", sort=True, observed=True).rolling(f"{dias}D", min_periods=1)[["gen", "rad"]].sum()
+        salida[f"PR_{dias}d"] = (sumas["gen"] / sumas["rad"]).to_numpy(dtype=np.float32)
+    return salida
+
+
+def cumplimiento_mensual(df: pd.DataFrame, pvsol: pd.DataFrame) -> pd.DataFrame:
+    """Real vs estimado PV*SOL por planta y mes (Año, Mes, Real_kWh, Estimado_kWh, Cumplimiento_%)."""
+    df = indexar_flota(df)
+    fechas = df.index.get_level_values("Fecha")
+    real = (
+        df["Generacion_kWh"].astype("float64")
+        .groupby([df.index.get_level_values("planta"), fechas.year.rename("Año"), fechas.month.rename("Mes")],
+                 observed=True)
+        .sum().rename("Real_kWh").reset_index()
+    )
+    real = real.merge(pvsol[COLUMNAS_PVSOL], on=["planta", "Mes"], how="left")
+    real["Cumplimiento_%"] = 100.0 * real["Real_kWh"] / real["Estimado_kWh"]
+    return real.set_index(["planta", "Año", "Mes"])
+
+
+def resumen_flota(df: pd.DataFrame) -> pd.DataFrame:
+    """KPIs del periodo por planta, en una sola agregación agrupada."""
+    df = indexar_flota(df)
+    base = _validos(df)
+    columnas = df[["Generacion_kWh", "Radiacion_kWhm2", "Nubosidad_%", "Temp_Max", "Temp_Min"]].astype("float64")
+    columnas["Fecha"] = df.index.get_level_values("Fecha")
+    columnas["PR"] = base["gen"] / base["rad"]
+    resumen = columnas.groupby(level="planta", observed=True).agg(
+        periodo_ini=("Fecha", "min"),
+        periodo_fin=("Fecha", "max"),
+        gen_total=("Generacion_kWh", "sum"),
+        gen_media=("Generacion_kWh", "mean"),
+        rad_media=("Radiacion_kWhm2", "mean"),
+        nube_media=("Nubosidad_%", "mean"),
+        tmax_media=("Temp_Max", "mean"),
+        tmin_media=("Temp_Min", "mean"),
+        pr_medio=("PR", "mean"),
+    )
+    return resumen
+
+
+def kpis_desde_almacen(almacen, pvsol: pd.DataFrame, plantas=None, desde=None,
+                       hasta=None) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """Como `kpis_flota`, leyendo del `AlmacenSeries` solo las columnas y fechas necesarias.
+
+    Se leen además los días previos a `desde` que necesita la ventana móvil más larga.
+    """
+    columnas = ["Generacion_kWh", "Radiacion_kWhm2", "Nubosidad_%", "Temp_Max", "Temp_Min"]
+    previo = None if desde is None else pd.Timestamp(desde) - pd.Timedelta(days=max(VENTANAS_PR) - 1)
+    df = almacen.flota(plantas, columnas, previo, hasta)
+    diarios = kpis_diarios(df)
+    if desde is not None:
+        en_rango = df.index.get_level_values("Fecha") >= pd.Timestamp(desde)
+        df, diarios = df[en_rango], diarios[en_rango]
+    return resumen_flota(df), diarios, cumplimiento_mensual(df, pvsol)
+
+
+def kpis_flota(df: pd.DataFrame, pvsol: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """(resumen por planta, KPIs diarios, cumplimiento mensual) de toda la flota."""
+    df = indexar_flota(df)
+    return resumen_flota(df), kpis_diarios(df), cumplimiento_mensual(df, pvsol)
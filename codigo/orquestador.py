@@ -0,0 +1,370 @@
+# ============================================================
+#  ORQUESTADOR DE FLOTA CON PUNTOS DE CONTROL
+# ============================================================
+# Ejecuta fetch → ingest → merge → kpis → plot → report para
+# cientos de plantas (tabla planta, lat, lon, generacion):
+#   - fetch (red) corre en un pool de hilos con un solo ClienteNasa,
+#     una vez por celda de NASA POWER y periodo, con las coordenadas
+#     de la primera planta de la celda en la tabla: las demás
+#     comparten la descarga y el intermedio de clima. El resto (CPU)
+#     va a un pool de procesos. Cada etapa se envía en cuanto sus
+#     dependencias terminan, así la descarga de unas plantas se
+#     solapa con el cálculo de otras.
+#   - Cada (planta, etapa) guarda en SQLite su estado, una huella
+#     de sus entradas y las rutas que produjo. Al volver a ejecutar
+#     solo corren las etapas con error, sin salidas en disco o cuya
+#     huella cambió (parámetros, export del inversor, tabla PV*SOL
+#     o la huella de una etapa anterior).
+#   - merge incluye la revisión de calidad (codigo/calidad.py) y
+#     deja un <planta>_Calidad.csv junto al Excel unificado.
+#   - Un error en una planta no detiene al resto: sus etapas
+#     siguientes quedan bloqueadas y se reintentan en la próxima.
+# Los datos pasan entre etapas por los intermedios de cache/etapas.
+# ------------------------------------------------------------
+
+import hashlib
+import json
+import multiprocessing
+import os
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import date
+
+import pandas as pd
+
+from .pipeline import CARPETA_ETAPAS, PLANTA_POR_DEFECTO, guardar_intermedio, leer_intermedio
+
+# etapa → (pool, dependencias); el orden del dict es un orden topológico válido
+ETAPAS = {
+    "fetch": ("red", []),
+    "ingest": ("cpu", []),
+    "merge": ("cpu", ["fetch", "ingest"]),
+    "kpis": ("cpu", ["merge"]),
+    "plot": ("cpu", ["merge"]),
+    "report": ("cpu", ["kpis", "plot"]),
+}
+COLUMNAS_PLANTAS = ["planta", "lat", "lon", "generacion"]
+OPCIONES_POR_DEFECTO = {
+    "etapas": CARPETA_ETAPAS,
+    "resultados": "resultados",
+    "informes": "informes",
+    "formato": "xlsx",
+    "streaming": False,
+    "pvsol": None,
+    "max_hueco": 0,
+    "relleno": "lineal",
+    "corregir": False,
+}
+# Cambiarla invalida todos los puntos de control guardados
+VERSION_HUELLA = 7
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS puntos_control (
+    planta   TEXT NOT NULL,
+    etapa    TEXT NOT NULL,
+    estado   TEXT NOT NULL,          -- ok | error
+    huella   TEXT NOT NULL,
+    salidas  TEXT NOT NULL,          -- JSON con las rutas producidas
+    error    TEXT,
+    duracion REAL,
+    fecha    REAL NOT NULL,
+    PRIMARY KEY (planta, etapa)
+);
+"""
+
+
+# ========= PLANTAS =========
+def cargar_plantas(ruta: str) -> pd.DataFrame:
+    """Tabla de plantas (CSV o Excel): planta, lat, lon, generacion y opcionalmente titulo, inicio, fin."""
+    tabla = pd.read_csv(ruta) if ruta.lower().endswith((".csv", ".csv.gz")) else pd.read_excel(ruta)
+    faltan = [c for c in COLUMNAS_PLANTAS if c not in tabla.columns]
+    if faltan:
+        raise ValueError(f"La tabla de plantas {ruta} no tiene las columnas {faltan}")
+    if tabla["planta"].duplicated().any():
+        raise ValueError(f"Plantas repetidas en {ruta}: {sorted(tabla.loc[tabla['planta'].duplicated(), 'planta'])}")
+    return tabla
+
+
+def _sitio(fila: dict) -> dict:
+    """Fila de la tabla → configuración completa de la planta."""
+    sitio = {k: v for k, v in fila.items() if not pd.isna(v)}
+    sitio["planta"] = str(sitio["planta"])
+    sitio.setdefault("titulo", sitio["planta"])
+    sitio.setdefault("inicio", PLANTA_POR_DEFECTO["inicio"])
+    sitio.setdefault("fin", date.today().strftime("%Y%m%d"))
+    for clave in ("inicio", "fin"):
+        sitio[clave] = str(sitio[clave]).split(".")[0]  # 20230501.0 → "20230501" (columnas numéricas)
+    return sitio
+
+
+# ========= PUNTOS DE CONTROL =========
+class PuntosControl:
+    """Estado por (planta, etapa) en SQLite; solo lo escribe el proceso orquestador."""
+
+    def __init__(self, ruta: str = "cache/orquestador.sqlite"):
+        self.ruta = ruta
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        with self._conectar() as con:
+            con.executescript(_ESQUEMA)
+
+    def _conectar(self):
+        return sqlite3.connect(self.ruta, timeout=30)
+
+    def leer(self) -> dict[tuple[str, str], dict]:
+        with self._conectar() as con:
+            con.row_factory = sqlite3.Row
+            return {(f["planta"], f["etapa"]): dict(f) for f in con.execute("SELECT * FROM puntos_control")}
+
+    def registrar(self, planta: str, etapa: str, estado: str, huella: str, salidas=(), error=None,
+                  duracion=None):
+        with self._conectar() as con:
+            con.execute(
+                "INSERT OR REPLACE INTO puntos_control VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (planta, etapa, estado, huella, json.dumps(list(salidas)), error, duracion, time.time()),
+            )
+
+    def como_tabla(self) -> pd.DataFrame:
+        with self._conectar() as con:
+            return pd.read_sql_query("SELECT * FROM puntos_control ORDER BY planta, etapa", con)
+
+
+def clave_clima(sitio: dict) -> str:
+    """Nombre del intermedio de clima: celda de NASA POWER y periodo (compartido entre plantas)."""
+    from .cache_nasa import celda_nasa
+
+    celda = celda_nasa(sitio["lat"], sitio["lon"]).replace(",", "_").replace("|", "_")
+    return f"celda_{celda}_{sitio['inicio']}_{sitio['fin']}"
+
+
+def _firma_archivo(ruta) -> tuple | None:
+    """(ruta, mtime, tamaño): cambia si el archivo se modifica."""
+    if not ruta or not os.path.exists(ruta):
+        return None
+    st = os.stat(ruta)
+    return (os.path.abspath(ruta), st.st_mtime_ns, st.st_size)
+
+
+def _entradas(etapa: str, sitio: dict, op: dict) -> tuple:
+    """Lo que determina el resultado de la etapa, además de las huellas anteriores."""
+    if etapa == "fetch":
+        return clave_clima(sitio),
+    if etapa == "ingest":
+        return _firma_archivo(sitio["generacion"]) or sitio["generacion"], op["streaming"]
+    if etapa == "merge":
+        return op["resultados"], op["formato"], op["max_hueco"], op["relleno"], op["corregir"]
+    if etapa == "kpis":
+        return _firma_archivo(op["pvsol"]),
+    if etapa == "plot":
+        return op["resultados"],
+    return sitio["titulo"], op["informes"], _firma_archivo(op["pvsol"])
+
+
+def huellas_planta(sitio: dict, op: dict) -> dict[str, str]:
+    """Huella de cada etapa: sus entradas + las huellas de las etapas de las que depende."""
+    huellas = {}
+    for etapa, (_, deps) in ETAPAS.items():
+        clave = (VERSION_HUELLA, etapa, _entradas(etapa, sitio, op), [huellas[d] for d in deps])
+        huellas[etapa] = hashlib.sha1(repr(clave).encode()).hexdigest()
+    return huellas
+
+
+def _vigente(previo: dict | None, huella: str) -> bool:
+    return (
+        previo is not None
+        and previo["estado"] == "ok"
+        and previo["huella"] == huella
+        and all(os.path.exists(r) for r in json.loads(previo["salidas"]))
+    )
+
+
+# ========= ETAPAS (se ejecutan en los pools) =========
+def estimados_pvsol(nombres, ruta_pvsol) -> dict[str, dict]:
+    """{planta: {mes: kWh}} de la tabla PV*SOL, leída una sola vez por ejecución.
+
+    Una planta que no está en la tabla queda sin estimado ({}: cumplimiento
+    NaN, "-" en el informe), nunca con el de otra planta. Sin tabla, solo la
+    planta por defecto usa su estimado conocido.
+    """
+    if not ruta_pvsol:
+        from .informe import PVSOL_CABEZA_Y_COLA
+
+        return {n: PVSOL_CABEZA_Y_COLA if n == PLANTA_POR_DEFECTO["nombre"] else {} for n in nombres}
+    from .kpis import cargar_pvsol, pvsol_por_planta
+
+    tabla = pvsol_por_planta(cargar_pvsol(ruta_pvsol))
+    return {n: tabla.get(n, {}) for n in nombres}
+
+
+def _fetch(sitio, op, descargar=None):
+    from .pipeline import descargar_clima
+
+    clave = clave_clima(sitio)
+    df_clima = descargar_clima(sitio["lat"], sitio["lon"], sitio["inicio"], sitio["fin"], nombre=clave,
+                               descargar=descargar)
+    return [guardar_intermedio(df_clima, clave, "clima", op["etapas"])]
+
+
+def _ingest(sitio, op):
+    from .pipeline import cargar_generacion
+
+    nombre = sitio["planta"]
+    df_gen = cargar_generacion(sitio["generacion"], nombre=nombre, streaming=op["streaming"])
+    return [guardar_intermedio(df_gen, nombre, "generacion", op["etapas"])]
+
+
+def _merge(sitio, op):
+    from .pipeline import guardar_resultado, guardar_series, revisar_calidad, ruta_calidad, ruta_salida, unir
+
+    nombre = sitio["planta"]
+    df_union = unir(leer_intermedio(nombre, "generacion", op["etapas"]),
+                    leer_intermedio(clave_clima(sitio), "clima", op["etapas"]), nombre=nombre)
+    if df_union.empty:
+        raise ValueError("Clima y generación no tienen fechas en común")
+    # Como en el CLI: el almacén memory-map guarda lo medido y las correcciones (si se piden) solo van a las salidas
+    guardar_series(df_union, nombre)
+    df_union, _ = revisar_calidad(df_union, nombre, op["resultados"], op["max_hueco"], op["relleno"],
+                                  op["corregir"])
+    return [
+        ruta_calidad(nombre, op["resultados"]),
+        guardar_intermedio(df_union, nombre, "union", op["etapas"]),
+        guardar_resultado(df_union, ruta_salida(nombre, op["resultados"], op["formato"]), op["formato"]),
+    ]
+
+
+def _kpis(sitio, op):
+    from .kpis import kpis_flota, pvsol_desde_dict
+    from .perfilado import etapa
+
+    nombre = sitio["planta"]
+    df_union = leer_intermedio(nombre, "union", op["etapas"])
+    with etapa("kpis", planta=nombre, filas=len(df_union)):
+        resumen, diarios, mensual = kpis_flota(df_union.assign(planta=nombre),
+                                               pvsol_desde_dict({nombre: sitio["estimado_pvsol"]}))
+    return [
+        guardar_intermedio(resumen, nombre, "kpis", op["etapas"]),
+        guardar_intermedio(diarios, nombre, "kpis_diarios", op["etapas"]),
+        guardar_intermedio(mensual, nombre, "cumplimiento", op["etapas"]),
+    ]
+
+
+def _plot(sitio, op):
+    from .pipeline import graficar
+
+    nombre = sitio["planta"]
+    # Ya estamos en un proceso del pool: sin pool anidado
+    return graficar(leer_intermedio(nombre, "union", op["etapas"]), nombre, op["resultados"], max_procesos=1)
+
+
+def _report(sitio, op):
+    from .pipeline import informar
+
+    nombre = sitio["planta"]
+    real_mensual = leer_intermedio(nombre, "cumplimiento", op["etapas"]).reset_index()
+    ruta = informar(leer_intermedio(nombre, "union", op["etapas"]), nombre, sitio["titulo"], op["informes"],
+                    op["resultados"], real_mensual[["Año", "Mes", "Real_kWh"]], pvsol=sitio["estimado_pvsol"])
+    return [ruta]
+
+
+ACCIONES = {"fetch": _fetch, "ingest": _ingest, "merge": _merge, "kpis": _kpis, "plot": _plot, "report": _report}
+
+
+def _ejecutar(etapa: str, sitio: dict, op: dict, *extra) -> list[str]:
+    return ACCIONES[etapa](sitio, op, *extra)
+
+
+# ========= ORQUESTACIÓN =========
+def ejecutar_flota(plantas: pd.DataFrame, opciones: dict | None = None, procesos: int | None = None,
+                   hilos: int = 8, forzar: bool = False, puntos: PuntosControl | None = None,
+                   progreso=None) -> pd.DataFrame:
+    """Ejecuta (o reanuda) todas las etapas de todas las plantas de la tabla.
+
+    `progreso(planta, etapa, estado, duracion, error)` se llama al terminar cada
+    etapa enviada. Devuelve una fila por (planta, etapa) con estado ok, vigente
+    (no hizo falta ejecutarla), error o bloqueado, su duración y el error.
+    """
+    from .flota_nasa import ClienteNasa
+
+    op = {**OPCIONES_POR_DEFECTO, **(opciones or {})}
+    puntos = puntos or PuntosControl()
+    previos = puntos.leer()
+    sitios = [_sitio(f) for f in plantas.to_dict("records")]
+    # Cada proceso recibe solo el estimado de su planta, no la tabla entera
+    estimados = estimados_pvsol([s["planta"] for s in sitios], op["pvsol"])
+    for sitio in sitios:
+        sitio["estimado_pvsol"] = estimados[sitio["planta"]]
+    huellas = {s["planta"]: huellas_planta(s, op) for s in sitios}
+    estado, detalle = {}, {}
+    # futuro → [(sitio, etapa, inicio)]: un fetch por celda puede servir a varias plantas
+    en_curso, descargas = {}, {}
+    # Punto consultado por celda: la primera planta de la tabla que cae en ella
+    representantes = {}
+    for sitio in sitios:
+        representantes.setdefault(clave_clima(sitio), sitio)
+
+    cliente = ClienteNasa(max_conexiones=hilos)
+    # spawn: los procesos no heredan los hilos ni la sesión HTTP del pool de red
+    contexto = multiprocessing.get_context("spawn")
+    with ThreadPoolExecutor(max_workers=hilos) as red, \
+            ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as cpu:
+
+        def avanzar(sitio):
+            """Envía (o da por vigentes) las etapas de la planta cuyas dependencias ya terminaron."""
+            planta = sitio["planta"]
+            for nombre_etapa, (pool, deps) in ETAPAS.items():
+                clave = (planta, nombre_etapa)
+                if clave in estado:
+                    continue
+                previas = [estado.get((planta, d)) for d in deps]
+                if any(p in ("error", "bloqueado") for p in previas):
+                    estado[clave] = "bloqueado"
+                    continue
+                if not all(p in ("ok", "vigente") for p in previas):
+                    continue
+                if not forzar and _vigente(previos.get(clave), huellas[planta][nombre_etapa]):
+                    estado[clave] = "vigente"
+                    continue
+                if pool == "red":
+                    celda = clave_clima(sitio)
+                    if celda not in descargas:
+                        descargas[celda] = red.submit(_ejecutar, nombre_etapa, representantes[celda], op,
+                                                      cliente.descargar)
+                    futuro = descargas[celda]
+                else:
+                    futuro = cpu.submit(_ejecutar, nombre_etapa, sitio, op)
+                en_curso.setdefault(futuro, []).append((sitio, nombre_etapa, time.perf_counter()))
+                estado[clave] = "enviado"
+
+        try:
+            for sitio in sitios:
+                avanzar(sitio)
+            while en_curso:
+                hechos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+                for futuro in hechos:
+                    try:
+                        salidas, error = futuro.result(), None
+                    except Exception as e:
+                        salidas, error = [], f"{type(e).__name__}: {e}"
+                    resultado = "error" if error else "ok"
+                    for sitio, nombre_etapa, t0 in en_curso.pop(futuro):
+                        planta = sitio["planta"]
+                        duracion = time.perf_counter() - t0
+                        estado[(planta, nombre_etapa)] = resultado
+                        detalle[(planta, nombre_etapa)] = (duracion, error)
+                        puntos.registrar(planta, nombre_etapa, resultado, huellas[planta][nombre_etapa],
+                                         salidas, error, duracion)
+                        if progreso:
+                            progreso(planta, nombre_etapa, resultado, duracion, error)
+                        avanzar(sitio)
+        finally:
+            cliente.cerrar()
+
+    filas = [
+        (s["planta"], e, estado.get((s["planta"], e), "bloqueado"), *detalle.get((s["planta"], e), (None, None)))
+        for s in sitios for e in ETAPAS
+    ]
+    return pd.DataFrame(filas, columns=["planta", "etapa", "estado", "duracion_s", "error"]).set_index(
+        ["planta", "etapa"])
+
@@ -0,0 +1,153 @@
+# ============================================================
+#  INSTRUMENTACIÓN POR ETAPA (TIEMPO, CPU, MEMORIA, FILAS)
+# ============================================================
+# Se activa con `--profile` o con la variable de entorno
+# CLIMA_GEN_PROFILE=1. Cada etapa escribe una línea JSON en
+# CLIMA_GEN_PROFILE_SALIDA (por defecto trazas/perfil.jsonl):
+#
+#   {"ejecucion": ..., "etapa": "merge", "planta": "Cabeza y Cola",
+#    "wall_s": 0.01, "cpu_s": 0.01, "rss_max_mb": 180.2, "filas": 174, ...}
+#
+# Con CLIMA_GEN_PROFILE_MEMORIA=tracemalloc se agrega el pico de
+# tracemalloc de cada etapa (más preciso pero más lento).
+# Desactivado, `etapa()` devuelve un contexto vacío compartido.
+# ------------------------------------------------------------
+
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+
+VAR_ACTIVO = "CLIMA_GEN_PROFILE"
+VAR_SALIDA = "CLIMA_GEN_PROFILE_SALIDA"
+VAR_MEMORIA = "CLIMA_GEN_PROFILE_MEMORIA"
+VAR_EJECUCION = "CLIMA_GEN_PROFILE_EJECUCION"
+SALIDA_POR_DEFECTO = "trazas/perfil.jsonl"
+
+_lock = threading.Lock()
+_archivo = None
+
+
+def activo() -> bool:
+    return os.environ.get(VAR_ACTIVO, "") not in ("", "0")
+
+
+def activar(salida: str | None = None, memoria: str | None = None):
+    """Activa el perfilado para este proceso y los procesos hijos (vía entorno)."""
+    os.environ[VAR_ACTIVO] = "1"
+    os.environ.setdefault(VAR_EJECUCION, uuid.uuid4().hex[:12])
+    if salida:
+        os.environ[VAR_SALIDA] = salida
+    if memoria:
+        os.environ[VAR_MEMORIA] = memoria
+
+
+def activar_si_se_pide(argv=None) -> bool:
+    """Activa el perfilado si `--profile` está en la línea de comandos o en el entorno."""
+    argv = sys.argv if argv is None else argv
+    if "--profile" in argv or activo():
+        activar()
+        return True
+    return False
+
+
+def _rss_max_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KiB; macOS reporta bytes
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _escribir(registro: dict):
+    global _archivo
+    with _lock:
+        if _archivo is None:
+            ruta = os.environ.get(VAR_SALIDA, SALIDA_POR_DEFECTO)
+            carpeta = os.path.dirname(ruta)
+            if carpeta:
+                os.makedirs(carpeta, exist_ok=True)
+            _archivo = open(ruta, "a", encoding="utf-8")
+        _archivo.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+        _archivo.flush()
+
+
+class _EtapaNula:
+    """Contexto vacío compartido: ignora `filas` y cualquier otro atributo."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        return False
+
+    def __setattr__(self, nombre, valor):
+        pass
+
+
+_NULO = _EtapaNula()
+
+
+class _Etapa:
+    """Contexto que mide una etapa; `filas` y `extra` se pueden fijar dentro."""
+
+    def __init__(self, nombre: str, planta=None, filas=None, **extra):
+        self.nombre = nombre
+        self.planta = planta
+        self.filas = filas
+        self.extra = extra
+        self._tracemalloc = os.environ.get(VAR_MEMORIA) == "tracemalloc"
+
+    def __enter__(self):
+        if self._tracemalloc:
+            import tracemalloc
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        self._inicio = datetime.now()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        registro = {
+            "ejecucion": os.environ.setdefault(VAR_EJECUCION, uuid.uuid4().hex[:12]),
+            "pid": os.getpid(),
+            "etapa": self.nombre,
+            "planta": self.planta,
+            "inicio": self._inicio.isoformat(timespec="milliseconds"),
+            "wall_s": round(time.perf_counter() - self._wall, 6),
+            "cpu_s": round(time.process_time() - self._cpu, 6),
+            "rss_max_mb": _rss_max_mb(),
+            "filas": self.filas,
+            "ok": tipo is None,
+        }
+        if self._tracemalloc:
+            import tracemalloc
+
+            registro["tracemalloc_pico_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 3)
+        if tipo is not None:
+            registro["error"] = f"{tipo.__name__}: {valor}"
+        registro.update(self.extra)
+        _escribir(registro)
+        return False
+
+
+def etapa(nombre: str, planta=None, filas=None, **extra):
+    """`with etapa("merge", planta=p) as e: ...; e.filas = len(df)`.
+
+    Si el perfilado está apagado devuelve un contexto nulo compartido
+    (fijar `e.filas` no hace nada), por lo que el costo es despreciable.
+    """
+    if not activo():
+        return _NULO
+    return _Etapa(nombre, planta, filas, **extra)
+
@@ -0,0 +1,286 @@
+# ============================================================
+#  ETAPAS DEL ANÁLISIS DE PLANTA SOLAR
+# ============================================================
+# Cada etapa de la versión original de main.py como función:
+#   1️⃣ descargar_clima   → NASA POWER (con caché local)
+#   2️⃣ cargar_generacion → Excel del inversor, consolidado por día
+#   3️⃣ unir             → merge clima + generación
+#      revisar_calidad  → reglas, días faltantes y relleno de huecos cortos
+#   4️⃣ graficar         → PNG sin pantalla en resultados/
+#   5️⃣ guardar_resultado → Excel unificado (o parquet / csv.gz)
+#   6️⃣ informar         → informe Word
+# `unir_incremental` reemplaza 1️⃣–3️⃣ cuando solo se procesan los
+# días nuevos contra el almacén persistente (codigo/almacen_union.py),
+# y `guardar_meses` reemplaza 5️⃣: solo reescribe los meses tocados.
+# Las dependencias pesadas (matplotlib, python-docx) se importan
+# solo dentro de la etapa que las usa.
+# ------------------------------------------------------------
+
+import glob
+import os
+
+import pandas as pd
+
+from .esquema import RENOMBRE_CLIMA
+from .perfilado import etapa
+
+# Configuración de la planta analizada por defecto
+PLANTA_POR_DEFECTO = {
+    "nombre": "Cabeza y Cola",
+    "titulo": "SUPERMERCADO CABEZA Y COLA",
+    "lat": 8.7563,
+    "lon": -75.8886,
+    "utc_offset": -5,
+    "inicio": "20230501",
+    "fin": None,  # hasta hoy
+    "generacion": "datos/SUPERMERCADO_CABEZA_Y_COLA_01052025-21102025.xlsx",
+}
+
+CARPETA_ETAPAS = "cache/etapas"
+RUTA_ALMACEN = "cache/union.sqlite"
+CARPETA_SERIES = "cache/series"
+
+
+def ruta_salida(nombre: str, carpeta: str = "resultados", formato: str = "xlsx") -> str:
+    return os.path.join(carpeta, f"{nombre.replace(' ', '_')}_Clima_Generacion.{formato}")
+
+
+# ========= PERSISTENCIA ENTRE SUBCOMANDOS =========
+def ruta_intermedio(nombre: str, paso: str, carpeta: str = CARPETA_ETAPAS) -> str:
+    return os.path.join(carpeta, f"{nombre.replace(' ', '_')}_{paso}.pkl")
+
+
+def ruta_meses(nombre: str, carpeta: str = "resultados") -> str:
+    """Carpeta del resultado incremental: un archivo por mes (AAAA-MM.<formato>)."""
+    return os.path.join(carpeta, f"{nombre.replace(' ', '_')}_Clima_Generacion")
+
+
+def guardar_intermedio(df: pd.DataFrame, nombre: str, paso: str, carpeta: str = CARPETA_ETAPAS) -> str:
+    """Guarda el resultado de una etapa (pickle conserva float32 y categóricas)."""
+    ruta = ruta_intermedio(nombre, paso, carpeta)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    df.to_pickle(ruta)
+    return ruta
+
+
+def carpeta_meses_intermedio(nombre: str, carpeta: str = CARPETA_ETAPAS) -> str:
+    return os.path.join(carpeta, f"{nombre.replace(' ', '_')}_union_mensual")
+
+
+def leer_meses(nombre: str, carpeta: str = CARPETA_ETAPAS) -> pd.DataFrame:
+    """`df_union` revisado de la planta armado con los meses guardados por `guardar_meses`."""
+    rutas = sorted(glob.glob(os.path.join(carpeta_meses_intermedio(nombre, carpeta), "*.pkl")))
+    if not rutas:
+        raise FileNotFoundError(f"❌ No hay meses guardados de {nombre}. Ejecuta antes 'merge --incremental'.")
+    return pd.concat([pd.read_pickle(r) for r in rutas], ignore_index=True)
+
+
+def leer_intermedio(nombre: str, paso: str, carpeta: str = CARPETA_ETAPAS) -> pd.DataFrame:
+    ruta = ruta_intermedio(nombre, paso, carpeta)
+    if not os.path.exists(ruta):
+        raise FileNotFoundError(f"❌ No se encontró {ruta}. Ejecuta antes la etapa '{paso}'.")
+    return pd.read_pickle(ruta)
+
+
+# ========= ETAPAS =========
+def descargar_clima(lat, lon, inicio, fin, nombre=None, ruta_cache="cache/nasa_power.sqlite",
+                    descargar=None) -> pd.DataFrame:
+    """1️⃣ Clima diario de NASA POWER, renombrado y con el esquema aplicado.
+
+    `descargar` permite usar un cliente compartido (p. ej. `ClienteNasa().descargar`).
+    """
+    from .cache_nasa import PARAMETROS_NASA, CacheNasa
+    from .esquema import aplicar_esquema
+
+    with etapa("nasa", planta=nombre) as e:
+        df = CacheNasa(ruta_cache).obtener(lat, lon, parametros=PARAMETROS_NASA, inicio=inicio, fin=fin,
+                                           descargar=descargar)
+        df_clima = df.rename(columns=RENOMBRE_CLIMA).rename_axis("Fecha").reset_index()
+        # Tipos compactos (float32) y -999/-9999 → NaN, una sola vez
+        aplicar_esquema(df_clima)
+        e.filas = len(df_clima)
+    return df_clima
+
+
+def cargar_generacion(ruta_gen: str, nombre=None, streaming: bool = False, desde=None) -> pd.DataFrame:
+    """2️⃣ Generación diaria (kWh) desde el export del inversor (opcionalmente desde una fecha)."""
+    from .esquema import aplicar_esquema
+    from .generacion import consolidar_diario, consolidar_diario_por_bloques
+
+    with etapa("ingesta", planta=nombre) as e:
+        if streaming:
+            # Exports de varios años en alta resolución: lectura por bloques con memoria acotada
+            df_gen = consolidar_diario_por_bloques(ruta_gen, desde=desde)
+        else:
+            from .cache_excel import leer_generacion_cacheada
+
+            # Lectura + limpieza (fechas, Wh → kWh); se reutiliza la caché Arrow si el Excel no cambió
+            df_gen = leer_generacion_cacheada(ruta_gen)
+            descartes = df_gen.attrs.get("descartes", {})
+            if desde is not None:
+                df_gen = df_gen[df_gen["Fecha"] >= pd.Timestamp(desde)]
+            df_gen = consolidar_diario(df_gen)
+            df_gen.attrs["descartes"] = descartes
+        aplicar_esquema(df_gen)
+        e.filas = len(df_gen)
+    return df_gen
+
+
+def unir(df_gen: pd.DataFrame, df_clima: pd.DataFrame, nombre=None) -> pd.DataFrame:
+    """3️⃣ Une clima y generación por fecha.
+
+    Los días que el merge descarta (solo generación, o solo clima dentro del
+    periodo con generación) se suman a `attrs["descartes"]` de la ingesta.
+    """
+    from .esquema import validar_columnas
+
+    with etapa("merge", planta=nombre) as e:
+        df_union = pd.merge(df_gen, df_clima, on="Fecha", how="inner").sort_values("Fecha").reset_index(drop=True)
+        validar_columnas(df_union, origen="df_union")
+        fechas_gen, fechas_clima = pd.DatetimeIndex(df_gen["Fecha"]), pd.DatetimeIndex(df_clima["Fecha"])
+        en_periodo = fechas_clima[(fechas_clima >= fechas_gen.min()) & (fechas_clima <= fechas_gen.max())]
+        df_union.attrs["descartes"] = {
+            **df_gen.attrs.get("descartes", {}),
+            "solo_generacion": len(fechas_gen.difference(fechas_clima)),
+            "solo_clima": len(en_periodo.difference(fechas_gen)),
+        }
+        e.filas = len(df_union)
+    return df_union
+
+
+def ruta_calidad(nombre: str, carpeta: str = "resultados") -> str:
+    return os.path.join(carpeta, f"{nombre.replace(' ', '_')}_Calidad.csv")
+
+
+def revisar_calidad(df_union: pd.DataFrame, nombre: str, carpeta: str = "resultados", max_hueco: int | None = None,
+                    metodo: str = "lineal", corregir: bool = False) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Reporte de calidad (CSV en `carpeta`) y, si se pide, los datos corregidos.
+
+    Por defecto `df_union` se devuelve tal cual: las reglas, los días
+    faltantes y los valores fuera de rango solo van al reporte. Con
+    `corregir` los valores fuera de rango pasan a NaN y se completa el
+    calendario; con `max_hueco > 0` se completa el calendario y se
+    rellenan los huecos cortos (columna `Rellenado`).
+    """
+    from .calidad import MAX_HUECO, revisar_flota
+
+    max_hueco = MAX_HUECO if max_hueco is None else max_hueco
+    with etapa("calidad", planta=nombre, filas=len(df_union)) as e:
+        revisado, reporte = revisar_flota(
+            df_union.assign(planta=nombre),
+            max_hueco=max_hueco,
+            metodo=metodo,
+            enmascarar=corregir,
+            descartes={nombre: df_union.attrs.get("descartes", {})},
+        )
+        if corregir or max_hueco > 0:
+            revisado = revisado.reset_index().drop(columns="planta")
+            revisado.attrs = dict(df_union.attrs)
+        else:
+            revisado = df_union
+        e.filas = len(revisado)
+    os.makedirs(carpeta, exist_ok=True)
+    reporte.to_csv(ruta_calidad(nombre, carpeta))
+    return revisado, reporte
+
+
+def unir_incremental(nombre, lat, lon, inicio, fin, ruta_gen, streaming: bool = False,
+                     ruta_almacen: str = RUTA_ALMACEN,
+                     dias_provisionales: int | None = None) -> tuple[pd.DataFrame, list[tuple[int, int]]]:
+    """1️⃣–3️⃣ Solo para los días posteriores a la última fecha guardada.
+
+    Devuelve las filas nuevas unidas y los meses (año, mes) recalculados.
+    Los días con generación pero aún sin clima quedan fuera del merge y se
+    reintentan en la siguiente ejecución; los guardados con clima vacío
+    (-999 de NASA) en los últimos `dias_provisionales` días también.
+    """
+    from .almacen_union import AlmacenUnion
+    from .cache_nasa import DIAS_PROVISIONALES
+
+    almacen = AlmacenUnion(ruta_almacen)
+    ultima = almacen.ultima_fecha(nombre)
+    if ultima is None:
+        desde = inicio
+    else:
+        dias = DIAS_PROVISIONALES if dias_provisionales is None else dias_provisionales
+        pendiente = almacen.primera_sin_clima(nombre, desde=ultima - pd.Timedelta(days=dias))
+        desde = min(ultima, pendiente if pendiente is not None else ultima).strftime("%Y%m%d")
+
+    df_clima = descargar_clima(lat, lon, desde, fin, nombre=nombre)
+    df_gen = cargar_generacion(ruta_gen, nombre=nombre, streaming=streaming, desde=pd.Timestamp(desde))
+    df_nuevo = unir(df_gen, df_clima, nombre=nombre)
+    with etapa("almacen", planta=nombre, filas=len(df_nuevo)):
+        meses = almacen.agregar(nombre, df_nuevo)
+    return df_nuevo, meses
+
+
+def guardar_series(df_union: pd.DataFrame, nombre: str, carpeta: str = CARPETA_SERIES):
+    """Agrega las filas unidas al almacén memory-map (consultas por rango en la API y los KPIs)."""
+    from .almacen_mmap import AlmacenSeries
+
+    almacen = AlmacenSeries(carpeta)
+    indice = almacen.indice(nombre)
+    if indice is not None:
+        # Almacén solo de agregado: lo anterior a su inicio no se puede insertar
+        anteriores = df_union["Fecha"] < pd.Timestamp(indice["inicio"])
+        if anteriores.any():
+            print(f"⚠️ {anteriores.sum()} días anteriores a {indice['inicio'][:10]} no se agregan a {carpeta}")
+            df_union = df_union[~anteriores]
+    with etapa("guardar_series", planta=nombre, filas=len(df_union)):
+        almacen.agregar(nombre, df_union)
+
+
+def graficar(df_union: pd.DataFrame, nombre: str, carpeta: str = "resultados",
+             max_procesos: int | None = None) -> list[str]:
+    """4️⃣ Gráficas sin pantalla (Agg) en paralelo (`max_procesos=1`: en este proceso)."""
+    from .graficas import renderizar_graficas
+
+    with etapa("graficas", planta=nombre, filas=len(df_union)):
+        return renderizar_graficas(df_union, nombre=nombre, carpeta=carpeta, max_procesos=max_procesos)
+
+
+def guardar_meses(df_union: pd.DataFrame, nombre: str, meses, carpeta: str = "resultados",
+                  formato: str = "xlsx", carpeta_etapas: str = CARPETA_ETAPAS) -> list[str]:
+    """5️⃣ (incremental) Reescribe solo los meses (año, mes) de `meses`: archivo de salida e intermedio."""
+    from .escritores import exportar
+
+    intermedio = carpeta_meses_intermedio(nombre, carpeta_etapas)
+    os.makedirs(intermedio, exist_ok=True)
+    fechas = df_union["Fecha"]
+    rutas = []
+    with etapa("guardar_meses", planta=nombre, filas=len(df_union), formato=formato):
+        for anio, mes in meses:
+            df_mes = df_union[(fechas.dt.year == anio) & (fechas.dt.month == mes)].reset_index(drop=True)
+            clave = f"{anio:04d}-{mes:02d}"
+            df_mes.to_pickle(os.path.join(intermedio, f"{clave}.pkl"))
+            rutas.append(exportar(df_mes, os.path.join(ruta_meses(nombre, carpeta), f"{clave}.{formato}"), formato))
+    return rutas
+
+
+def guardar_resultado(df_union: pd.DataFrame, ruta: str, formato: str | None = None) -> str:
+    """5️⃣ Excel unificado (mismas columnas que `to_excel`), o parquet / csv.gz por bloques."""
+    from .escritores import exportar
+
+    with etapa("guardar_resultado", filas=len(df_union), formato=formato):
+        return exportar(df_union, ruta, formato)
+
+
+def informar(df_union: pd.DataFrame, nombre: str, titulo: str | None = None,
+             carpeta_salida: str = "informes", carpeta_graficas: str = "resultados",
+             real_mensual: pd.DataFrame | None = None, ruta_pvsol: str | None = None,
+             pvsol: dict | None = None) -> str:
+    """6️⃣ Informe Word (estimado PV*SOL de `pvsol` o de la tabla `ruta_pvsol` si se indica)."""
+    from .informe import PVSOL_CABEZA_Y_COLA, generar_informe
+
+    if pvsol is None and ruta_pvsol:
+        from .kpis import cargar_pvsol, pvsol_por_planta
+
+        estimados = pvsol_por_planta(cargar_pvsol(ruta_pvsol))
+        if nombre not in estimados:
+            raise ValueError(f"La planta '{nombre}' no está en la tabla PV*SOL {ruta_pvsol}")
+        pvsol = estimados[nombre]
+    pvsol = pvsol if pvsol is not None else PVSOL_CABEZA_Y_COLA
+
+    with etapa("informe", planta=nombre, filas=len(df_union)):
+        return generar_informe(df_union, nombre=nombre, titulo=titulo, carpeta_salida=carpeta_salida,
+                               carpeta_graficas=carpeta_graficas, pvsol=pvsol, real_mensual=real_mensual)
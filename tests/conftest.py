@@ -0,0 +1,97 @@
+# ============================================================
+#  FIXTURES COMUNES: SERVIDOR NASA POWER LOCAL
+# ============================================================
+# Servidor HTTP en un hilo que responde como NASA POWER
+# daily/point con el clima sintético de benchmarks/sintetico.py.
+# Así las pruebas corren sin red y se puede contar cuántas
+# peticiones hizo el pipeline.
+# ------------------------------------------------------------
+
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "benchmarks"))
+sys.path.insert(0, os.path.join(RAIZ, "API"))
+
+import sintetico  # noqa: E402
+
+# Clima disponible en el servidor; fuera de este rango responde 400 como NASA
+INICIO_CLIMA = "2024-01-01"
+ANIOS_CLIMA = 2
+
+
+class ServidorNasa:
+    """Stand-in de NASA POWER: `url` para `ClienteNasa` y registro de peticiones."""
+
+    def __init__(self):
+        self.clima = sintetico.clima_diario(INICIO_CLIMA, ANIOS_CLIMA)
+        self.peticiones = []
+        self._lock = threading.Lock()
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                params = {k: v[0] for k, v in parse_qs(urlsplit(self.path).query).items()}
+                with servidor._lock:
+                    servidor.peticiones.append(params)
+                try:
+                    cuerpo, estado = servidor.responder(params), 200
+                except (KeyError, ValueError) as e:
+                    cuerpo, estado = {"messages": [str(e)]}, 400
+                datos = json.dumps(cuerpo).encode()
+                self.send_response(estado)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(datos)))
+                self.end_headers()
+                self.wfile.write(datos)
+
+            def log_message(self, *args):
+                pass
+
+        self._http = ThreadingHTTPServer(("127.0.0.1", 0), Manejador)
+        self.url = f"http://127.0.0.1:{self._http.server_port}/api/temporal/daily/point"
+        self._hilo = threading.Thread(target=self._http.serve_forever, daemon=True)
+
+    def responder(self, params: dict) -> dict:
+        inicio, fin = pd.Timestamp(params["start"]), pd.Timestamp(params["end"])
+        if inicio < self.clima.index[0] or fin > self.clima.index[-1]:
+            raise ValueError("fuera del rango disponible")
+        tramo = self.clima.loc[inicio:fin, params["parameters"].split(",")]
+        claves = tramo.index.strftime("%Y%m%d")
+        return {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [float(params["longitude"]), float(params["latitude"])]},
+            "properties": {"parameter": {p: dict(zip(claves, tramo[p].tolist())) for p in tramo.columns}},
+        }
+
+    def __enter__(self):
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._http.shutdown()
+        self._http.server_close()
+
+
+@pytest.fixture
+def servidor_nasa():
+    with ServidorNasa() as servidor:
+        yield servidor
+
+
+@pytest.fixture
+def cliente_nasa(servidor_nasa):
+    from codigo.flota_nasa import ClienteNasa
+
+    cliente = ClienteNasa(servidor_nasa.url, timeout=10, reintentos=0)
+    yield cliente
+    cliente.cerrar()
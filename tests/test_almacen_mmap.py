@@ -0,0 +1,49 @@
+# Almacén de series memory-map: claves de carpeta y escritores concurrentes
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from codigo.almacen_mmap import AlmacenSeries, clave_planta
+
+INICIO = pd.Timestamp("2024-01-01")
+DIAS_POR_LOTE = 20
+
+
+def _lote(k: int) -> pd.DataFrame:
+    fechas = pd.date_range(INICIO + pd.Timedelta(days=k * DIAS_POR_LOTE), periods=DIAS_POR_LOTE)
+    return pd.DataFrame({"Fecha": fechas, "Generacion_kWh": np.arange(DIAS_POR_LOTE) + 1000.0 * k})
+
+
+def _escribir(raiz: str, lotes: list[int]):
+    almacen = AlmacenSeries(raiz)
+    for k in lotes:
+        almacen.agregar("Planta A", _lote(k))
+
+
+def test_nombres_que_normalizan_igual_no_comparten_carpeta(tmp_path):
+    assert clave_planta("Planta A") != clave_planta("Planta_A")
+    almacen = AlmacenSeries(str(tmp_path))
+    almacen.agregar("Planta A", _lote(0))
+    almacen.agregar("Planta_A", _lote(1))
+
+    assert almacen.plantas() == sorted(["Planta A", "Planta_A"], key=clave_planta)
+    assert almacen.leer("Planta A")["Fecha"].min() == INICIO
+    assert almacen.leer("Planta_A")["Generacion_kWh"].iloc[0] == 1000.0
+
+
+def test_escritores_concurrentes_no_pierden_filas(tmp_path):
+    raiz = str(tmp_path)
+    _escribir(raiz, [0])
+    # Cuatro procesos extienden la misma planta a la vez, cada uno con sus lotes
+    repartos = [list(range(1 + i, 41, 4)) for i in range(4)]
+    with ProcessPoolExecutor(4, mp_context=multiprocessing.get_context("spawn")) as pool:
+        list(pool.map(_escribir, [raiz] * 4, repartos))
+
+    almacen = AlmacenSeries(raiz)
+    df = almacen.leer("Planta A")
+    esperado = pd.concat([_lote(k) for k in range(41)], ignore_index=True)
+    assert almacen.indice("Planta A")["filas"] == len(esperado)
+    np.testing.assert_array_equal(df["Generacion_kWh"].to_numpy(), esperado["Generacion_kWh"].to_numpy(np.float32))
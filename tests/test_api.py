@@ -0,0 +1,30 @@
+# API Flask: validación HTTP (ETag / Last-Modified) de las series
+
+import time
+
+import pytest
+
+api = pytest.importorskip("api")
+
+
+def _validar(version, **cabeceras):
+    with api.app.test_request_context(headers=cabeceras):
+        return api.validacion_http(("planta", version), version)
+
+
+def test_last_modified_truncado_al_segundo():
+    version = (int(time.time()) - 100) * 1_000_000_000 + 900_000_000
+    cabeceras, vigente = _validar(version)
+    assert not vigente
+
+    assert _validar(version, **{"If-Modified-Since": cabeceras["Last-Modified"]})[1]
+    # Una escritura en el segundo siguiente ya no es la misma versión
+    assert not _validar(version + 200_000_000, **{"If-Modified-Since": cabeceras["Last-Modified"]})[1]
+
+
+def test_cambio_en_el_segundo_en_curso_solo_con_etag():
+    version = time.time_ns()
+    cabeceras, _ = _validar(version)
+    assert "Last-Modified" not in cabeceras
+    assert _validar(version, **{"If-None-Match": cabeceras["ETag"]})[1]
+    assert not _validar(version, **{"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})[1]
@@ -0,0 +1,24 @@
+# Caché Arrow de los Excel del inversor: lectura en frío (openpyxl) y en caliente (Arrow)
+
+import pandas as pd
+import pytest
+
+import sintetico
+from codigo import cache_excel
+
+pytest.importorskip("pyarrow")
+
+
+def test_frio_y_caliente_dan_el_mismo_frame(tmp_path, monkeypatch):
+    export = sintetico.export_inversor("2024-01-01", anios=20 / 365, intervalo_min=60)
+    ruta = sintetico.escribir_export(export, str(tmp_path / "export.xlsx"))
+    carpeta = str(tmp_path / "cache")
+
+    frio = cache_excel.leer_generacion_cacheada(ruta, carpeta)
+    # En caliente no se vuelve a parsear el Excel
+    monkeypatch.setattr(cache_excel, "leer_generacion", lambda ruta: pytest.fail("se leyó el Excel"))
+    caliente = cache_excel.leer_generacion_cacheada(ruta, carpeta)
+
+    assert len(frio) == len(export)
+    pd.testing.assert_frame_equal(caliente, frio, check_dtype=True, check_index_type=True)
+    assert caliente.attrs["descartes"] == frio.attrs["descartes"]
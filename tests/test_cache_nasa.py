@@ -0,0 +1,52 @@
+# Caché de NASA POWER: días provisionales, -999 definitivos y bloqueos por punto
+
+from datetime import date, timedelta
+
+from codigo.cache_nasa import _BLOQUEOS, CacheNasa, _bloqueo_punto
+
+
+class SinDato:
+    """Descarga falsa que responde -999 (sin dato) y cuenta los tramos pedidos."""
+
+    def __init__(self):
+        self.tramos = []
+
+    def __call__(self, lat, lon, parametros, inicio, fin):
+        self.tramos.append((inicio, fin))
+        dias = [inicio + timedelta(days=i) for i in range((fin - inicio).days + 1)]
+        return {p: {d.strftime("%Y%m%d"): -999.0 for d in dias} for p in parametros}
+
+
+def test_menos_999_historico_es_definitivo(tmp_path):
+    descarga = SinDato()
+    # TTL cero: todo lo provisional se volvería a pedir en cada llamada
+    cache = CacheNasa(str(tmp_path / "nasa.sqlite"), ttl_provisional=timedelta(0), descargar=descarga)
+
+    cache.obtener(8.75, -75.89, ["T2M_MAX"], "20200101", "20200105")
+    cache.obtener(8.75, -75.89, ["T2M_MAX"], "20200101", "20200105")
+    assert len(descarga.tramos) == 1
+
+    reciente = date.today() - timedelta(days=2)
+    cache.obtener(8.75, -75.89, ["T2M_MAX"], reciente, reciente)
+    cache.obtener(8.75, -75.89, ["T2M_MAX"], reciente, reciente)
+    assert descarga.tramos[1:] == [(reciente, reciente)] * 2
+
+
+def test_menos_999_de_la_ventana_se_pide_una_vez_mas(tmp_path):
+    descarga = SinDato()
+    cache = CacheNasa(str(tmp_path / "nasa.sqlite"), ttl_provisional=timedelta(0), descargar=descarga)
+    cache.obtener(8.75, -75.89, ["T2M_MAX"], "20200101", "20200101")
+    # Como si se hubiera descargado cuando el día todavía era provisional
+    with cache._conectar() as con:
+        con.execute("UPDATE nasa_diario SET descargado = strftime('%s', '2020-01-03')")
+
+    cache.obtener(8.75, -75.89, ["T2M_MAX"], "20200101", "20200101")
+    cache.obtener(8.75, -75.89, ["T2M_MAX"], "20200101", "20200101")
+    assert len(descarga.tramos) == 2
+
+
+def test_bloqueos_acotados():
+    assert _bloqueo_punto("a.sqlite", 8.75, -75.89) is _bloqueo_punto("a.sqlite", 8.75, -75.89)
+    # Mil puntos distintos no crean bloqueos nuevos
+    usados = {id(_bloqueo_punto("a.sqlite", i / 100, 0.0)) for i in range(1000)}
+    assert usados <= {id(b) for b in _BLOQUEOS}
@@ -0,0 +1,103 @@
+# Detector de bajo desempeño: ajuste en lote, anomalías y subcomando `desempeno`
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from codigo.almacen_mmap import AlmacenSeries
+from codigo.cli import main
+from codigo.desempeno import (COEFICIENTES, MIN_DIAS_AJUSTE, VARIABLES_MODELO, ModeloDesempeno, ajustar_lote,
+                              detectar_flota, rachas)
+
+DIAS = 200
+
+
+def _flota(plantas=("A", "B", "C"), semilla=0) -> pd.DataFrame:
+    """Frame largo con generación = modelo lineal propio de cada planta + ruido."""
+    rng = np.random.default_rng(semilla)
+    partes = []
+    for k, planta in enumerate(plantas):
+        clima = pd.DataFrame({
+            "Radiacion_kWhm2": rng.uniform(2, 7, DIAS),
+            "Temp_Max": rng.normal(32, 1.5, DIAS),
+            "Nubosidad_%": rng.uniform(20, 100, DIAS),
+            "Precipitacion_mm": rng.gamma(0.6, 6.0, DIAS),
+        })
+        coef = np.array([5.0 + k, 60.0 + 10 * k, -0.8, -0.2, -0.3])
+        gen = coef[0] + clima.to_numpy() @ coef[1:] + rng.normal(0, 4.0, DIAS)
+        partes.append(clima.assign(planta=planta, Fecha=pd.date_range("2024-01-01", periods=DIAS),
+                                   Generacion_kWh=gen))
+    return pd.concat(partes, ignore_index=True)
+
+
+def test_ajustar_lote_igual_a_lstsq_por_planta():
+    df = _flota()
+    df.loc[[3, 250], "Temp_Max"] = np.nan  # filas incompletas: fuera del ajuste
+    modelo = ajustar_lote(df.set_index(["planta", "Fecha"]).sort_index())
+
+    for planta, grupo in df.groupby("planta"):
+        grupo = grupo.dropna()
+        X = np.column_stack([np.ones(len(grupo)), grupo[VARIABLES_MODELO].to_numpy()])
+        y = grupo["Generacion_kWh"].to_numpy()
+        coef, ssr, *_ = np.linalg.lstsq(X, y, rcond=None)
+        np.testing.assert_allclose(modelo.loc[planta, COEFICIENTES].to_numpy(float), coef, rtol=1e-6, atol=1e-8)
+        assert modelo.loc[planta, "n"] == len(grupo)
+        assert modelo.loc[planta, "sigma"] == pytest.approx(np.sqrt(ssr[0] / (len(grupo) - len(COEFICIENTES))))
+
+
+def test_pocos_dias_sin_modelo():
+    df = _flota(("A",)).iloc[:MIN_DIAS_AJUSTE - 1]
+    modelo = ajustar_lote(df.set_index(["planta", "Fecha"]))
+    assert modelo.loc["A", COEFICIENTES + ["sigma"]].isna().all()
+
+
+def test_anomalia_sembrada_genera_alerta():
+    df = _flota()
+    caida = (df["planta"] == "B") & df["Fecha"].between("2024-04-10", "2024-04-14")
+    df.loc[caida, "Generacion_kWh"] *= 0.5
+
+    _, puntuacion = detectar_flota(df, max_procesos=1)
+    alertas = rachas(puntuacion)
+
+    assert list(alertas["planta"]) == ["B"]
+    fila = alertas.iloc[0]
+    assert (fila["inicio"], fila["fin"], fila["dias"]) == (pd.Timestamp("2024-04-10"), pd.Timestamp("2024-04-14"), 5)
+    assert fila["deficit_kWh"] < 0
+
+
+def test_incremental_puntua_con_coeficientes_guardados(tmp_path):
+    df = _flota()
+    modelos = ModeloDesempeno(str(tmp_path / "modelo.sqlite"))
+    modelo, _ = detectar_flota(df[df["Fecha"] < "2024-06-01"], max_procesos=1)
+    modelos.guardar(modelo)
+
+    nuevos = df[df["Fecha"] >= "2024-06-01"].copy()
+    nuevos.loc[nuevos["planta"] == "C", "Generacion_kWh"] *= 0.3
+    puntuacion = modelos.puntuar_nuevos(nuevos, max_procesos=1)
+
+    assert len(puntuacion) == len(nuevos)
+    bajos = puntuacion.groupby(level="planta")["bajo"].mean()
+    assert bajos["C"] > 0.9 and bajos["A"] < 0.1
+    pd.testing.assert_frame_equal(modelos.cargar().loc[modelo.index], modelo.astype({"n": "int64"}),
+                                  check_dtype=False)
+
+
+def test_subcomando_desempeno(tmp_path):
+    df = _flota()
+    df.loc[(df["planta"] == "A") & df["Fecha"].between("2024-03-01", "2024-03-04"), "Generacion_kWh"] = 0.0
+    series = AlmacenSeries(str(tmp_path / "series"))
+    for planta, grupo in df.groupby("planta"):
+        series.agregar(planta, grupo.drop(columns="planta"))
+
+    opciones = ["--series", str(tmp_path / "series"), "--modelo", str(tmp_path / "modelo.sqlite"),
+                "--resultados", str(tmp_path / "res"), "--procesos", "1"]
+    assert main(["desempeno", *opciones]) == 0
+    alertas = pd.read_csv(tmp_path / "res" / "Desempeno_Rachas.csv", parse_dates=["inicio", "fin"])
+    assert list(alertas["planta"]) == ["A"]
+    assert alertas.loc[0, "inicio"] == pd.Timestamp("2024-03-01")
+
+    # Incremental: solo los días pedidos, con los coeficientes ya guardados
+    assert main(["desempeno", *opciones, "--incremental", "--desde", "2024-07-01"]) == 0
+    diario = pd.read_csv(tmp_path / "res" / "Desempeno_Diario.csv.gz", parse_dates=["Fecha"])
+    assert diario["Fecha"].min() == pd.Timestamp("2024-07-01")
+    assert set(diario["planta"]) == {"A", "B", "C"}
@@ -0,0 +1,60 @@
+# Modo horario: generación mes a mes desde el lector por bloques
+
+import pandas as pd
+
+import sintetico
+from codigo import horario
+from codigo.esquema import RENOMBRE_CLIMA_HORARIO, aplicar_esquema
+from codigo.generacion import consolidar_diario_por_bloques
+
+
+class ClimaFijo:
+    """Reemplaza a ClimaHorarioMensual: clima constante, sin red."""
+
+    def obtener(self, lat, lon, mes):
+        fechas = pd.date_range(mes, mes + pd.offsets.MonthBegin(1), freq="h", inclusive="left", name="Fecha")
+        return pd.DataFrame({"Fecha": fechas, **{c: 1.0 for c in RENOMBRE_CLIMA_HORARIO.values()}})
+
+    def cerrar(self):
+        pass
+
+
+def _export(tmp_path):
+    df = sintetico.export_inversor("2024-01-01", anios=120 / 365, intervalo_min=15)
+    return sintetico.escribir_export(df, str(tmp_path / "export.csv"))
+
+
+def test_meses_por_bloques_igual_a_lectura_completa(tmp_path):
+    ruta = _export(tmp_path)
+    esperado = aplicar_esquema(consolidar_diario_por_bloques(ruta, desde="2024-01-15", frecuencia="h"))
+    esperado = esperado[esperado["Fecha"] < "2024-03-11"].reset_index(drop=True)
+
+    partes = list(horario.generacion_horaria_por_meses(ruta, desde="2024-01-15", hasta="2024-03-10",
+                                                       tamano_bloque=700))
+
+    assert [m for m, _ in partes] == list(pd.date_range("2024-01-01", periods=3, freq="MS"))
+    obtenido = pd.concat([df for _, df in partes], ignore_index=True)
+    pd.testing.assert_frame_equal(obtenido, esperado)
+
+
+def test_no_lee_despues_de_fin(tmp_path, monkeypatch):
+    ruta = _export(tmp_path)
+    leidos = []
+    original = horario.leer_generacion_por_bloques
+
+    def contando(*args, **kwargs):
+        for bloque in original(*args, **kwargs):
+            leidos.append(bloque["Fecha"].max())
+            yield bloque
+
+    monkeypatch.setattr(horario, "leer_generacion_por_bloques", contando)
+    salida = str(tmp_path / "horario.csv.gz")
+    horario.analizar_horario(8.75, -75.89, "20240101", "20240131", ruta, salida, clima=ClimaFijo(),
+                             tamano_bloque=700)
+
+    df = pd.read_csv(salida, parse_dates=["Fecha"])
+    assert len(df) == 31 * 24
+    assert df["Generacion_kWh"].sum() > 0
+    # Solo se leyó hasta el primer bloque que pasa el 31 de enero
+    assert max(leidos) < pd.Timestamp("2024-03-01")
+
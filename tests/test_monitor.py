@@ -0,0 +1,132 @@
+# Monitor en vivo alimentado con el inversor simulado (API/monitor.py)
+
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+
+from monitor import MESES_EN_MEMORIA, Monitor, simular_inversor
+
+INICIO = datetime(2025, 1, 1)
+PASOS_DIA = 96  # lecturas de 15 minutos
+
+
+class Grabador:
+    """Recibe lo que publica `simular_inversor` en lugar de un Monitor."""
+
+    def __init__(self):
+        self.lecturas, self.clima = [], []
+
+    def ingerir_lectura(self, lectura: dict):
+        self.lecturas.append(lectura)
+
+    def ingerir_clima(self, dia: dict):
+        self.clima.append(dia)
+
+
+def _simular(destino, pasos: int, plantas=("A", "B")):
+    asyncio.run(simular_inversor(destino, plantas=plantas, intervalo=0, inicio=INICIO, pasos=pasos))
+
+
+async def _peticion(puerto: int, metodo: str, ruta: str, datos=None) -> tuple[int, dict]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", puerto)
+    cuerpo = json.dumps(datos).encode() if datos is not None else b""
+    writer.write(f"{metodo} {ruta} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(cuerpo)}\r\n\r\n".encode() + cuerpo)
+    await writer.drain()
+    respuesta = await reader.read()
+    writer.close()
+    cabecera, _, contenido = respuesta.partition(b"\r\n\r\n")
+    return int(cabecera.split()[1]), json.loads(contenido)
+
+
+def _con_servidor(monitor: Monitor, pasos):
+    """Levanta el monitor en un puerto libre y ejecuta `pasos(puerto)` contra él."""
+    async def principal():
+        servidor = await asyncio.start_server(monitor.manejar, "127.0.0.1", 0)
+        try:
+            return await pasos(servidor.sockets[0].getsockname()[1])
+        finally:
+            servidor.close()
+            await servidor.wait_closed()
+    return asyncio.run(principal())
+
+
+def test_simulador_alimenta_kpis():
+    monitor = Monitor({"A": {1: 1000.0}})
+    _simular(monitor, PASOS_DIA + 1)
+
+    assert set(monitor.plantas) == {"A", "B"}
+    resumen = monitor.plantas["A"].resumen(INICIO.date())
+    assert resumen["gen_dia"] > 0
+    # Al cerrar el día el simulador publica el clima: ya hay PR y cumplimiento
+    assert resumen["rad_dia"] is not None and resumen["pr_dia"] > 0
+    assert resumen["cumplimiento_mes"] == pytest.approx(100.0 * resumen["gen_mes"] / 1000.0, abs=0.1)
+
+
+def test_lotes_del_simulador_por_http():
+    grabador = Grabador()
+    _simular(grabador, PASOS_DIA + 1)
+    local = Monitor()
+    for lectura in grabador.lecturas:
+        local.ingerir_lectura(lectura)
+    for dia in grabador.clima:
+        local.ingerir_clima(dia)
+
+    monitor = Monitor()
+
+    async def pasos(puerto):
+        lecturas = await _peticion(puerto, "POST", "/lecturas", grabador.lecturas)
+        clima = await _peticion(puerto, "POST", "/clima", grabador.clima)
+        return lecturas, clima, await _peticion(puerto, "GET", "/estado")
+
+    lecturas, clima, (estado, kpis) = _con_servidor(monitor, pasos)
+
+    assert lecturas == (202, {"ok": True, "ingeridos": len(grabador.lecturas)})
+    assert clima == (202, {"ok": True, "ingeridos": len(grabador.clima)})
+    assert estado == 200
+    assert kpis == {p: k.resumen(max(k.dias)) for p, k in local.plantas.items()}
+
+
+def test_lote_con_item_invalido_no_ingiere_nada():
+    grabador = Grabador()
+    _simular(grabador, 4, plantas=("A",))
+    lote = grabador.lecturas + [{"planta": "A", "fecha": "no es fecha", "energia_kwh": 1}]
+    monitor = Monitor()
+
+    async def pasos(puerto):
+        return await _peticion(puerto, "POST", "/lecturas", lote)
+
+    estado, cuerpo = _con_servidor(monitor, pasos)
+
+    assert estado == 400
+    assert cuerpo["item"] == len(lote) - 1
+    assert monitor.plantas == {}
+    assert monitor.ultimo_id == 0
+
+
+@pytest.mark.parametrize("valor", ["NaN", "inf", -1.0])
+def test_rechaza_valores_no_finitos_o_negativos(valor):
+    lectura = {"planta": "A", "fecha": "2025-01-01T10:00", "energia_kwh": valor}
+    monitor = Monitor()
+
+    monitor.ingerir_lectura(lectura)
+    assert monitor.plantas == {}
+
+    async def pasos(puerto):
+        return await _peticion(puerto, "POST", "/lecturas", [lectura])
+
+    estado, cuerpo = _con_servidor(monitor, pasos)
+    assert estado == 400 and cuerpo["item"] == 0
+    assert monitor.plantas == {}
+
+
+def test_meses_en_memoria_acotados():
+    monitor = Monitor()
+    for mes in range(1, 25):
+        monitor.ingerir_lectura({"planta": "A", "fecha": f"{2023 + (mes - 1) // 12}-{(mes - 1) % 12 + 1:02d}-01",
+                                 "energia_kwh": 1.0})
+    kpis = monitor.plantas["A"]
+    assert len(kpis.meses) == MESES_EN_MEMORIA
+    assert max(kpis.meses) == (2024, 12)
+    assert kpis.gen_total == 24.0
@@ -0,0 +1,83 @@
+# Pipeline y descarga de flota contra el servidor NASA POWER local (ver conftest.py)
+
+import pandas as pd
+
+import sintetico
+from codigo import pipeline
+from codigo.cache_nasa import celdas_nasa
+from codigo.flota_nasa import clima_planta, descargar_celdas, descargar_flota, expandir_plantas
+from codigo.generacion import COLUMNAS_KWH
+
+
+def test_pipeline_planta_contra_servidor_local(tmp_path, servidor_nasa, cliente_nasa):
+    ruta_gen = sintetico.escribir_export(
+        sintetico.export_inversor("2024-03-01", anios=60 / 365, intervalo_min=60),
+        str(tmp_path / "export.csv"),
+    )
+    ruta_cache = str(tmp_path / "nasa.sqlite")
+
+    df_clima = pipeline.descargar_clima(8.7563, -75.8886, "20240301", "20240429", nombre="P",
+                                        ruta_cache=ruta_cache, descargar=cliente_nasa.descargar)
+    df_gen = pipeline.cargar_generacion(ruta_gen, nombre="P", streaming=True)
+    df_union = pipeline.unir(df_gen, df_clima, nombre="P")
+    revisado, _ = pipeline.revisar_calidad(df_union, "P", carpeta=str(tmp_path))
+    ruta = pipeline.guardar_resultado(revisado, str(tmp_path / "P.csv.gz"))
+
+    assert len(servidor_nasa.peticiones) == 1
+    assert len(df_union) == 60
+    assert df_union["Fecha"].is_monotonic_increasing
+    assert df_union[COLUMNAS_KWH + ["Radiacion_kWhm2"]].notna().all().all()
+    esperado = servidor_nasa.clima.loc["2024-03-01":"2024-04-29", "ALLSKY_SFC_SW_DWN"].to_numpy()
+    assert (abs(df_union["Radiacion_kWhm2"].to_numpy() - esperado) < 1e-4).all()
+    assert len(pd.read_csv(ruta)) == 60
+
+    # Segunda vez: todo sale de la caché (los días ya no son provisionales)
+    pipeline.descargar_clima(8.7563, -75.8886, "20240301", "20240429", ruta_cache=ruta_cache,
+                             descargar=cliente_nasa.descargar)
+    assert len(servidor_nasa.peticiones) == 1
+
+
+def test_descargar_flota_una_peticion_por_celda(servidor_nasa, cliente_nasa):
+    sitios = pd.concat([
+        sintetico.flota(4, dispersion_grados=0.05),
+        pd.DataFrame({"planta": ["LEJANA"], "lat": [6.25], "lon": [-75.56]}),
+    ], ignore_index=True)
+
+    clima, plantas = descargar_flota(sitios, "20240101", "20240131", cliente=cliente_nasa)
+
+    celdas = set(celdas_nasa(sitios["lat"], sitios["lon"]))
+    assert clima.attrs["errores"] == {}
+    assert len(servidor_nasa.peticiones) == len(celdas)
+    # Una serie por celda, no por planta; la tabla planta → celda hace el cruce
+    assert len(clima) == len(celdas) * 31 * 5
+    assert set(plantas["planta"]) == set(sitios["planta"])
+    largo = expandir_plantas(clima, plantas)
+    assert largo.groupby("planta", observed=True).size().eq(31 * 5).all()
+    # Cada celda se consulta en las coordenadas de una planta real, no en su centro
+    consultados = {(float(p["latitude"]), float(p["longitude"])) for p in servidor_nasa.peticiones}
+    assert consultados <= set(zip(sitios["lat"], sitios["lon"]))
+
+
+def test_descargar_flota_aisla_errores(servidor_nasa, cliente_nasa):
+    sitios = pd.DataFrame({"planta": ["A"], "lat": [8.7563], "lon": [-75.8886]})
+
+    # Rango que el servidor no tiene: la planta queda en errores y no se lanza
+    clima, plantas = descargar_flota(sitios, "20200101", "20200131", cliente=cliente_nasa)
+
+    assert clima.empty
+    assert list(plantas["planta"]) == ["A"]
+    assert "HTTPError" in clima.attrs["errores"]["A"]
+
+
+def test_plantas_de_una_celda_comparten_serie(servidor_nasa, cliente_nasa):
+    sitios = pd.DataFrame({"planta": ["A", "B", "LEJANA"], "lat": [8.7563, 8.7601, 6.25],
+                           "lon": [-75.8886, -75.8850, -75.56]})
+
+    series, asignacion = descargar_celdas(sitios, "20240101", "20240110", cliente=cliente_nasa)
+    assert asignacion["A"] == asignacion["B"] != asignacion["LEJANA"]
+    assert series[asignacion["A"]] is series[asignacion["B"]]
+
+    clima, plantas = descargar_flota(sitios, "20240101", "20240110", cliente=cliente_nasa)
+    assert clima["celda"].nunique() == 2
+    assert isinstance(plantas["celda"].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(clima_planta(clima, plantas, "A"), clima_planta(clima, plantas, "B"))